@@ -1,197 +1,87 @@
 import pandas as pd
+import numpy as np
 import json
+import hashlib
+import io
 import os
+import zipfile
 import sys
 from datetime import datetime
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 
-def process_single_quarter(quarter_dir, output_dir='processed'):
+import sec_documents
+import sec_tsv
+from sec_documents import iter_company_documents, parse_filing_date
+from sec_stream import OUTPUT_FORMATS, write_jsonl, write_metadata
+from sec_tsv import (
+    REQUIRED_FILES, file_hash, find_tsv_files, is_quarter_archive, load_quarter_tables,
+    quarter_name_for, source_hash, source_stat
+)
+
+# Build manifest kept in the output directory
+MANIFEST_FILE = 'manifest.json'
+
+def process_single_quarter(quarter_dir, output_dir='processed', cache_dir=None, output_format='json'):
     """
     Process a single quarterly folder and save as JSON
     
     Args:
-        quarter_dir: Path to quarterly folder (e.g., '2023Q2_d')
+        quarter_dir: Path to quarterly folder or archive (e.g., '2023Q2_d' or '2023Q2_d.zip')
         output_dir: Directory to save processed JSON files
+        cache_dir: Directory for parsed-table caches (None = always parse the TSVs)
+        output_format: 'json' (one indented document) or 'jsonl' (one company per line
+                       plus a .meta.json sidecar)
     """
     
-    quarter_name = os.path.basename(quarter_dir)
-    
-    # Check for required files
-    required_files = ['FORMDSUBMISSION.tsv', 'ISSUERS.tsv', 'OFFERING.tsv', 'RELATEDPERSONS.tsv']
-    missing = [f for f in required_files if not os.path.exists(os.path.join(quarter_dir, f))]
-    
-    if missing:
-        print(f"⏭️  {quarter_name:15s} - Missing files: {', '.join(missing)}")
-        return None
+    quarter_name = quarter_name_for(quarter_dir)
     
     try:
-        # Load data
-        submissions = pd.read_csv(os.path.join(quarter_dir, 'FORMDSUBMISSION.tsv'), sep='\t', low_memory=False)
-        issuers = pd.read_csv(os.path.join(quarter_dir, 'ISSUERS.tsv'), sep='\t', low_memory=False)
-        offerings = pd.read_csv(os.path.join(quarter_dir, 'OFFERING.tsv'), sep='\t', low_memory=False)
-        people = pd.read_csv(os.path.join(quarter_dir, 'RELATEDPERSONS.tsv'), sep='\t', low_memory=False)
+        # Check for required files
+        _, missing = find_tsv_files(quarter_dir)
         
-        # Join everything - NO FILTERING
-        all_companies = offerings.merge(issuers, on='ACCESSIONNUMBER', how='inner')
-        all_companies = all_companies.merge(
-            submissions[['ACCESSIONNUMBER', 'FILING_DATE', 'SUBMISSIONTYPE']], 
-            on='ACCESSIONNUMBER',
-            how='left'
-        )
+        if missing:
+            print(f"⏭️  {quarter_name:15s} - Missing files: {', '.join(missing)}")
+            return None
         
-        # Convert amount to numeric
-        all_companies['TOTALAMOUNTSOLD'] = pd.to_numeric(all_companies['TOTALAMOUNTSOLD'], errors='coerce')
+        startups = quarter_companies(quarter_dir, quarter_name, cache_dir)
         
-        # Process each company
-        startups = []
-        for _, row in all_companies.iterrows():
-            accession = row['ACCESSIONNUMBER']
-            company_people = people[people['ACCESSIONNUMBER'] == accession]
-            
-            # Build related persons
-            related_persons = []
-            for _, person in company_people.iterrows():
-                name_parts = [
-                    clean_value(person.get('FIRSTNAME')),
-                    clean_value(person.get('MIDDLENAME')),
-                    clean_value(person.get('LASTNAME'))
-                ]
-                full_name = ' '.join([p for p in name_parts if p])
-                
-                relationships = []
-                for rel_col in ['RELATIONSHIP_1', 'RELATIONSHIP_2', 'RELATIONSHIP_3']:
-                    rel = clean_value(person.get(rel_col))
-                    if rel:
-                        relationships.append(rel)
-                
-                related_persons.append({
-                    'name': full_name if full_name else None,
-                    'first_name': clean_value(person.get('FIRSTNAME')),
-                    'middle_name': clean_value(person.get('MIDDLENAME')),
-                    'last_name': clean_value(person.get('LASTNAME')),
-                    'relationships': relationships,
-                    'city': clean_value(person.get('CITY')),
-                    'state': clean_value(person.get('STATEORCOUNTRY'))
-                })
-            
-            # Calculate company age and funding recency
-            year_inc = clean_int(row.get('YEAROFINC_VALUE_ENTERED'))
-            current_year = datetime.now().year
-            years_since_inc = (current_year - year_inc) if year_inc else None
-            
-            # Parse filing date and calculate recency
-            filing_date = clean_value(row.get('FILING_DATE'))
-            months_since_funding = None
-            funding_recency = None
-            
-            if filing_date:
-                try:
-                    for fmt in ['%d-%b-%Y', '%Y-%m-%d', '%m/%d/%Y']:
-                        try:
-                            file_dt = datetime.strptime(filing_date, fmt)
-                            months_since_funding = (datetime.now() - file_dt).days // 30
-                            
-                            if months_since_funding < 6:
-                                funding_recency = "very_recent"
-                            elif months_since_funding < 12:
-                                funding_recency = "recent"
-                            elif months_since_funding < 24:
-                                funding_recency = "moderate"
-                            else:
-                                funding_recency = "older"
-                            break
-                        except:
-                            continue
-                except:
-                    pass
-            
-            # Estimate stage based on amount
-            amount_sold = clean_float(row.get('TOTALAMOUNTSOLD'))
-            stage_estimate = None
-            if amount_sold:
-                if amount_sold < 2_000_000:
-                    stage_estimate = "Pre-Seed"
-                elif amount_sold < 5_000_000:
-                    stage_estimate = "Seed"
-                elif amount_sold < 15_000_000:
-                    stage_estimate = "Series A"
-                elif amount_sold < 40_000_000:
-                    stage_estimate = "Series B"
-                elif amount_sold < 100_000_000:
-                    stage_estimate = "Series C"
-                else:
-                    stage_estimate = "Series D+"
-            
-            state = clean_value(row.get('STATEORCOUNTRY'))
-            industry = clean_value(row.get('INDUSTRYGROUPTYPE'))
-            
-            startup = {
-                'accession_number': accession,
-                'company': {
-                    'name': clean_value(row.get('ENTITYNAME')),
-                    'address': {
-                        'street1': clean_value(row.get('STREET1')),
-                        'street2': clean_value(row.get('STREET2')),
-                        'city': clean_value(row.get('CITY')),
-                        'state': state,
-                        'zip': clean_value(row.get('ZIPCODE')),
-                        'phone': clean_value(row.get('ISSUERPHONENUMBER'))
-                    },
-                    'entity_type': clean_value(row.get('ENTITYTYPE')),
-                    'year_incorporated': year_inc,
-                    'industry': industry
-                },
-                'funding': {
-                    'total_offering_amount': clean_float(row.get('TOTALOFFERINGAMOUNT')),
-                    'total_amount_sold': amount_sold,
-                    'total_remaining': clean_float(row.get('TOTALREMAINING')),
-                    'number_of_investors': clean_int(row.get('TOTALNUMBERALREADYINVESTED')),
-                    'date_of_first_sale': clean_value(row.get('SALE_DATE')),
-                    'stage_estimate': stage_estimate
-                },
-                'filing': {
-                    'date_filed': filing_date,
-                    'submission_type': clean_value(row.get('SUBMISSIONTYPE')),
-                    'quarter': quarter_name
-                },
-                'company_age': {
-                    'years_since_incorporation': years_since_inc,
-                    'months_since_funding': months_since_funding,
-                    'funding_recency': funding_recency
-                },
-                'related_persons': related_persons,
+        # Save to file
+        Path(output_dir).mkdir(exist_ok=True)
+        output_file = quarter_output_file(quarter_name, output_dir, output_format)
+        
+        if output_format == 'jsonl':
+            # Write each company as it is built; totals go in the metadata sidecar
+            total_companies, total_executives = write_jsonl(output_file, startups)
+            output = {
                 'metadata': {
-                    'source_quarter': quarter_name,
-                    'processed_date': datetime.now().isoformat(),
-                    'prediction_scores': {
-                        'international_hiring': None,
-                        'recent_grad_hiring': None
-                    }
+                    'quarter': quarter_name,
+                    'generated_at': datetime.now().isoformat(),
+                    'total_companies': total_companies,
+                    'total_executives': total_executives
                 }
             }
+            write_metadata(output_file, output['metadata'])
+        else:
+            startups = list(startups)
             
-            startups.append(startup)
-        
-        # Create output
-        output = {
-            'metadata': {
-                'quarter': quarter_name,
-                'generated_at': datetime.now().isoformat(),
-                'total_companies': len(startups),
-                'total_executives': sum(len(s['related_persons']) for s in startups)
-            },
-            'companies': startups
-        }
-        
-        # Save to file
-        Path(output_dir).mkdir(exist_ok=True)
-        output_file = os.path.join(output_dir, f'companies_sec_{quarter_name}.json')
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+            # Create output
+            output = {
+                'metadata': {
+                    'quarter': quarter_name,
+                    'generated_at': datetime.now().isoformat(),
+                    'total_companies': len(startups),
+                    'total_executives': sum(len(s['related_persons']) for s in startups)
+                },
+                'companies': startups
+            }
+            
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(output, f, indent=2, ensure_ascii=False)
         
-        print(f"✅ {quarter_name:15s} - {len(startups):4d} companies → {os.path.basename(output_file)}")
+        print(f"✅ {quarter_name:15s} - {output['metadata']['total_companies']:4d} companies → {os.path.basename(output_file)}")
         
         return output
         
@@ -199,19 +89,207 @@ def process_single_quarter(quarter_dir, output_dir='processed'):
         print(f"❌ {quarter_name:15s} - Error: {e}")
         return None
 
-def process_all_quarters_individually(data_dir='.', output_dir='processed'):
-    """Process all quarters and save each as separate JSON"""
+def quarter_companies(quarter_dir, quarter_name, cache_dir=None):
+    """Load and join a quarter's TSVs and return a generator of its company documents"""
     
-    print("=" * 70)
-    print("SEC Form D Quarter-by-Quarter Processor")
-    print("=" * 70)
+    # Load data (streamed straight from the archive for *_d.zip)
+    submissions, issuers, offerings, people = load_quarter_tables(quarter_dir, cache_dir)
+    
+    # Join everything - NO FILTERING
+    all_companies = offerings.merge(issuers, on='ACCESSIONNUMBER', how='inner')
+    all_companies = all_companies.merge(
+        submissions[['ACCESSIONNUMBER', 'FILING_DATE', 'SUBMISSIONTYPE']], 
+        on='ACCESSIONNUMBER',
+        how='left'
+    )
+    
+    # Convert amount to numeric
+    all_companies['TOTALAMOUNTSOLD'] = pd.to_numeric(all_companies['TOTALAMOUNTSOLD'], errors='coerce')
+    
+    # Clean every column once; the nested records are built from them one at a time
+    documents = iter_company_documents(all_companies, people)
+    stages = estimate_stages(all_companies['TOTALAMOUNTSOLD'])
+    
+    return build_quarter_companies(documents, stages, quarter_name)
+
+def build_quarter_companies(documents, stages, quarter_name):
+    """
+    Yield the final company documents for a quarter, adding age, recency and stage.
+    documents can be a generator; each one is finished and handed on before the next is built.
+    """
+    
+    now = datetime.now()
+    current_year = now.year
+    # Funding recency is worked out once per distinct filing date, as dates turn up
+    recency_by_date = {}
+    processed_date = now.isoformat()
+    
+    for document, stage_estimate in zip(documents, stages):
+        # Calculate company age and funding recency
+        year_inc = document['company']['year_incorporated']
+        years_since_inc = (current_year - year_inc) if year_inc else None
+        filing_date = document['filing']['date_filed']
+        recency = recency_by_date.get(filing_date)
+        if recency is None:
+            recency = recency_by_date[filing_date] = funding_recency(filing_date, now) if filing_date else (None, None)
+        months_since_funding, recency = recency
+        
+        document['funding']['stage_estimate'] = stage_estimate
+        document['filing']['quarter'] = quarter_name
+        
+        startup = {
+            'accession_number': document['accession_number'],
+            'company': document['company'],
+            'funding': document['funding'],
+            'filing': document['filing'],
+            'company_age': {
+                'years_since_incorporation': years_since_inc,
+                'months_since_funding': months_since_funding,
+                'funding_recency': recency
+            },
+            'related_persons': document['related_persons'],
+            'metadata': {
+                'source_quarter': quarter_name,
+                'processed_date': processed_date,
+                'prediction_scores': {
+                    'international_hiring': None,
+                    'recent_grad_hiring': None
+                }
+            }
+        }
+        
+        yield startup
+
+def process_quarter_captured(quarter_dir, output_dir='processed', cache_dir=None, output_format='json'):
+    """
+    Run process_single_quarter in a pool worker.
+    Returns (succeeded, status_text) so the parent can print status lines in order
+    without shipping the whole quarter document back across processes.
+    """
+    status = io.StringIO()
+    with redirect_stdout(status):
+        result = process_single_quarter(quarter_dir, output_dir, cache_dir, output_format)
+    return bool(result), status.getvalue()
+
+def quarter_output_file(quarter_name, output_dir='processed', output_format='json'):
+    """Path of the JSON (or JSONL) file written for a quarter"""
+    return os.path.join(output_dir, f'companies_sec_{quarter_name}.{output_format}')
+
+def script_version():
+    """Hash of the code that shapes the quarterly JSON, so code changes force a rebuild"""
+    digest = hashlib.sha256()
+    for path in (__file__, sec_documents.__file__, sec_tsv.__file__):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def load_manifest(output_dir):
+    """Load the build manifest from the output directory (empty if there isn't one)"""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'quarters': {}}
+    manifest.setdefault('quarters', {})
+    return manifest
+
+def save_manifest(output_dir, manifest):
+    """Write the build manifest atomically"""
+    Path(output_dir).mkdir(exist_ok=True)
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def fingerprint_inputs(quarter_dir, previous=None):
+    """
+    Fingerprint a quarter's TSV inputs as {filename: {size, mtime_ns, hash}}.
+    Hashes from the previous manifest entry are reused when size and mtime are unchanged.
+    Returns None if the quarter can't be fingerprinted (missing files, bad archive).
+    """
+    previous = previous or {}
+    inputs = {}
+    try:
+        for filename in REQUIRED_FILES:
+            size, mtime_ns = source_stat(quarter_dir, filename)
+            known = previous.get(filename, {})
+            if known.get('size') == size and known.get('mtime_ns') == mtime_ns:
+                digest = known.get('hash')
+            else:
+                digest = source_hash(quarter_dir, filename)
+            inputs[filename] = {'size': size, 'mtime_ns': mtime_ns, 'hash': digest}
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return None
+    return inputs
+
+def is_up_to_date(entry, inputs, version, output_file):
+    """True if a manifest entry matches the current inputs, code and expected output file"""
+    if not entry or not inputs or entry.get('script_version') != version:
+        return False
+    if entry.get('output_file') != os.path.basename(output_file):
+        return False
     
-    # Find all quarterly directories
+    recorded = {f: info.get('hash') for f, info in entry.get('inputs', {}).items()}
+    if recorded != {f: info['hash'] for f, info in inputs.items()}:
+        return False
+    
+    if not os.path.isfile(output_file):
+        return False
+    stat = os.stat(output_file)
+    if stat.st_size == entry.get('output_size') and stat.st_mtime_ns == entry.get('output_mtime_ns'):
+        return True
+    return file_hash(output_file) == entry.get('output_hash')
+
+def manifest_entry(inputs, version, output_file):
+    """Manifest record for a quarter that was just written"""
+    stat = os.stat(output_file)
+    return {
+        'inputs': inputs,
+        'script_version': version,
+        'output_file': os.path.basename(output_file),
+        'output_size': stat.st_size,
+        'output_mtime_ns': stat.st_mtime_ns,
+        'output_hash': file_hash(output_file),
+        'processed_at': datetime.now().isoformat()
+    }
+
+def find_quarter_dirs(data_dir='.'):
+    """All quarterly directories and *_d.zip archives in data_dir, in name order"""
     quarter_dirs = []
     for item in sorted(os.listdir(data_dir)):
         item_path = os.path.join(data_dir, item)
-        if os.path.isdir(item_path) and ('Q' in item or 'q' in item):
+        if not ('Q' in item or 'q' in item):
+            continue
+        if os.path.isdir(item_path):
             quarter_dirs.append(item_path)
+        elif is_quarter_archive(item_path):
+            # Prefer the extracted folder when both exist
+            if not os.path.isdir(os.path.join(data_dir, quarter_name_for(item_path))):
+                quarter_dirs.append(item_path)
+    return quarter_dirs
+
+def process_all_quarters_individually(data_dir='.', output_dir='processed', workers=1, cache_dir=None,
+                                      force=False, output_format='json'):
+    """
+    Process all quarters and save each as separate JSON
+    
+    Quarters whose inputs, code and output are unchanged since the last run
+    (per the manifest in output_dir) are skipped unless force is set.
+    
+    Args:
+        data_dir: Directory containing quarterly folders
+        output_dir: Directory to save processed JSON files
+        workers: Number of worker processes (1 = process sequentially)
+        cache_dir: Directory for parsed-table caches (None = always parse the TSVs)
+        force: Reprocess every quarter regardless of the manifest
+        output_format: 'json' or 'jsonl' (see process_single_quarter)
+    """
+    
+    print("=" * 70)
+    print("SEC Form D Quarter-by-Quarter Processor")
+    print("=" * 70)
+    
+    quarter_dirs = find_quarter_dirs(data_dir)
     
     if not quarter_dirs:
         print(f"❌ No quarterly directories found in {os.path.abspath(data_dir)}")
@@ -222,55 +300,133 @@ def process_all_quarters_individually(data_dir='.', output_dir='processed'):
     
     processed = []
     failed = []
+    skipped = []
     
+    # Skip quarters that haven't changed since the last run
+    manifest = load_manifest(output_dir)
+    version = script_version()
+    pending = []
     for quarter_dir in quarter_dirs:
-        result = process_single_quarter(quarter_dir, output_dir)
-        if result:
-            processed.append(os.path.basename(quarter_dir))
+        quarter_name = quarter_name_for(quarter_dir)
+        entry = manifest['quarters'].get(quarter_name)
+        inputs = fingerprint_inputs(quarter_dir, entry.get('inputs') if entry else None)
+        
+        output_file = quarter_output_file(quarter_name, output_dir, output_format)
+        
+        if not force and is_up_to_date(entry, inputs, version, output_file):
+            print(f"⏩ {quarter_name:15s} - Up to date, skipped")
+            skipped.append(quarter_name)
+            # Remember fresh mtimes so touched-but-unchanged files aren't rehashed next run
+            entry['inputs'] = inputs
         else:
-            failed.append(os.path.basename(quarter_dir))
+            pending.append((quarter_dir, inputs))
+    
+    if skipped:
+        save_manifest(output_dir, manifest)
+    
+    def record(quarter_dir, inputs, succeeded):
+        quarter_name = quarter_name_for(quarter_dir)
+        if succeeded:
+            processed.append(quarter_name)
+            if inputs:
+                output_file = quarter_output_file(quarter_name, output_dir, output_format)
+                manifest['quarters'][quarter_name] = manifest_entry(inputs, version, output_file)
+            else:
+                manifest['quarters'].pop(quarter_name, None)
+        else:
+            failed.append(quarter_name)
+            manifest['quarters'].pop(quarter_name, None)
+        save_manifest(output_dir, manifest)
+    
+    if workers > 1 and len(pending) > 1:
+        print(f"⚙️  Workers: {workers}\n")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(process_quarter_captured, quarter_dir, output_dir, cache_dir, output_format)
+                for quarter_dir, _ in pending
+            ]
+            
+            # Print status lines in quarter order as results become available
+            for (quarter_dir, inputs), future in zip(pending, futures):
+                quarter_name = quarter_name_for(quarter_dir)
+                try:
+                    succeeded, status = future.result()
+                except Exception as e:
+                    succeeded, status = False, f"❌ {quarter_name:15s} - Worker error: {e}\n"
+                
+                print(status, end='')
+                record(quarter_dir, inputs, succeeded)
+    else:
+        for quarter_dir, inputs in pending:
+            result = process_single_quarter(quarter_dir, output_dir, cache_dir, output_format)
+            record(quarter_dir, inputs, bool(result))
     
     # Summary
     print(f"\n{'=' * 70}")
     print("Summary")
     print("=" * 70)
     print(f"✅ Processed: {len(processed)} quarters")
+    print(f"⏩ Up to date: {len(skipped)} quarters")
     print(f"❌ Failed: {len(failed)} quarters")
     print(f"📁 JSON files saved to: {os.path.abspath(output_dir)}/")
     
     if failed:
         print(f"\n⚠️  Failed quarters: {', '.join(failed)}")
 
-def clean_value(val):
-    """Clean pandas values - convert NaN to None"""
-    if pd.isna(val):
-        return None
-    return str(val).strip() if val else None
-
-def clean_float(val):
-    """Convert to float, handle NaN"""
-    if pd.isna(val):
-        return None
-    try:
-        return float(val)
-    except:
-        return None
+def funding_recency(filing_date, now):
+    """Return (months_since_funding, funding_recency) for a filing date string"""
+    file_dt = parse_filing_date(filing_date)
+    if file_dt is not None:
+        months_since_funding = (now - file_dt).days // 30
+        
+        if months_since_funding < 6:
+            recency = "very_recent"
+        elif months_since_funding < 12:
+            recency = "recent"
+        elif months_since_funding < 24:
+            recency = "moderate"
+        else:
+            recency = "older"
+        return months_since_funding, recency
+    
+    return None, None
 
-def clean_int(val):
-    """Convert to int, handle NaN"""
-    if pd.isna(val):
-        return None
-    try:
-        return int(float(val))
-    except:
-        return None
+def estimate_stages(amounts):
+    """Estimate funding stage from amount sold for a whole column (None if missing or zero)"""
+    amounts = pd.to_numeric(amounts, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    stages = np.select(
+        [
+            amounts < 2_000_000,
+            amounts < 5_000_000,
+            amounts < 15_000_000,
+            amounts < 40_000_000,
+            amounts < 100_000_000
+        ],
+        ["Pre-Seed", "Seed", "Series A", "Series B", "Series C"],
+        default="Series D+"
+    ).astype(object)
+    stages[np.isnan(amounts) | (amounts == 0)] = None
+    return stages.tolist()
 
 if __name__ == '__main__':
     import argparse
     
     parser = argparse.ArgumentParser(description='Process SEC Form D quarters individually')
     parser.add_argument('--output-dir', default='processed', help='Output directory for JSON files')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of quarters to process in parallel (default: 1, 0 = one per CPU)')
+    parser.add_argument('--cache-dir', default='.sec_cache',
+                        help='Directory for cached parsed TSV tables (default: .sec_cache)')
+    parser.add_argument('--no-cache', action='store_true', help='Always parse the TSV files')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='json',
+                        help='json: one indented file per quarter; jsonl: one company per line (default: json)')
+    parser.add_argument('--force', action='store_true',
+                        help='Reprocess every quarter, even if the manifest says it is up to date')
     
     args = parser.parse_args()
     
-    process_all_quarters_individually('.', args.output_dir)
\ No newline at end of file
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    
+    cache_dir = None if args.no_cache else args.cache_dir
+    
+    process_all_quarters_individually('.', args.output_dir, workers, cache_dir, args.force, args.format)
\ No newline at end of file
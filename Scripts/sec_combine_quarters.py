@@ -1,21 +1,184 @@
+import heapq
 import json
 import os
+import tempfile
 from datetime import datetime
-from collections import defaultdict
-import pandas as pd
 
-def combine_and_deduplicate(input_dir='processed', output_file='startups_master.json', stats_file='startups_stats.csv'):
+from sec_stats import (
+    DEFAULT_GROUPINGS, DEFAULT_PERCENTILES, DEFAULT_THRESHOLDS, aggregate, companies_frame, parse_grouping,
+    statistics_table
+)
+from sec_stream import (
+    OUTPUT_FORMATS, output_path_for, read_companies, write_json_document, write_jsonl, write_metadata
+)
+
+# How many sorted runs the external merge reads at once; more are merged in passes
+MERGE_FAN_IN = 64
+
+def months_since_funding(company):
+    """Funding recency used to pick between duplicates and to order the master - None counts as very old (999)"""
+    months = company['company_age'].get('months_since_funding')
+    return months if months is not None else 999
+
+def iter_quarter_companies(input_dir, json_files, quarters_processed):
+    """Stream companies from each quarterly file in turn, recording its quarter once read"""
+    for json_file in json_files:
+        filepath = os.path.join(input_dir, json_file)
+        document, companies = read_companies(filepath)
+        
+        count = 0
+        for company in companies:
+            count += 1
+            yield company
+        
+        fallback = json_file[len('companies_sec_'):].rsplit('.', 1)[0]
+        quarters_processed.append(document.get('metadata', {}).get('quarter', fallback))
+        
+        print(f"✅ Loaded {json_file}: {count:,} companies")
+
+def run_key(record):
+    """Sort key of a spilled (key, key, company) record"""
+    return record[0], record[1]
+
+def spill(records, temp_dir):
+    """Write already-sorted records to a new run file, one JSON array per line"""
+    fd, path = tempfile.mkstemp(suffix='.jsonl', dir=temp_dir)
+    with open(fd, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return path
+
+def write_run(records, temp_dir, runs):
+    """Sort one batch of (key, key, company) records and spill it to disk as a run"""
+    records.sort(key=run_key)
+    runs.append(spill(records, temp_dir))
+    records.clear()
+
+def read_run(path):
+    """Yield the records of a spilled run in order"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+def merge_runs(runs, temp_dir):
+    """
+    k-way merge sorted runs by their two keys, first collapsing them in passes of
+    MERGE_FAN_IN so only that many files are ever open at once.
+    """
+    while len(runs) > MERGE_FAN_IN:
+        merged = []
+        for start in range(0, len(runs), MERGE_FAN_IN):
+            group = runs[start:start + MERGE_FAN_IN]
+            merged.append(spill(heapq.merge(*(read_run(path) for path in group), key=run_key), temp_dir))
+            for path in group:
+                os.remove(path)
+        runs = merged
+    
+    return heapq.merge(*(read_run(path) for path in runs), key=run_key)
+
+def external_deduplicate(companies, temp_dir, run_size):
     """
-    Combine all quarterly JSON files and deduplicate
+    Bounded-memory version of the accession-number dedup.
+    
+    Pass 1 spills runs sorted by (accession_number, arrival order). Merging them brings
+    every copy of an accession number together, where the most recent
+    months_since_funding wins (the earliest copy on ties, as in memory). The winners
+    are spilled again sorted by (months_since_funding, first arrival) so the final
+    merge yields the master in the same order as the in-memory sort.
+    
+    Returns (sorted company iterator, total_before_dedup, total_companies, total_executives).
+    """
+    by_accession = []
+    records = []
+    total_before = 0
+    for sequence, company in enumerate(companies):
+        records.append((company['accession_number'], sequence, company))
+        total_before += 1
+        if len(records) >= run_size:
+            write_run(records, temp_dir, by_accession)
+    if records:
+        write_run(records, temp_dir, by_accession)
+    
+    by_recency = []
+    total_companies = 0
+    total_executives = 0
+    current = None  # [accession, first_sequence, winner]
+    
+    def keep(group):
+        nonlocal total_companies, total_executives
+        accession, first_sequence, winner = group
+        records.append((months_since_funding(winner), first_sequence, winner))
+        total_companies += 1
+        total_executives += len(winner['related_persons'])
+        if len(records) >= run_size:
+            write_run(records, temp_dir, by_recency)
+    
+    for accession, sequence, company in merge_runs(by_accession, temp_dir):
+        if current is None or current[0] != accession:
+            if current is not None:
+                keep(current)
+            current = [accession, sequence, company]
+        elif months_since_funding(company) < months_since_funding(current[2]):
+            current[2] = company
+    if current is not None:
+        keep(current)
+    if records:
+        write_run(records, temp_dir, by_recency)
+    
+    for path in by_accession:
+        if os.path.exists(path):
+            os.remove(path)
+    
+    sorted_companies = (company for _, _, company in merge_runs(by_recency, temp_dir))
+    return sorted_companies, total_before, total_companies, total_executives
+
+def dedupe_by_accession(companies):
+    """
+    Keep one company per accession_number - the most recent filing (lowest
+    months_since_funding, the first seen on ties) - sorted by funding recency.
+    """
+    unique_companies = {}
+    
+    for company in companies:
+        acc_num = company['accession_number']
+        if acc_num not in unique_companies:
+            unique_companies[acc_num] = company
+        else:
+            # Keep the one with more recent filing (lower months_since_funding)
+            if months_since_funding(company) < months_since_funding(unique_companies[acc_num]):
+                unique_companies[acc_num] = company
+    
+    final_companies = list(unique_companies.values())
+    
+    # Sort by funding recency (handle None values)
+    final_companies.sort(key=months_since_funding)
+    return final_companies
+
+def combine_and_deduplicate(input_dir='processed', output_file='startups_master.json', stats_file='startups_stats.csv',
+                            output_format='json', run_size=None, temp_dir=None, stats_options=None):
+    """
+    Combine all quarterly JSON (or JSONL) files and deduplicate
     Generate statistics CSV
+    
+    output_format 'jsonl' writes the master one company per line with a .meta.json sidecar
+    run_size switches to a bounded-memory external merge: at most run_size companies
+    are held at once, sorted runs are spilled under temp_dir and the master is streamed out
+    stats_options are passed to generate_statistics_csv (groupings, thresholds, percentiles, amount_metrics)
     """
+    stats_options = stats_options or {}
     
     print("=" * 70)
     print("SEC Form D Combiner & Deduplicator")
     print("=" * 70)
     
-    # Find all JSON files
-    json_files = sorted([f for f in os.listdir(input_dir) if f.startswith('companies_sec_') and f.endswith('.json')])
+    # Find all JSON and JSONL files (a quarter's .json wins if both exist)
+    candidates = set(os.listdir(input_dir))
+    json_files = sorted([
+        f for f in candidates
+        if f.startswith('companies_sec_') and not f.endswith('.meta.json') and (
+            f.endswith('.json') or (f.endswith('.jsonl') and f[:-1] not in candidates)
+        )
+    ])
     
     if not json_files:
         print(f"❌ No JSON files found in {input_dir}")
@@ -25,146 +188,100 @@ def combine_and_deduplicate(input_dir='processed', output_file='startups_master.
     print(f"   From: {json_files[0]}")
     print(f"   To:   {json_files[-1]}\n")
     
-    all_companies = []
     quarters_processed = []
+    companies = iter_quarter_companies(input_dir, json_files, quarters_processed)
     
-    # Load all files
-    for json_file in json_files:
-        filepath = os.path.join(input_dir, json_file)
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-            companies = data.get('companies', [])
-            quarter = data['metadata']['quarter']
+    if run_size:
+        with tempfile.TemporaryDirectory(prefix='sec_combine_', dir=temp_dir) as run_dir:
+            print(f"🔄 Deduplicating with an external merge ({run_size:,} companies per run)...")
+            final_companies, total_before, total_companies, total_executives = external_deduplicate(
+                companies, run_dir, run_size
+            )
+            print(f"\n   Total before dedup: {total_before:,} companies")
+            print(f"   After dedup: {total_companies:,} unique companies")
             
-            all_companies.extend(companies)
-            quarters_processed.append(quarter)
-            
-            print(f"✅ Loaded {json_file}: {len(companies):,} companies")
+            metadata = master_metadata(quarters_processed, total_companies, total_executives)
+            write_master(output_file, metadata, final_companies, output_format)
+        
+        print(f"\n✅ Created master JSON: {output_file}")
+        print(f"   File size: {os.path.getsize(output_file) / (1024*1024):.1f} MB")
+        
+        # Statistics are gathered by streaming the master back rather than holding it
+        print(f"\n📊 Generating statistics CSV...")
+        generate_statistics_csv(read_companies(output_file)[1], stats_file, **stats_options)
+        print(f"✅ Created statistics: {stats_file}")
+        
+        print_summary(total_companies, total_executives, quarters_processed)
+        return
+    
+    all_companies = list(companies)
     
     print(f"\n   Total before dedup: {len(all_companies):,} companies")
     
     # Deduplicate by accession_number (keep most recent)
     print(f"\n🔄 Deduplicating...")
-    unique_companies = {}
-    
-    for company in all_companies:
-        acc_num = company['accession_number']
-        if acc_num not in unique_companies:
-            unique_companies[acc_num] = company
-        else:
-            # Keep the one with more recent filing (lower months_since_funding)
-            existing = unique_companies[acc_num]
-            existing_months = existing['company_age'].get('months_since_funding')
-            company_months = company['company_age'].get('months_since_funding')
-            
-            # Handle None values - treat None as very old (999)
-            if existing_months is None:
-                existing_months = 999
-            if company_months is None:
-                company_months = 999
-            
-            if company_months < existing_months:
-                unique_companies[acc_num] = company
-    
-    final_companies = list(unique_companies.values())
-    
-    # Sort by funding recency (handle None values)
-    final_companies.sort(key=lambda x: x['company_age'].get('months_since_funding') if x['company_age'].get('months_since_funding') is not None else 999)
+    final_companies = dedupe_by_accession(all_companies)
     
     print(f"   After dedup: {len(final_companies):,} unique companies")
     
     # Create master JSON
-    output = {
-        'metadata': {
-            'generated_at': datetime.now().isoformat(),
-            'quarters_processed': quarters_processed,
-            'total_companies': len(final_companies),
-            'total_executives': sum(len(c['related_persons']) for c in final_companies),
-            'date_range': {
-                'earliest_quarter': quarters_processed[0] if quarters_processed else None,
-                'latest_quarter': quarters_processed[-1] if quarters_processed else None
-            }
-        },
-        'companies': final_companies
-    }
-    
-    # Write master JSON
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    total_executives = sum(len(c['related_persons']) for c in final_companies)
+    metadata = master_metadata(quarters_processed, len(final_companies), total_executives)
+    write_master(output_file, metadata, final_companies, output_format)
     
     print(f"\n✅ Created master JSON: {output_file}")
     print(f"   File size: {os.path.getsize(output_file) / (1024*1024):.1f} MB")
     
     # Generate statistics
     print(f"\n📊 Generating statistics CSV...")
-    generate_statistics_csv(final_companies, stats_file)
+    generate_statistics_csv(final_companies, stats_file, **stats_options)
     print(f"✅ Created statistics: {stats_file}")
     
-    # Summary
+    print_summary(len(final_companies), total_executives, quarters_processed)
+
+def master_metadata(quarters_processed, total_companies, total_executives):
+    """Metadata block for the master file"""
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'quarters_processed': quarters_processed,
+        'total_companies': total_companies,
+        'total_executives': total_executives,
+        'date_range': {
+            'earliest_quarter': quarters_processed[0] if quarters_processed else None,
+            'latest_quarter': quarters_processed[-1] if quarters_processed else None
+        }
+    }
+
+def write_master(output_file, metadata, companies, output_format):
+    """Write the master one company at a time (JSONL + sidecar, or the indented JSON document)"""
+    if output_format == 'jsonl':
+        write_jsonl(output_file, companies)
+        write_metadata(output_file, metadata)
+    else:
+        write_json_document(output_file, metadata, companies)
+
+def print_summary(total_companies, total_executives, quarters_processed):
+    """Final summary block"""
     print(f"\n{'=' * 70}")
     print("Summary")
     print("=" * 70)
-    print(f"📊 Total unique companies: {len(final_companies):,}")
-    print(f"👥 Total executives: {sum(len(c['related_persons']) for c in final_companies):,}")
+    print(f"📊 Total unique companies: {total_companies:,}")
+    print(f"👥 Total executives: {total_executives:,}")
     print(f"📅 Quarters: {len(quarters_processed)}")
 
-def generate_statistics_csv(companies, stats_file):
-    """Generate comprehensive statistics CSV"""
-    
-    stats_rows = []
-    
-    # Overall statistics
-    total = len(companies)
-    over_5m = sum(1 for c in companies if c['funding']['total_amount_sold'] and c['funding']['total_amount_sold'] >= 5_000_000)
-    
-    stats_rows.append({
-        'category': 'OVERALL',
-        'subcategory': 'All Companies',
-        'total_companies': total,
-        'companies_over_5m': over_5m,
-        'percent_over_5m': f"{(over_5m/total*100):.1f}%" if total > 0 else "0%"
-    })
-    
-    # By State
-    state_counts = defaultdict(lambda: {'total': 0, 'over_5m': 0})
-    for c in companies:
-        state = c['company']['address']['state']
-        if state:
-            state_counts[state]['total'] += 1
-            amount = c['funding']['total_amount_sold']
-            if amount and amount >= 5_000_000:
-                state_counts[state]['over_5m'] += 1
-    
-    for state, counts in sorted(state_counts.items(), key=lambda x: x[1]['total'], reverse=True):
-        stats_rows.append({
-            'category': 'BY STATE',
-            'subcategory': state,
-            'total_companies': counts['total'],
-            'companies_over_5m': counts['over_5m'],
-            'percent_over_5m': f"{(counts['over_5m']/counts['total']*100):.1f}%" if counts['total'] > 0 else "0%"
-        })
-    
-    # By Industry
-    industry_counts = defaultdict(lambda: {'total': 0, 'over_5m': 0})
-    for c in companies:
-        industry = c['company']['industry']
-        if industry:
-            industry_counts[industry]['total'] += 1
-            amount = c['funding']['total_amount_sold']
-            if amount and amount >= 5_000_000:
-                industry_counts[industry]['over_5m'] += 1
-    
-    for industry, counts in sorted(industry_counts.items(), key=lambda x: x[1]['total'], reverse=True):
-        stats_rows.append({
-            'category': 'BY INDUSTRY',
-            'subcategory': industry,
-            'total_companies': counts['total'],
-            'companies_over_5m': counts['over_5m'],
-            'percent_over_5m': f"{(counts['over_5m']/counts['total']*100):.1f}%" if counts['total'] > 0 else "0%"
-        })
+def generate_statistics_csv(companies, stats_file, groupings=DEFAULT_GROUPINGS, thresholds=DEFAULT_THRESHOLDS,
+                            percentiles=DEFAULT_PERCENTILES, amount_metrics=False):
+    """
+    Generate comprehensive statistics CSV
+    
+    Companies are read once (they may be a stream) and every grouping - e.g. state,
+    industry, or a state*industry*quarter cube - is aggregated from that one frame.
+    amount_metrics adds the sum, median and percentiles of total_amount_sold.
+    """
+    aggregated = aggregate(companies_frame(companies), groupings, thresholds, percentiles)
     
     # Write CSV
-    df = pd.DataFrame(stats_rows)
+    df = statistics_table(aggregated, thresholds, amount_metrics)
     df.to_csv(stats_file, index=False)
 
 if __name__ == '__main__':
@@ -174,7 +291,34 @@ if __name__ == '__main__':
     parser.add_argument('--input-dir', default='processed', help='Directory with quarterly JSON files')
     parser.add_argument('--output', default='startups_master.json', help='Output master JSON file')
     parser.add_argument('--stats', default='startups_stats.csv', help='Output statistics CSV file')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='json',
+                        help='json: one indented master file; jsonl: one company per line (default: json)')
+    parser.add_argument('--run-size', type=int, default=None,
+                        help='Bounded memory: dedup with an external merge of sorted runs of this many companies')
+    parser.add_argument('--temp-dir', default=None,
+                        help='Where to spill sorted runs for --run-size (default: system temp dir)')
+    parser.add_argument('--group-by', nargs='+', metavar='DIMS',
+                        help='Statistics groupings, e.g. state industry state*industry*quarter '
+                             '(dimensions: state, industry, quarter, stage_estimate, industry_category; default: state industry)')
+    parser.add_argument('--thresholds', nargs='+', type=float, metavar='AMOUNT',
+                        help='Funding thresholds for the companies_over_X columns (default: 5000000)')
+    parser.add_argument('--percentiles', nargs='+', type=float, metavar='P',
+                        help='Percentiles of total_amount_sold for --amount-metrics (default: 25 75 90)')
+    parser.add_argument('--amount-metrics', action='store_true',
+                        help='Add sum, median and percentiles of total_amount_sold to the statistics CSV')
     
     args = parser.parse_args()
     
-    combine_and_deduplicate(args.input_dir, args.output, args.stats)
\ No newline at end of file
+    stats_options = {'amount_metrics': args.amount_metrics}
+    if args.group_by:
+        try:
+            stats_options['groupings'] = [parse_grouping(spec) for spec in args.group_by]
+        except ValueError as e:
+            parser.error(str(e))
+    if args.thresholds:
+        stats_options['thresholds'] = [int(t) if t.is_integer() else t for t in args.thresholds]
+    if args.percentiles:
+        stats_options['percentiles'] = args.percentiles
+    
+    combine_and_deduplicate(args.input_dir, output_path_for(args.output, args.format), args.stats, args.format,
+                            args.run_size, args.temp_dir, stats_options)
\ No newline at end of file
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+sec_company_db.py - Indexed SQLite store for company documents
+Usage: python sec_company_db.py startups_master.json [more.json ...] [--db sec_companies.db]
+Used by sec_filter.py --db and sec_flatten.py --db
+
+Loads master or quarterly output (JSON or JSONL) into three normalized tables:
+  companies       - one row per accession number: name, address, industry, funding
+  filings         - filing date (as given and as an ISO date), submission type, quarter
+  related_persons - one row per person, in document order
+
+with indexes on state, industry, total_amount_sold, filing date and accession number.
+Each company row also keeps its full document, so reading from the store gives back
+exactly what was loaded. Filters that hit an index then touch only the matching rows
+instead of re-parsing the whole JSON file.
+
+Loading the same accession number twice keeps the most recent filing (lowest
+months_since_funding), like sec_combine_quarters.py, and companies come back in
+master order (funding recency, then load order).
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sec_combine_quarters import months_since_funding
+from sec_documents import parse_filing_date
+from sec_filter import NON_US_STATE_CODES, iter_chunks
+from sec_filter import extract_funding_amount as filter_funding_amount
+from sec_flatten import extract_funding_amount as export_funding_amount
+from sec_stream import read_companies
+
+DEFAULT_DB = 'sec_companies.db'
+
+# Companies per insert batch, and accession numbers per lookup
+# (SQLite's default limit on host parameters per statement is 999)
+LOAD_BATCH = 5000
+QUERY_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    position INTEGER PRIMARY KEY,
+    accession_number TEXT NOT NULL UNIQUE,
+    name TEXT,
+    street1 TEXT,
+    street2 TEXT,
+    city TEXT,
+    state TEXT,
+    zip TEXT,
+    phone TEXT,
+    entity_type TEXT,
+    year_incorporated INTEGER,
+    industry TEXT,
+    total_offering_amount REAL,
+    total_amount_sold REAL,
+    number_of_investors INTEGER,
+    stage_estimate TEXT,
+    filter_funding REAL NOT NULL,
+    export_funding REAL NOT NULL,
+    months_since_funding INTEGER NOT NULL,
+    document TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS filings (
+    accession_number TEXT PRIMARY KEY REFERENCES companies (accession_number),
+    date_filed TEXT,
+    filed_on TEXT,
+    submission_type TEXT,
+    quarter TEXT
+);
+CREATE TABLE IF NOT EXISTS related_persons (
+    accession_number TEXT NOT NULL REFERENCES companies (accession_number),
+    position INTEGER NOT NULL,
+    name TEXT,
+    first_name TEXT,
+    middle_name TEXT,
+    last_name TEXT,
+    relationships TEXT,
+    city TEXT,
+    state TEXT,
+    PRIMARY KEY (accession_number, position)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT NOT NULL,
+    loaded_at TEXT NOT NULL,
+    companies INTEGER NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_companies_state ON companies (state);
+CREATE INDEX IF NOT EXISTS idx_companies_industry ON companies (industry);
+CREATE INDEX IF NOT EXISTS idx_companies_amount_sold ON companies (total_amount_sold);
+CREATE INDEX IF NOT EXISTS idx_companies_filter_funding ON companies (filter_funding);
+CREATE INDEX IF NOT EXISTS idx_companies_export ON companies (export_funding DESC, months_since_funding, position);
+CREATE INDEX IF NOT EXISTS idx_companies_order ON companies (months_since_funding, position);
+CREATE INDEX IF NOT EXISTS idx_filings_filed_on ON filings (filed_on);
+"""
+
+# Master order, as written by sec_combine_quarters.py
+MASTER_ORDER = "c.months_since_funding, c.position"
+
+COMPANY_COLUMNS = (
+    'accession_number', 'name', 'street1', 'street2', 'city', 'state', 'zip', 'phone', 'entity_type',
+    'year_incorporated', 'industry', 'total_offering_amount', 'total_amount_sold', 'number_of_investors',
+    'stage_estimate', 'filter_funding', 'export_funding', 'months_since_funding', 'document'
+)
+
+
+def _number(value):
+    """Numeric JSON values as-is; anything else (strings, bools, None) becomes NULL"""
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _integer(value):
+    """year_incorporated and friends: ints, or numeric strings like '2019'"""
+    try:
+        return int(value) if value is not None and not isinstance(value, bool) else None
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=1 << 14)
+def iso_filing_date(date_filed) -> Optional[str]:
+    """SEC filing date ('07-DEC-2023', or another FILING_DATE_FORMATS form) as YYYY-MM-DD, or None"""
+    filed = parse_filing_date(str(date_filed).strip())
+    return filed.strftime('%Y-%m-%d') if filed else None
+
+
+def company_row(company_data: Dict[str, Any]) -> Tuple:
+    """Column values for the companies table (see COMPANY_COLUMNS)"""
+    company = company_data.get('company') or {}
+    address = company.get('address') or {}
+    funding = company_data.get('funding') or {}
+    return (
+        company_data['accession_number'],
+        company.get('name'),
+        address.get('street1'),
+        address.get('street2'),
+        address.get('city'),
+        # Stored the way sec_filter compares it
+        (address.get('state') or '').strip().upper(),
+        address.get('zip'),
+        address.get('phone'),
+        company.get('entity_type'),
+        _integer(company.get('year_incorporated')),
+        company.get('industry'),
+        _number(funding.get('total_offering_amount')),
+        _number(funding.get('total_amount_sold')),
+        _integer(funding.get('number_of_investors')),
+        funding.get('stage_estimate'),
+        # sec_filter and sec_flatten read "funding" slightly differently, so keep both
+        filter_funding_amount(company_data),
+        export_funding_amount(company_data),
+        months_since_funding(company_data),
+        json.dumps(company_data, ensure_ascii=False)
+    )
+
+
+def filing_row(company_data: Dict[str, Any]) -> Tuple:
+    filing = company_data.get('filing') or {}
+    date_filed = filing.get('date_filed')
+    return (
+        company_data['accession_number'],
+        date_filed,
+        iso_filing_date(date_filed) if date_filed else None,
+        filing.get('submission_type'),
+        filing.get('quarter')
+    )
+
+
+@lru_cache(maxsize=1 << 12)
+def relationships_json(relationships: Tuple[str, ...]) -> str:
+    return json.dumps(list(relationships), ensure_ascii=False)
+
+
+def person_rows(company_data: Dict[str, Any]) -> Iterator[Tuple]:
+    for position, person in enumerate(company_data.get('related_persons') or []):
+        yield (
+            company_data['accession_number'],
+            position,
+            person.get('name'),
+            person.get('first_name'),
+            person.get('middle_name'),
+            person.get('last_name'),
+            relationships_json(tuple(person.get('relationships') or ())),
+            person.get('city'),
+            person.get('state')
+        )
+
+
+class CompanyStore:
+    """
+    SQLite-backed company store. load() adds documents; companies(), candidates()
+    and top_by_funding() read them back as the original company dicts.
+    """
+
+    def __init__(self, path=DEFAULT_DB, create: bool = True):
+        self.path = str(path)
+        if not create and not os.path.exists(self.path):
+            raise FileNotFoundError(self.path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+
+    def load(self, companies: Iterable[Dict[str, Any]], source: str = '', metadata: Optional[Dict] = None) -> Dict[str, int]:
+        """
+        Add company documents in one transaction. An accession number that is already
+        stored (or repeated in the input) is only replaced by a more recent filing,
+        and keeps its position. Returns counts of inserted, replaced and skipped companies.
+        """
+        counts = {'inserted': 0, 'replaced': 0, 'skipped': 0}
+        with self.conn:
+            for chunk in iter_chunks(companies, LOAD_BATCH):
+                self._load_batch(chunk, counts)
+            self.conn.execute(
+                "INSERT INTO sources (path, loaded_at, companies, metadata) VALUES (?, ?, ?, ?)",
+                (source, datetime.now().isoformat(), counts['inserted'] + counts['replaced'],
+                 json.dumps(metadata or {}, ensure_ascii=False))
+            )
+        return counts
+
+    def _load_batch(self, chunk: List[Dict[str, Any]], counts: Dict[str, int]):
+        # Best filing per accession number within the batch, in first-seen order
+        best = {}
+        for company_data in chunk:
+            accession_number = company_data['accession_number']
+            current = best.get(accession_number)
+            if current is not None and months_since_funding(company_data) >= months_since_funding(current):
+                counts['skipped'] += 1
+                continue
+            if current is not None:
+                counts['skipped'] += 1
+            best[accession_number] = company_data
+
+        stored = {}
+        keys = list(best)
+        for start in range(0, len(keys), QUERY_CHUNK):
+            part = keys[start:start + QUERY_CHUNK]
+            stored.update(self.conn.execute(
+                f"SELECT accession_number, months_since_funding FROM companies "
+                f"WHERE accession_number IN ({', '.join('?' * len(part))})",
+                part
+            ))
+
+        inserts, updates = [], []
+        for accession_number, company_data in best.items():
+            if accession_number not in stored:
+                inserts.append(company_data)
+            elif months_since_funding(company_data) < stored[accession_number]:
+                updates.append(company_data)
+            else:
+                counts['skipped'] += 1
+
+        if updates:
+            assignments = ', '.join(f"{column} = ?" for column in COMPANY_COLUMNS[1:])
+            replaced = [(c['accession_number'],) for c in updates]
+            self.conn.executemany(f"UPDATE companies SET {assignments} WHERE accession_number = ?",
+                                  (row[1:] + row[:1] for row in map(company_row, updates)))
+            self.conn.executemany("DELETE FROM filings WHERE accession_number = ?", replaced)
+            self.conn.executemany("DELETE FROM related_persons WHERE accession_number = ?", replaced)
+        self.conn.executemany(
+            f"INSERT INTO companies ({', '.join(COMPANY_COLUMNS)}) VALUES ({', '.join('?' * len(COMPANY_COLUMNS))})",
+            map(company_row, inserts)
+        )
+
+        written = inserts + updates
+        self.conn.executemany("INSERT INTO filings VALUES (?, ?, ?, ?, ?)", map(filing_row, written))
+        self.conn.executemany("INSERT INTO related_persons VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                              (row for company_data in written for row in person_rows(company_data)))
+        counts['inserted'] += len(inserts)
+        counts['replaced'] += len(updates)
+
+    def metadata(self) -> Dict[str, Any]:
+        """Metadata of the most recently loaded file ({} for an empty store)"""
+        row = self.conn.execute("SELECT metadata FROM sources ORDER BY rowid DESC LIMIT 1").fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0]
+
+    def _documents(self, sql: str, params: Iterable = ()) -> Iterator[Dict[str, Any]]:
+        for (document,) in self.conn.execute(sql, tuple(params)):
+            yield json.loads(document)
+
+    def companies(self) -> Iterator[Dict[str, Any]]:
+        """Every company, in master order"""
+        return self._documents(f"SELECT c.document FROM companies c ORDER BY {MASTER_ORDER}")
+
+    def candidates(self, spec: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Companies that can pass a (built) sec_filter spec, in master order, selected
+        through the indexes. The conditions only ever over-select, so running the
+        compiled spec over the result gives exactly the file-based answer; the
+        industry keywords are left to that step entirely.
+        """
+        conditions, params = spec_conditions(spec)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return self._documents(
+            f"SELECT c.document FROM companies c JOIN filings f ON f.accession_number = c.accession_number "
+            f"{where} ORDER BY {MASTER_ORDER}",
+            params
+        )
+
+    def top_by_funding(self, top_n: int) -> Iterator[Dict[str, Any]]:
+        """The top_n companies by sec_flatten's funding amount, ties in master order"""
+        return self._documents(
+            "SELECT c.document FROM companies c "
+            "ORDER BY c.export_funding DESC, c.months_since_funding, c.position LIMIT ?",
+            (top_n,)
+        )
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def spec_conditions(spec: Dict[str, Any]) -> Tuple[List[str], List[Any]]:
+    """SQL conditions (and their parameters) for the indexed parts of a filter spec"""
+    conditions, params = [], []
+
+    if spec['states']:
+        conditions.append(f"c.state IN ({', '.join('?' * len(spec['states']))})")
+        params.extend(spec['states'])
+    else:
+        conditions.append(f"length(c.state) = 2 AND c.state NOT IN ({', '.join('?' * len(NON_US_STATE_CODES))})")
+        params.extend(NON_US_STATE_CODES)
+
+    if spec['min_funding'] is not None:
+        conditions.append("c.filter_funding >= ?")
+        params.append(spec['min_funding'])
+    if spec['max_funding'] is not None:
+        conditions.append("c.filter_funding <= ?")
+        params.append(spec['max_funding'])
+
+    if spec['entity_types']:
+        conditions.append(f"lower(c.entity_type) IN ({', '.join('?' * len(spec['entity_types']))})")
+        params.extend(t.lower() for t in spec['entity_types'])
+
+    # Years are re-checked in pandas (the store drops values that aren't integers)
+    if spec['min_year_incorporated'] is not None or spec['max_year_incorporated'] is not None:
+        conditions.append("c.year_incorporated IS NOT NULL")
+
+    # Day granularity: a bound with a time of day over-selects by at most that day
+    for key, operator in (('filed_after', '>='), ('filed_before', '<=')):
+        if spec[key]:
+            day = datetime.fromisoformat(str(spec[key])).strftime('%Y-%m-%d')
+            conditions.append(f"f.filed_on {operator} ?")
+            params.append(day)
+
+    return conditions, params
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load master or quarterly company files into an indexed SQLite store')
+    parser.add_argument('inputs', nargs='+', help='Company files (JSON or JSONL), loaded in order')
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'SQLite store to create or extend (default: {DEFAULT_DB})')
+    args = parser.parse_args()
+
+    store = CompanyStore(args.db)
+    print(f"🗄️  Company store: {args.db} ({len(store):,} companies)")
+
+    for input_file in args.inputs:
+        if not os.path.exists(input_file):
+            print(f"❌ Error: File '{input_file}' not found")
+            sys.exit(1)
+        started = time.time()
+        document, companies = read_companies(input_file)
+        try:
+            counts = store.load(companies, input_file, document.get('metadata', {}))
+        except json.JSONDecodeError as e:
+            print(f"❌ Error: Invalid JSON in {input_file}: {e}")
+            sys.exit(1)
+        print(f"✅ {input_file}: {counts['inserted']:,} added, {counts['replaced']:,} replaced by a newer filing, "
+              f"{counts['skipped']:,} already stored ({time.time() - started:.1f}s)")
+
+    total = len(store)
+    store.close()
+    print(f"\n✓ Complete! {total:,} companies in {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+sec_dedup_index.py - Persistent dedup index for sec_unique.py
+Used by sec_unique.py --index
+
+Every dedup key (normalized name, phone, address) is reduced to a 64-bit BLAKE2b
+digest, and the index maps each digest to the canonical company id (the accession
+number of the first filing seen with that key). The SQLite table keeps the digest as
+its integer primary key (the rowid), so each key costs one 8-byte B-tree entry plus the id,
+instead of a Python tuple of three strings held in memory.
+
+Adding a quarter then only checks its new records against the index and appends the
+unseen ones - the history never has to be deduplicated again.
+"""
+
+import hashlib
+import sqlite3
+from typing import Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dedup_keys (
+    digest INTEGER PRIMARY KEY,
+    company_id TEXT NOT NULL
+)
+"""
+
+
+def key_digest(key: Tuple[str, ...]) -> int:
+    """Signed 64-bit digest of a dedup key tuple (signed so SQLite can store it as an INTEGER)"""
+    data = '\x1f'.join(key).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big', signed=True)
+
+
+class DedupIndex:
+    """
+    On-disk digest -> company id map.
+
+    Changes made through add() stay in an open transaction and are visible to get()
+    right away; commit() makes them permanent and rollback() forgets them.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM dedup_keys").fetchone()[0]
+
+    def get(self, digest: int) -> Optional[str]:
+        """Company id stored for a digest, or None"""
+        row = self.conn.execute("SELECT company_id FROM dedup_keys WHERE digest = ?", (digest,)).fetchone()
+        return row[0] if row else None
+
+    def add(self, digest: int, company_id: str):
+        """Record a digest unless it is already indexed"""
+        self.conn.execute(
+            "INSERT OR IGNORE INTO dedup_keys (digest, company_id) VALUES (?, ?)",
+            (digest, company_id)
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,202 @@
+"""
+sec_documents.py - Shared helpers for building company documents from SEC Form D tables
+Used by sec_form_d.py and sec_all_quarters.py (and, for filing dates, sec_filter.py)
+
+Documents are built column-by-column: each TSV column is cleaned once for the whole
+table (NaN -> None, strip, numeric coercion) and the nested records are then zipped
+together from those cleaned columns, instead of calling iterrows() per company.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# FILING_DATE is normally 07-DEC-2023, but older and hand-made files use the others
+FILING_DATE_FORMATS = ('%d-%b-%Y', '%Y-%m-%d', '%m/%d/%Y')
+
+
+def parse_filing_date(value):
+    """A filing date string as a datetime (first of FILING_DATE_FORMATS that fits), or None"""
+    for fmt in FILING_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def parse_filing_dates(values):
+    """parse_filing_date for a whole column: a datetime Series, NaT where nothing fits"""
+    values = pd.Series(values, dtype=object)
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    for fmt in FILING_DATE_FORMATS:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(values[missing], format=fmt, errors='coerce')
+    return parsed
+
+
+def _column(frame, name):
+    """Return frame[name], or an all-missing column if the TSV doesn't have it (like row.get)"""
+    if name in frame.columns:
+        return frame[name]
+    return pd.Series(np.nan, index=frame.index, dtype=object)
+
+
+def clean_values(frame, name):
+    """Vectorized clean_value: NaN and empty values -> None, everything else a stripped str"""
+    series = _column(frame, name)
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Clean each distinct category once, then expand through the codes
+        categories = pd.DataFrame({name: series.cat.categories})
+        cleaned = np.array(clean_values(categories, name) + [None], dtype=object)
+        return cleaned[series.cat.codes.to_numpy()].tolist()
+
+    keep = series.notna()
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        keep &= series != 0
+    else:
+        keep &= series.astype(bool)
+    keep = keep.to_numpy(dtype=bool, na_value=False)
+
+    values = np.full(len(series), None, dtype=object)
+    values[keep] = series[keep].astype(str).str.strip().to_numpy(dtype=object)
+    return values.tolist()
+
+
+def clean_floats(frame, name):
+    """Vectorized clean_float: numeric coercion, anything unparseable -> None"""
+    numbers = pd.to_numeric(_column(frame, name), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    values = numbers.astype(object)
+    values[np.isnan(numbers)] = None
+    return values.tolist()
+
+
+def clean_ints(frame, name):
+    """Vectorized clean_int: numeric coercion truncated to int, anything unparseable -> None"""
+    numbers = pd.to_numeric(_column(frame, name), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    finite = np.isfinite(numbers)
+    return [int(v) if ok else None for v, ok in zip(np.trunc(numbers).tolist(), finite.tolist())]
+
+
+def index_related_persons(people):
+    """
+    Group the RELATEDPERSONS table by accession number once.
+    Returns a dict mapping accession number -> positional row offsets into `people`,
+    so looking up a company's persons is a dict hit instead of a full table scan.
+    """
+    if people.empty:
+        return {}
+    return people.groupby('ACCESSIONNUMBER', sort=False).indices
+
+
+def build_person_documents(people):
+    """Build one related-person record per RELATEDPERSONS row, in file order"""
+    first_names = clean_values(people, 'FIRSTNAME')
+    middle_names = clean_values(people, 'MIDDLENAME')
+    last_names = clean_values(people, 'LASTNAME')
+    relationships = zip(
+        clean_values(people, 'RELATIONSHIP_1'),
+        clean_values(people, 'RELATIONSHIP_2'),
+        clean_values(people, 'RELATIONSHIP_3')
+    )
+    cities = clean_values(people, 'CITY')
+    states = clean_values(people, 'STATEORCOUNTRY')
+
+    persons = []
+    for first, middle, last, rels, city, state in zip(
+        first_names, middle_names, last_names, relationships, cities, states
+    ):
+        # Combine first, middle, last name
+        full_name = ' '.join([p for p in (first, middle, last) if p])
+
+        persons.append({
+            'name': full_name if full_name else None,
+            'first_name': first,
+            'middle_name': middle,
+            'last_name': last,
+            'relationships': [rel for rel in rels if rel],
+            'city': city,
+            'state': state
+        })
+
+    return persons
+
+
+def iter_company_documents(companies, people):
+    """
+    Build the shared part of each company document from the joined
+    offerings + issuers + submissions frame.
+
+    Yields one dict per row of `companies`, in row order, with accession_number,
+    company, funding, filing and related_persons; callers add their own fields.
+    The columns are cleaned up front, but each document is only built when it's asked for.
+    """
+    persons_index = index_related_persons(people)
+    person_documents = build_person_documents(people)
+
+    accessions = _column(companies, 'ACCESSIONNUMBER').tolist()
+    columns = zip(
+        accessions,
+        clean_values(companies, 'ENTITYNAME'),
+        clean_values(companies, 'STREET1'),
+        clean_values(companies, 'STREET2'),
+        clean_values(companies, 'CITY'),
+        clean_values(companies, 'STATEORCOUNTRY'),
+        clean_values(companies, 'ZIPCODE'),
+        clean_values(companies, 'ISSUERPHONENUMBER'),
+        clean_values(companies, 'ENTITYTYPE'),
+        clean_ints(companies, 'YEAROFINC_VALUE_ENTERED'),
+        clean_values(companies, 'INDUSTRYGROUPTYPE'),
+        clean_floats(companies, 'TOTALOFFERINGAMOUNT'),
+        clean_floats(companies, 'TOTALAMOUNTSOLD'),
+        clean_floats(companies, 'TOTALREMAINING'),
+        clean_ints(companies, 'TOTALNUMBERALREADYINVESTED'),
+        clean_values(companies, 'SALE_DATE'),
+        clean_values(companies, 'FILING_DATE'),
+        clean_values(companies, 'SUBMISSIONTYPE')
+    )
+
+    for (accession, name, street1, street2, city, state, zipcode, phone, entity_type,
+         year_inc, industry, offering_amount, amount_sold, remaining, investors,
+         sale_date, filing_date, submission_type) in columns:
+        positions = persons_index.get(accession)
+        related_persons = [person_documents[i] for i in positions] if positions is not None else []
+
+        yield {
+            'accession_number': accession,
+            'company': {
+                'name': name,
+                'address': {
+                    'street1': street1,
+                    'street2': street2,
+                    'city': city,
+                    'state': state,
+                    'zip': zipcode,
+                    'phone': phone
+                },
+                'entity_type': entity_type,
+                'year_incorporated': year_inc,
+                'industry': industry
+            },
+            'funding': {
+                'total_offering_amount': offering_amount,
+                'total_amount_sold': amount_sold,
+                'total_remaining': remaining,
+                'number_of_investors': investors,
+                'date_of_first_sale': sale_date
+            },
+            'filing': {
+                'date_filed': filing_date,
+                'submission_type': submission_type
+            },
+            'related_persons': related_persons
+        }
+
+
+def build_company_documents(companies, people):
+    """iter_company_documents as a list"""
+    return list(iter_company_documents(companies, people))
@@ -0,0 +1,143 @@
+"""
+sec_domain_cache.py - Persistent cache for domain inference and verification
+Used by sec_domain_inference.py --cache and sec_domain_verify.py --cache
+
+One SQLite file holds two tables:
+  candidates    - normalized company name -> candidate domain list
+  verifications - (domain, resolver) -> whether the domain resolved
+
+Every entry is timestamped. Entries older than their table's TTL count as misses
+and are evicted when the cache is opened, so stale verifications get looked up
+again. Outcomes are kept per resolver, so a hosts-file or stub run never answers
+for a later DNS run. When the master grows by a quarter, only the names and domains that aren't
+cached yet need any work.
+"""
+
+import json
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    name TEXT NOT NULL,
+    max_patterns INTEGER NOT NULL,
+    domains TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (name, max_patterns)
+);
+CREATE TABLE IF NOT EXISTS verifications (
+    domain TEXT NOT NULL,
+    resolver TEXT NOT NULL,
+    resolves INTEGER NOT NULL,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (domain, resolver)
+);
+"""
+
+DAY = 24 * 60 * 60
+DEFAULT_CANDIDATE_TTL = 30 * DAY
+DEFAULT_VERIFICATION_TTL = 7 * DAY
+
+# SQLite's default limit on host parameters per statement is 999
+QUERY_CHUNK = 500
+
+
+def normalize_name(name) -> str:
+    """Cache key for a company name: lowercase with whitespace runs collapsed"""
+    return ' '.join(str(name).lower().split()) if name else ''
+
+
+class DomainCache:
+    """
+    SQLite-backed TTL cache. stats counts hits and misses per table plus the
+    number of expired entries evicted on open.
+    """
+
+    def __init__(self, path, candidate_ttl: float = DEFAULT_CANDIDATE_TTL,
+                 verification_ttl: float = DEFAULT_VERIFICATION_TTL):
+        self.path = str(path)
+        self.candidate_ttl = candidate_ttl
+        self.verification_ttl = verification_ttl
+        self.stats = {
+            'candidate_hits': 0, 'candidate_misses': 0,
+            'verification_hits': 0, 'verification_misses': 0,
+            'evicted': 0
+        }
+        self.conn = sqlite3.connect(self.path)
+        # Caches written before outcomes were keyed by resolver can't tell them apart
+        key_columns = [row[1] for row in self.conn.execute("PRAGMA table_info(verifications)") if row[5]]
+        if key_columns == ['domain']:
+            self.conn.execute("DROP TABLE verifications")
+        self.conn.executescript(SCHEMA)
+        self.evict_expired()
+
+    def evict_expired(self) -> int:
+        """Delete entries past their TTL; returns how many were removed"""
+        now = time.time()
+        evicted = self.conn.execute(
+            "DELETE FROM candidates WHERE created_at < ?", (now - self.candidate_ttl,)
+        ).rowcount
+        evicted += self.conn.execute(
+            "DELETE FROM verifications WHERE checked_at < ?", (now - self.verification_ttl,)
+        ).rowcount
+        self.conn.commit()
+        self.stats['evicted'] += evicted
+        return evicted
+
+    def get_candidates(self, names: Iterable[str], max_patterns: int) -> Dict[str, List[str]]:
+        """Cached candidate lists for the given normalized names (misses are left out)"""
+        names = list(dict.fromkeys(names))
+        oldest = time.time() - self.candidate_ttl
+        found = {}
+        for start in range(0, len(names), QUERY_CHUNK):
+            chunk = names[start:start + QUERY_CHUNK]
+            rows = self.conn.execute(
+                f"SELECT name, domains FROM candidates WHERE max_patterns = ? AND created_at >= ? "
+                f"AND name IN ({','.join('?' * len(chunk))})",
+                (max_patterns, oldest, *chunk)
+            )
+            found.update((name, json.loads(domains)) for name, domains in rows)
+        self.stats['candidate_hits'] += len(found)
+        self.stats['candidate_misses'] += len(names) - len(found)
+        return found
+
+    def put_candidates(self, candidates: Dict[str, List[str]], max_patterns: int):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO candidates (name, max_patterns, domains, created_at) VALUES (?, ?, ?, ?)",
+            ((name, max_patterns, json.dumps(domains), now) for name, domains in candidates.items())
+        )
+        self.conn.commit()
+
+    def get_verification(self, domain: str, resolver: str) -> Optional[bool]:
+        """Cached outcome for a domain from resolver, or None when it isn't cached (or has expired)"""
+        row = self.conn.execute(
+            "SELECT resolves FROM verifications WHERE domain = ? AND resolver = ? AND checked_at >= ?",
+            (domain, resolver, time.time() - self.verification_ttl)
+        ).fetchone()
+        if row is None:
+            self.stats['verification_misses'] += 1
+            return None
+        self.stats['verification_hits'] += 1
+        return bool(row[0])
+
+    def put_verification(self, domain: str, resolves: bool, resolver: str):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO verifications (domain, resolver, resolves, checked_at) VALUES (?, ?, ?, ?)",
+            (domain, resolver, int(resolves), time.time())
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def summary(self) -> str:
+        """One line of hit/miss counts for run summaries"""
+        s = self.stats
+        return (f"candidates {s['candidate_hits']:,} hits / {s['candidate_misses']:,} misses, "
+                f"verifications {s['verification_hits']:,} hits / {s['verification_misses']:,} misses, "
+                f"{s['evicted']:,} expired entries evicted")
@@ -1,19 +1,37 @@
 #!/usr/bin/env python3
 """
 sec_domain_inference.py - Infer domain names from company names in SEC data
-Usage: python sec_domain_inference.py [input_json_file]
+Usage: python sec_domain_inference.py [input_json_file] [--format json|jsonl] [--cache domain_cache.sqlite]
 Default: python sec_domain_inference.py (uses sec_companies_targets_unique.json)
 
 This script runs fully automated and can be safely interrupted and resumed.
+JSON output is assembled once at the end; until then, every processed company is
+appended to a checkpoint journal (<output>.journal.jsonl) that a resumed run replays.
+
+--cache keeps each name's candidates in a SQLite cache shared with sec_domain_verify.py
+(see sec_domain_cache.py), so rerunning on a grown master only infers the new names.
+
+Names are cleaned in batches (clean_company_names / infer_domains): lowercasing and
+character cleanup are vectorized pandas string operations, and suffix stripping runs
+once per distinct trailing suffix run through the memoized clean_company_name rules.
 """
 
 import json
 import sys
 import re
 import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
+from itertools import islice
+
+import pandas as pd
+
+from sec_domain_cache import DomainCache, normalize_name
+from sec_stream import (
+    jsonl_line, output_path_for, pop_format_option, read_companies, read_jsonl, write_metadata
+)
 
 
 # Domain patterns to try, in order of likelihood
@@ -64,11 +82,40 @@ COMPANY_SUFFIXES = [
     r',?\s+inc\.?$',  # Handle ", Inc"
 ]
 
+# The rules above, compiled once, applied in order
+_SUFFIX_RULES = [re.compile(pattern, re.IGNORECASE) for pattern in COMPANY_SUFFIXES]
+
+# Every suffix word in one alternation; a name's trailing run of suffix words
+# (", Holdings Group, Inc.") is the only part the ordered rules can remove
+_SUFFIX_WORDS = '|'.join(pattern.split(r'\s+')[1].rstrip('$') for pattern in COMPANY_SUFFIXES)
+_TRAILING_SUFFIXES = re.compile(rf'(?:,?\s+(?:{_SUFFIX_WORDS}))+$', re.IGNORECASE)
+
+_SPECIAL_CHARACTERS = re.compile(r'[^\w\s-]')
+_SEPARATORS = re.compile(r'[\s_]+')
+_HYPHEN_RUNS = re.compile(r'-+')
+
+NAME_CACHE_SIZE = 1 << 16
+INFERENCE_BATCH = 1000
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def strip_suffixes(suffix_run: str) -> str:
+    """
+    Apply the COMPANY_SUFFIXES rules, in order, to a trailing run of suffix words.
+    Order matters: "Acme Group Capital" only loses "Capital" because the group
+    rule has already been tried by the time "Group" is last.
+    """
+    for rule in _SUFFIX_RULES:
+        suffix_run = rule.sub('', suffix_run)
+    return suffix_run
+
 
+@lru_cache(maxsize=NAME_CACHE_SIZE)
 def clean_company_name(name: str) -> str:
     """
     Clean company name for domain inference.
     Remove suffixes, special characters, and normalize.
+    Memoized, since the same name turns up in many filings.
     """
     if not name:
         return ""
@@ -77,17 +124,18 @@ def clean_company_name(name: str) -> str:
     cleaned = name.lower().strip()
     
     # Remove common suffixes (case insensitive)
-    for suffix_pattern in COMPANY_SUFFIXES:
-        cleaned = re.sub(suffix_pattern, '', cleaned, flags=re.IGNORECASE)
+    match = _TRAILING_SUFFIXES.search(cleaned)
+    if match:
+        cleaned = cleaned[:match.start()] + strip_suffixes(match.group())
     
     # Remove special characters but keep hyphens and spaces temporarily
-    cleaned = re.sub(r'[^\w\s-]', '', cleaned)
+    cleaned = _SPECIAL_CHARACTERS.sub('', cleaned)
     
     # Replace spaces and underscores with hyphens
-    cleaned = re.sub(r'[\s_]+', '-', cleaned)
+    cleaned = _SEPARATORS.sub('-', cleaned)
     
     # Remove multiple consecutive hyphens
-    cleaned = re.sub(r'-+', '-', cleaned)
+    cleaned = _HYPHEN_RUNS.sub('-', cleaned)
     
     # Remove leading/trailing hyphens
     cleaned = cleaned.strip('-')
@@ -95,6 +143,31 @@ def clean_company_name(name: str) -> str:
     return cleaned
 
 
+def clean_company_names(names: Iterable) -> pd.Series:
+    """
+    clean_company_name for a whole Series (or list) of names at once.
+    Missing and empty names clean to "".
+    """
+    names = pd.Series(names, dtype=object)
+    cleaned = names.where(names.astype(bool) & names.notna(), '').astype(str).str.lower().str.strip()
+    
+    # Only the trailing suffix runs need the ordered rules, and there are few distinct ones
+    runs = cleaned.str.extract(f'({_TRAILING_SUFFIXES.pattern})', flags=re.IGNORECASE)[0]
+    has_run = runs.notna()
+    if has_run.any():
+        runs = runs[has_run]
+        tails = runs.map({run: strip_suffixes(run) for run in runs.unique()})
+        cleaned.loc[has_run] = pd.Series([
+            name[:len(name) - len(run)] + tail
+            for name, run, tail in zip(cleaned[has_run], runs, tails)
+        ], index=runs.index)
+    
+    cleaned = cleaned.str.replace(_SPECIAL_CHARACTERS, '', regex=True)
+    cleaned = cleaned.str.replace(_SEPARATORS, '-', regex=True)
+    cleaned = cleaned.str.replace(_HYPHEN_RUNS, '-', regex=True)
+    return cleaned.str.strip('-')
+
+
 def infer_domain(company_name: str, max_patterns: int = 5) -> List[str]:
     """
     Infer possible domain names from company name.
@@ -102,9 +175,22 @@ def infer_domain(company_name: str, max_patterns: int = 5) -> List[str]:
     """
     if not company_name:
         return []
-    
-    cleaned = clean_company_name(company_name)
-    
+    return domain_candidates(clean_company_name(company_name), max_patterns)
+
+
+def infer_domains(company_names: Iterable, max_patterns: int = 5) -> List[List[str]]:
+    """
+    Domain candidates for every name in one call. The same name turns up in many
+    filings, so the distinct names are cleaned as one batch and each gets its
+    candidates generated once.
+    """
+    codes, distinct_names = pd.factorize(pd.Series(company_names, dtype=object))
+    candidates = [domain_candidates(cleaned, max_patterns) for cleaned in clean_company_names(distinct_names)]
+    return [list(candidates[code]) if code >= 0 else [] for code in codes]
+
+
+def domain_candidates(cleaned: str, max_patterns: int = 5) -> List[str]:
+    """Domain names to try for an already cleaned company name."""
     if not cleaned:
         return []
     
@@ -141,53 +227,144 @@ def infer_domain(company_name: str, max_patterns: int = 5) -> List[str]:
     return unique_domains
 
 
-def save_checkpoint(output_file: Path, data: Dict, stats: Dict):
-    """Save progress checkpoint."""
-    # Update metadata
-    if 'metadata' in data:
-        data['metadata']['domain_inference'] = {
-            'processed': stats['processed'],
-            'total': stats['total'],
-            'with_domains': stats['with_domains'],
-            'last_checkpoint': datetime.now().isoformat()
-        }
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    
-    elapsed = time.time() - stats['start_time']
-    rate = stats['processed'] / elapsed if elapsed > 0 else 0
-    print(f"💾 Checkpoint saved | Progress: {stats['processed']:,}/{stats['total']:,} | Rate: {rate:.1f}/sec")
+def infer_domains_cached(company_names: Iterable, cache: DomainCache, max_patterns: int = 5) -> List[List[str]]:
+    """
+    infer_domains through the cache: names already cached skip inference, and
+    the rest are inferred in one batch and added to the cache.
+    """
+    keys = [normalize_name(name) for name in company_names]
+    candidates = cache.get_candidates(keys, max_patterns)
+    missing = [key for key in dict.fromkeys(keys) if key not in candidates]
+    if missing:
+        # Normalizing case and whitespace doesn't change what clean_company_name produces
+        inferred = dict(zip(missing, infer_domains(missing, max_patterns)))
+        cache.put_candidates(inferred, max_patterns)
+        candidates.update(inferred)
+    return [list(candidates[key]) for key in keys]
+
+
+def with_inferred_domains(companies: Iterable[Dict], batch_size: Optional[int] = None,
+                          cache: Optional[DomainCache] = None):
+    """
+    Yield (company_entry, inferred_domains) pairs, inferring the domains of each batch
+    of companies with one infer_domains call (batch_size=None: everything at once).
+    """
+    companies = iter(companies)
+    while True:
+        batch = list(islice(companies, batch_size))
+        if not batch:
+            return
+        names = [entry.get('company', {}).get('name', '') for entry in batch]
+        domains = infer_domains_cached(names, cache) if cache is not None else infer_domains(names)
+        yield from zip(batch, domains)
+
+
+def inferred_domains_entry(domains: List[str]) -> Dict:
+    """The inferred_domains block added to each company (verification fills in the rest)"""
+    return {
+        'domains': domains,
+        'verified': None,
+        'checked': False,
+        'inferred_at': datetime.now().isoformat()
+    }
+
+
+def journal_path_for(output_file: Path) -> Path:
+    """Checkpoint journal kept next to a JSON output while it is being built"""
+    return output_file.with_name(f"{output_file.stem}.journal.jsonl")
+
+
+def truncate_partial_line(path: Path) -> bytes:
+    """Drop a partially written last line from a JSONL file; returns the complete lines"""
+    with open(path, 'rb+') as f:
+        content = f.read()
+        complete = content.rfind(b'\n') + 1
+        if complete < len(content):
+            f.truncate(complete)
+    return content[:complete]
+
+
+def journal_record(index: int, company_entry: Dict) -> str:
+    """One checkpoint journal line: which company it was and what was inferred"""
+    return jsonl_line({
+        'index': index,
+        'accession_number': company_entry.get('accession_number'),
+        'inferred_domains': company_entry['inferred_domains']
+    })
 
 
-def find_last_processed_index(companies: List[Dict]) -> int:
-    """Find the index of the last processed company."""
-    for i in range(len(companies) - 1, -1, -1):
-        if 'inferred_domains' in companies[i]:
-            return i + 1
-    return 0
+def replay_journal(journal_file: Path, companies: List[Dict]) -> int:
+    """
+    Re-apply the journaled inferences to companies. Returns the index to resume from;
+    raises ValueError if the journal was written for a different input.
+    """
+    resume_index = 0
+    for line in truncate_partial_line(journal_file).splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        index = record['index']
+        if index >= len(companies) or companies[index].get('accession_number') != record['accession_number']:
+            raise ValueError(f"journal entry {index} does not match {record['accession_number']} in the input")
+        companies[index]['inferred_domains'] = record['inferred_domains']
+        resume_index = max(resume_index, index + 1)
+    return resume_index
+
+
+def resume_jsonl_output(output_file: Path) -> Tuple[int, int]:
+    """
+    Count the complete records already written to a JSONL output, dropping a
+    partially written last line. Returns (records, records_with_domains).
+    """
+    records = 0
+    with_domains = 0
+    for line in truncate_partial_line(output_file).splitlines():
+        if line.strip():
+            records += 1
+            if json.loads(line).get('inferred_domains', {}).get('domains'):
+                with_domains += 1
+    return records, with_domains
+
+
+def progress_label(done: int, total: Optional[int]) -> str:
+    """'done / total (x.x%)', or just the count when the total isn't known up front"""
+    if total:
+        return f"{done:,} / {total:,} ({done / total * 100:.1f}%)"
+    return f"{done:,}"
 
 
 def main():
     # Default input file
     default_input = "sec_companies_targets_unique.json"
     
-    if len(sys.argv) > 1:
-        input_file = Path(sys.argv[1])
+    args = sys.argv[1:]
+    output_format = pop_format_option(args)
+    cache_path = None
+    if '--cache' in args:
+        position = args.index('--cache')
+        if position + 1 >= len(args):
+            print("❌ Error: --cache needs a file path")
+            sys.exit(1)
+        cache_path = args[position + 1]
+        del args[position:position + 2]
+    
+    if args:
+        input_file = Path(args[0])
     else:
         input_file = Path(default_input)
     
     if not input_file.exists():
         print(f"❌ Error: File '{input_file}' not found")
-        if len(sys.argv) == 1:
-            print(f"Usage: python {sys.argv[0]} [input_json_file]")
+        if not args:
+            print(f"Usage: python {sys.argv[0]} [input_json_file] [--format json|jsonl] [--cache PATH]")
             print(f"Default: python {sys.argv[0]} (uses {default_input})")
         sys.exit(1)
     
     # Generate output filename
-    output_file = input_file.with_name(
-        f"{input_file.stem}_urls{input_file.suffix}"
-    )
+    output_file = Path(output_path_for(
+        input_file.with_name(f"{input_file.stem}_urls{input_file.suffix}"),
+        output_format
+    ))
     
     print(f"{'='*70}")
     print(f"SEC Domain Inference Tool - Automated Run")
@@ -197,45 +374,54 @@ def main():
     print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"\nLoading data...")
     
-    # Load the data
+    # Open the data ({metadata, companies}, a bare array or JSONL)
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        document, company_stream = read_companies(input_file)
+        data = dict(document)
+        metadata = data.get('metadata', {})
+        
+        if output_format == 'jsonl':
+            # Streamed straight through, so the count comes from upstream metadata if known
+            companies = None
+            total_companies = metadata.get('total_companies') or metadata.get('filtered_total')
+        else:
+            # JSON output is written once at the end (progress goes to the journal), and
+            # replaying the journal needs the companies by index, so keep them in memory
+            companies = list(company_stream)
+            total_companies = len(companies)
     except json.JSONDecodeError as e:
         print(f"❌ Error: Invalid JSON in {input_file}: {e}")
         sys.exit(1)
     
-    # Extract companies list
-    if isinstance(data, dict) and 'companies' in data:
-        companies = data['companies']
-        metadata = data.get('metadata', {})
+    if total_companies is not None:
+        print(f"Loaded {total_companies:,} companies")
     else:
-        print("❌ Error: Expected JSON with 'companies' key")
-        sys.exit(1)
-    
-    total_companies = len(companies)
-    print(f"Loaded {total_companies:,} companies")
+        print(f"Streaming companies (count unknown until finished)")
     
     # Check if we're resuming from a previous run
+    journal_file = journal_path_for(output_file)
     start_index = 0
-    if output_file.exists():
+    resumed_with_domains = 0
+    if output_file.exists() and output_format == 'jsonl':
+        # Every complete line in the JSONL output is a finished company
         print(f"\n📂 Found existing output file: {output_file}")
+        start_index, resumed_with_domains = resume_jsonl_output(output_file)
+        if start_index > 0:
+            print(f"🔄 Resuming from index {start_index:,} (done: {progress_label(start_index, total_companies)})")
+    elif output_format != 'jsonl' and journal_file.exists():
+        # Each journal line is a finished company; replaying it rebuilds the progress
+        print(f"\n📂 Found checkpoint journal: {journal_file}")
         try:
-            with open(output_file, 'r', encoding='utf-8') as f:
-                existing_data = json.load(f)
-            existing_companies = existing_data.get('companies', [])
-            start_index = find_last_processed_index(existing_companies)
-            
+            start_index = replay_journal(journal_file, companies)
             if start_index > 0:
                 print(f"🔄 Resuming from index {start_index:,} ({start_index/total_companies*100:.1f}% complete)")
-                data = existing_data  # Use existing data
-                companies = existing_companies
             else:
-                print(f"⚠️  No processed data found in output file, starting fresh")
-        except Exception as e:
+                print(f"⚠️  No processed data found in journal, starting fresh")
+        except (ValueError, KeyError, json.JSONDecodeError) as e:
             print(f"⚠️  Could not resume: {e}")
             print(f"Starting fresh...")
             start_index = 0
+            journal_file.unlink()
     
     if start_index == 0:
         print(f"\n🚀 Starting fresh domain inference...")
@@ -249,34 +435,45 @@ def main():
     checkpoint_interval = 1000
     with_domains_count = 0
     
-    for i in range(start_index, total_companies):
-        company_entry = companies[i]
+    # In JSONL mode each company is appended to the output as soon as it is processed;
+    # for JSON output it goes to the checkpoint journal until the output is written
+    jsonl_out = open(output_file, 'a', encoding='utf-8') if output_format == 'jsonl' else None
+    journal_out = open(journal_file, 'a', encoding='utf-8') if output_format != 'jsonl' else None
+    
+    cache = DomainCache(cache_path) if cache_path else None
+    if cache is not None:
+        print(f"🗄️  Domain cache: {cache_path} ({cache.stats['evicted']:,} expired entries evicted)")
+    
+    # Domains are inferred for the whole master in one batch, or per batch when streaming
+    if output_format == 'jsonl':
+        pending = with_inferred_domains(islice(company_stream, start_index, None), INFERENCE_BATCH, cache)
+    else:
+        pending = with_inferred_domains(islice(companies, start_index, None), cache=cache)
+    
+    i = start_index - 1
+    for i, (company_entry, inferred_domains) in enumerate(pending, start_index):
         company = company_entry.get('company', {})
         company_name = company.get('name', '')
         
-        # Infer domain patterns
-        inferred_domains = infer_domain(company_name)
-        
         # Add inferred domains to the company entry
-        company_entry['inferred_domains'] = {
-            'domains': inferred_domains,
-            'verified': None,
-            'checked': False,
-            'inferred_at': datetime.now().isoformat()
-        }
+        company_entry['inferred_domains'] = inferred_domains_entry(inferred_domains)
         
         if inferred_domains:
             with_domains_count += 1
         
+        if jsonl_out:
+            jsonl_out.write(jsonl_line(company_entry))
+        else:
+            journal_out.write(journal_record(i, company_entry))
+        
         # Periodic progress update (every 1000)
         if (i + 1) % 1000 == 0 or i == start_index:
             elapsed = time.time() - start_time
             rate = (i + 1 - start_index) / elapsed if elapsed > 0 else 0
-            pct_done = ((i + 1) / total_companies) * 100
             pct_with_domains = (with_domains_count / (i + 1 - start_index)) * 100 if (i + 1 - start_index) > 0 else 0
             
             print(f"{'='*70}")
-            print(f"Progress: {i+1:,} / {total_companies:,} ({pct_done:.1f}%)")
+            print(f"Progress: {progress_label(i + 1, total_companies)}")
             print(f"Rate: {rate:.1f} companies/sec | Elapsed: {elapsed:.0f}s")
             print(f"With domains: {with_domains_count:,} ({pct_with_domains:.1f}%)")
             print(f"Current: {company_name[:60]}")
@@ -284,18 +481,23 @@ def main():
                 print(f"Domains: {', '.join(inferred_domains[:3])}")
             print('='*70)
         
-        # Checkpoint save every 1000
+        # Checkpoint every 1000
         if (i + 1) % checkpoint_interval == 0:
-            data['companies'] = companies
-            save_checkpoint(output_file, data, {
-                'processed': i + 1,
-                'total': total_companies,
-                'with_domains': with_domains_count,
-                'start_time': start_time
-            })
+            (jsonl_out or journal_out).flush()
+            print(f"💾 Checkpoint flushed | Progress: {progress_label(i + 1, total_companies)}")
+    
+    if journal_out:
+        journal_out.close()
+    if jsonl_out:
+        jsonl_out.close()
+        # Every input company has now been written, so the stream length is known
+        total_companies = i + 1
     
     # Calculate final statistics
-    total_with_domains = sum(1 for c in companies if c.get('inferred_domains', {}).get('domains'))
+    if output_format == 'jsonl':
+        total_with_domains = resumed_with_domains + with_domains_count
+    else:
+        total_with_domains = sum(1 for c in companies if c.get('inferred_domains', {}).get('domains'))
     total_without_domains = total_companies - total_with_domains
     total_elapsed = time.time() - start_time
     
@@ -309,6 +511,9 @@ def main():
     print(f"  With inferred domains: {total_with_domains:,} ({total_with_domains/total_companies*100:.1f}%)")
     print(f"  Without domains: {total_without_domains:,} ({total_without_domains/total_companies*100:.1f}%)")
     print(f"  Average rate: {total_companies/total_elapsed:.1f} companies/sec")
+    if cache is not None:
+        cache.close()
+        print(f"  Cache: {cache.summary()}")
     
     # Update metadata
     if 'metadata' in data:
@@ -321,12 +526,20 @@ def main():
             'success_rate': total_with_domains / total_companies if total_companies > 0 else 0,
             'processing_time_seconds': total_elapsed
         }
+        if cache is not None:
+            data['metadata']['domain_inference']['cache'] = dict(cache.stats)
     
     # Save final output
-    data['companies'] = companies
-    print(f"\n💾 Saving final output to: {output_file}")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    if output_format == 'jsonl':
+        print(f"\n💾 Writing metadata sidecar for: {output_file}")
+        write_metadata(output_file, data.get('metadata', {}))
+    else:
+        data['companies'] = companies
+        print(f"\n💾 Saving final output to: {output_file}")
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        # The output is complete, so the journal is no longer needed
+        journal_file.unlink()
     
     input_size = input_file.stat().st_size
     output_size = output_file.stat().st_size
@@ -339,7 +552,8 @@ def main():
     print(f"\n{'='*70}")
     print("Sample domain inferences (first 10 companies):")
     print('='*70)
-    for i, company_entry in enumerate(companies[:10]):
+    samples = list(islice(read_jsonl(output_file), 10)) if output_format == 'jsonl' else companies[:10]
+    for i, company_entry in enumerate(samples):
         company = company_entry.get('company', {})
         name = company.get('name', '')
         domains = company_entry.get('inferred_domains', {}).get('domains', [])
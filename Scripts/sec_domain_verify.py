@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+sec_domain_verify.py - Verify inferred domains by resolving them
+Usage: python sec_domain_verify.py [input_json_file] [--format json|jsonl] [--resolver dns|http|http://HOST:PORT|hosts:FILE]
+                                   [--cache domain_cache.sqlite [--cache-ttl 7]]
+       python sec_domain_verify.py --serve-stub domains.txt [--port 8053]
+Default: python sec_domain_verify.py (uses sec_companies_targets_unique_urls.json)
+
+Fills in the 'verified' / 'checked' fields sec_domain_inference.py leaves empty:
+each company's candidates are tried in order and the first one that resolves is
+recorded. Lookups run concurrently with asyncio - bounded by --concurrency, spaced
+per upstream host by --rate, with a timeout and retries per lookup - and a domain
+shared by several companies is only looked up once. With --cache, outcomes are kept
+in a SQLite cache for --cache-ttl days (see sec_domain_cache.py), so later runs only
+look up domains they haven't seen recently.
+
+Resolvers are pluggable (anything with `async resolve(domain) -> bool` and
+`host_of(domain)`):
+  dns              - the system resolver (aiodns when installed)
+  http             - an HTTP HEAD request to the domain
+  http://HOST:PORT - HTTP requests sent to one server with the domain as Host header,
+                     e.g. the local stub from --serve-stub
+  hosts:FILE       - a static list of resolving domains, one per line
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from sec_domain_cache import DAY, DEFAULT_VERIFICATION_TTL, DomainCache
+from sec_stream import OUTPUT_FORMATS, output_path_for, read_companies, write_jsonl, write_metadata
+
+try:
+    import aiodns
+    AIODNS_AVAILABLE = True
+except ImportError:
+    AIODNS_AVAILABLE = False
+
+DEFAULT_CONCURRENCY = 200
+DEFAULT_RATE_PER_HOST = 0  # lookups/sec per upstream host, 0 = unlimited
+DEFAULT_TIMEOUT = 3.0
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF = 0.2
+VERIFY_BATCH = 2000
+
+
+class TransientLookupError(Exception):
+    """A lookup that failed without a definite answer (worth retrying)"""
+
+
+class DNSResolver:
+    """A domain resolves if it has an address record"""
+
+    name = 'dns'
+
+    def __init__(self):
+        self._resolver = aiodns.DNSResolver() if AIODNS_AVAILABLE else None
+
+    def host_of(self, domain: str) -> str:
+        # Rate limits apply per top-level domain's name servers
+        return domain.rsplit('.', 1)[-1]
+
+    async def resolve(self, domain: str) -> bool:
+        if self._resolver is not None:
+            try:
+                await self._resolver.query(domain, 'A')
+                return True
+            except aiodns.error.DNSError as e:
+                if e.args and e.args[0] in (aiodns.error.ARES_ENOTFOUND, aiodns.error.ARES_ENODATA):
+                    return False
+                raise TransientLookupError(str(e))
+        try:
+            await asyncio.get_running_loop().getaddrinfo(domain, None, type=socket.SOCK_STREAM)
+            return True
+        except socket.gaierror as e:
+            if e.errno in (socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)):
+                return False
+            raise TransientLookupError(str(e))
+
+
+class HTTPResolver:
+    """
+    A domain resolves if an HTTP HEAD request for it gets any response below 500.
+    With server=(host, port), every request goes to that server with the domain
+    in the Host header instead, and the domain resolves if the server answers
+    below 400 for it (a virtual host it doesn't serve gets a 404).
+    """
+
+    def __init__(self, server: Optional[tuple] = None):
+        self.server = server
+        self.name = f"http://{server[0]}:{server[1]}" if server else 'http'
+
+    def host_of(self, domain: str) -> str:
+        return f"{self.server[0]}:{self.server[1]}" if self.server else domain
+
+    async def resolve(self, domain: str) -> bool:
+        host, port = self.server or (domain, 80)
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except socket.gaierror:
+            return False  # The domain itself doesn't resolve
+        except ConnectionRefusedError:
+            if self.server:
+                raise TransientLookupError(f"stub server {self.name} refused the connection")
+            return False
+        except OSError as e:
+            raise TransientLookupError(str(e))
+        try:
+            writer.write(f"HEAD / HTTP/1.0\r\nHost: {domain}\r\nUser-Agent: sec_domain_verify\r\n\r\n".encode('ascii'))
+            await writer.drain()
+            status_line = await reader.readline()
+        finally:
+            writer.close()
+        parts = status_line.split()
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise TransientLookupError(f"bad HTTP response from {domain}")
+        return int(parts[1]) < (400 if self.server else 500)
+
+
+class HostsResolver:
+    """Static stand-in for DNS: only the listed domains resolve"""
+
+    def __init__(self, path: str):
+        self.name = f"hosts:{path}"
+        with open(path, 'r', encoding='utf-8') as f:
+            self.domains = {line.strip().lower() for line in f if line.strip()}
+
+    def host_of(self, domain: str) -> str:
+        return 'hosts'
+
+    async def resolve(self, domain: str) -> bool:
+        return domain.lower() in self.domains
+
+
+def resolver_from_spec(spec: str):
+    """Build a resolver from its --resolver spec (see the module docstring)"""
+    if spec == 'dns':
+        return DNSResolver()
+    if spec == 'http':
+        return HTTPResolver()
+    if spec.startswith('http://'):
+        address = urlsplit(spec)
+        return HTTPResolver((address.hostname, address.port or 80))
+    if spec.startswith('hosts:'):
+        return HostsResolver(spec[len('hosts:'):])
+    raise ValueError(f"Unknown resolver '{spec}' (use dns, http, http://HOST:PORT or hosts:FILE)")
+
+
+class HostRateLimiter:
+    """Spaces requests to the same upstream host at most `rate` per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate else 0
+        self._next_slot = {}
+
+    async def wait(self, host: str):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class DomainVerifier:
+    """
+    Concurrent, rate-limited, retrying domain lookups through a resolver.
+    Each domain is looked up at most once per run; companies sharing it share the result.
+    With a cache, fresh cached outcomes skip the lookup and new definite ones are stored.
+    """
+
+    def __init__(self, resolver, concurrency: int = DEFAULT_CONCURRENCY, rate_per_host: float = DEFAULT_RATE_PER_HOST,
+                 timeout: float = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES, cache: Optional[DomainCache] = None):
+        self.resolver = resolver
+        self.cache = cache
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.limiter = HostRateLimiter(rate_per_host)
+        self._semaphore = None
+        self._lookups = {}  # domain -> task resolving to True / False / None (undecided)
+        self.stats = {'lookups': 0, 'shared': 0, 'retries': 0, 'errors': 0}
+
+    async def _lookup(self, domain: str) -> Optional[bool]:
+        if self.cache is not None:
+            cached = self.cache.get_verification(domain, self.resolver.name)
+            if cached is not None:
+                return cached
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats['retries'] += 1
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+            await self.limiter.wait(self.resolver.host_of(domain))
+            async with self._semaphore:
+                try:
+                    self.stats['lookups'] += 1
+                    resolves = await asyncio.wait_for(self.resolver.resolve(domain), self.timeout)
+                except (asyncio.TimeoutError, TransientLookupError, OSError):
+                    continue
+            if self.cache is not None:
+                self.cache.put_verification(domain, resolves, self.resolver.name)
+            return resolves
+        self.stats['errors'] += 1
+        return None
+
+    def resolves(self, domain: str) -> 'asyncio.Task':
+        """Task for a domain's lookup, started on first request"""
+        task = self._lookups.get(domain)
+        if task is None:
+            task = asyncio.ensure_future(self._lookup(domain))
+            self._lookups[domain] = task
+        else:
+            self.stats['shared'] += 1
+        return task
+
+    async def verify_company(self, company_entry: Dict):
+        """Record the first candidate domain that resolves, in candidate order"""
+        inferred = company_entry.get('inferred_domains')
+        if not inferred or inferred.get('checked'):
+            return
+
+        undecided = False
+        verified = None
+        for domain in inferred.get('domains', []):
+            result = await self.resolves(domain)
+            if result is None:
+                # A later match only counts once every earlier candidate is a definite miss
+                undecided = True
+                break
+            if result:
+                verified = domain
+                break
+
+        inferred['verified'] = verified
+        # Lookups that kept failing leave the company unchecked, so a rerun tries again
+        inferred['checked'] = not undecided
+        inferred['verified_at'] = datetime.now().isoformat()
+
+    async def verify_batch(self, companies: List[Dict]):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self.verify_company(c) for c in companies))
+        if self.cache is not None:
+            self.cache.commit()
+
+
+def iter_verified(companies: Iterable[Dict], verifier: DomainVerifier, progress: Dict) -> Iterable[Dict]:
+    """Verify companies batch by batch (each batch concurrently) and yield them in order"""
+    loop = asyncio.new_event_loop()
+    try:
+        companies = iter(companies)
+        while True:
+            batch = list(islice(companies, VERIFY_BATCH))
+            if not batch:
+                return
+            loop.run_until_complete(verifier.verify_batch(batch))
+            progress['processed'] += len(batch)
+            progress['verified'] += sum(1 for c in batch if (c.get('inferred_domains') or {}).get('verified'))
+            elapsed = time.time() - progress['start_time']
+            print(f"Progress: {progress['processed']:,} companies | Verified: {progress['verified']:,} | "
+                  f"Lookups: {verifier.stats['lookups']:,} ({verifier.stats['lookups'] / elapsed:.0f}/sec)")
+            yield from batch
+    finally:
+        loop.close()
+
+
+def serve_stub(domains_file: str, host: str = '127.0.0.1', port: int = 8053, latency: float = 0.0):
+    """
+    Local stand-in HTTP server for testing: answers 200 for the domains listed in
+    domains_file (by Host header) and 404 for everything else.
+    """
+    with open(domains_file, 'r', encoding='utf-8') as f:
+        domains = {line.strip().lower() for line in f if line.strip()}
+
+    async def handle(reader, writer):
+        host_header = b''
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if line.lower().startswith(b'host:'):
+                host_header = line[5:].strip().lower()
+        if latency:
+            await asyncio.sleep(latency)
+        status = b'200 OK' if host_header.decode('ascii', 'replace') in domains else b'404 Not Found'
+        writer.write(b'HTTP/1.0 ' + status + b'\r\nContent-Length: 0\r\n\r\n')
+        await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(handle, host, port, backlog=4096)
+        print(f"Stub server for {len(domains):,} domains on http://{host}:{port} (Ctrl+C to stop)")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify inferred company domains')
+    parser.add_argument('input', nargs='?', default='sec_companies_targets_unique_urls.json',
+                        help='Output of sec_domain_inference.py')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='json', help='Output format')
+    parser.add_argument('--resolver', default='dns', help='dns, http, http://HOST:PORT or hosts:FILE')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Lookups in flight at once')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE_PER_HOST,
+                        help='Max lookups/sec per upstream host (0 = unlimited)')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Seconds per lookup attempt')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help='Retries after a failed lookup')
+    parser.add_argument('--cache', metavar='PATH', help='SQLite cache of verification outcomes')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_VERIFICATION_TTL / DAY,
+                        help='Days a cached outcome stays valid')
+    parser.add_argument('--serve-stub', metavar='DOMAINS_FILE',
+                        help='Run a local stub HTTP server answering for the listed domains instead')
+    parser.add_argument('--port', type=int, default=8053, help='Port for --serve-stub')
+    args = parser.parse_args()
+
+    if args.serve_stub:
+        serve_stub(args.serve_stub, port=args.port)
+        return
+
+    try:
+        resolver = resolver_from_spec(args.resolver)
+    except (ValueError, OSError) as e:
+        parser.error(str(e))
+
+    input_file = Path(args.input)
+    if not input_file.exists():
+        print(f"❌ Error: File '{input_file}' not found")
+        sys.exit(1)
+    output_file = Path(output_path_for(
+        input_file.with_name(f"{input_file.stem}_verified{input_file.suffix}"),
+        args.format
+    ))
+
+    print(f"{'='*70}")
+    print(f"SEC Domain Verification")
+    print(f"{'='*70}")
+    print(f"Input:    {input_file}")
+    print(f"Output:   {output_file}")
+    print(f"Resolver: {resolver.name} | Concurrency: {args.concurrency} | "
+          f"Rate/host: {args.rate or 'unlimited'} | Timeout: {args.timeout}s | Retries: {args.retries}")
+    print(f"{'='*70}\n")
+
+    try:
+        document, companies = read_companies(input_file)
+    except json.JSONDecodeError as e:
+        print(f"❌ Error: Invalid JSON in {input_file}: {e}")
+        sys.exit(1)
+
+    cache = DomainCache(args.cache, verification_ttl=args.cache_ttl * DAY) if args.cache else None
+    if cache is not None:
+        print(f"🗄️  Domain cache: {args.cache} ({cache.stats['evicted']:,} expired entries evicted)\n")
+    verifier = DomainVerifier(resolver, args.concurrency, args.rate, args.timeout, args.retries, cache)
+    progress = {'processed': 0, 'verified': 0, 'start_time': time.time()}
+    verified_stream = iter_verified(companies, verifier, progress)
+
+    data = dict(document)
+    if args.format == 'jsonl':
+        write_jsonl(output_file, verified_stream)
+    else:
+        verified_companies = list(verified_stream)
+
+    elapsed = time.time() - progress['start_time']
+    processed = progress['processed']
+    print(f"\n{'='*70}")
+    print(f"✅ COMPLETED in {elapsed:.1f}s")
+    print(f"{'='*70}")
+    print(f"  Companies: {processed:,}")
+    print(f"  Verified domains: {progress['verified']:,} ({progress['verified'] / processed * 100 if processed else 0:.1f}%)")
+    print(f"  Lookups: {verifier.stats['lookups']:,} ({verifier.stats['lookups'] / elapsed if elapsed else 0:.0f}/sec), "
+          f"shared: {verifier.stats['shared']:,}, retries: {verifier.stats['retries']:,}, "
+          f"failed: {verifier.stats['errors']:,}")
+    if cache is not None:
+        cache.close()
+        print(f"  Cache: {cache.summary()}")
+
+    if 'metadata' in data:
+        data['metadata']['domain_verification'] = {
+            'completed_at': datetime.now().isoformat(),
+            'resolver': resolver.name,
+            'total_processed': processed,
+            'verified': progress['verified'],
+            **verifier.stats,
+            'processing_time_seconds': elapsed
+        }
+        if cache is not None:
+            data['metadata']['domain_verification']['cache'] = dict(cache.stats)
+
+    if args.format == 'jsonl':
+        write_metadata(output_file, data.get('metadata', {}))
+    else:
+        data['companies'] = verified_companies
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Saved: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,59 @@
 import json
 import re
 import sys
-from typing import Dict, List, Any
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Tuple
 from collections import defaultdict
 
+import pandas as pd
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+# What load_filter_spec can raise for a missing or malformed spec file
+SPEC_ERRORS = (OSError, ValueError) + ((yaml.YAMLError,) if YAML_AVAILABLE else ())
+
+from sec_documents import parse_filing_dates
+from sec_industry import IndustryClassifier
+from sec_stream import jsonl_line, output_path_for, pop_format_option, read_companies, write_metadata
+
+# Substrings (lowercase) that mark an industry as excluded by default
+EXCLUDED_INDUSTRY_KEYWORDS = [
+    'real estate', 'realty', 'property', 'reit', 'residential',
+    'pooled investment', 'hedge fund', 'private equity', 'investment fund',
+    'oil', 'gas', 'petroleum', 'energy exploration',
+    'agriculture', 'farming', 'agribusiness',
+    'retail', 'store', 'shopping',
+    'construction', 'contractor', 'building',
+    'commercial',
+    'restaurant', 'food service', 'hospitality'
+]
+
+EXCLUDED_INDUSTRIES = IndustryClassifier(exclude=EXCLUDED_INDUSTRY_KEYWORDS)
+
+# State codes that pass the 2-letter check but aren't US states
+NON_US_STATE_CODES = ['X0', 'X1', 'X2', 'X3']  # Common international placeholders
+
+# Every filter a spec can set; None / [] means "don't filter on this"
+DEFAULT_FILTER_SPEC = {
+    'states': ['MA', 'CA', 'NY', 'WA', 'TX', 'IL'],
+    'min_funding': 1_000_000,
+    'max_funding': None,
+    'include_industries': [],
+    'exclude_industries': EXCLUDED_INDUSTRY_KEYWORDS,
+    'entity_types': [],
+    'min_year_incorporated': None,
+    'max_year_incorporated': None,
+    'filed_after': None,
+    'filed_before': None
+}
+
+# Companies per vectorized batch - the input is still streamed
+CHUNK_SIZE = 50_000
+
 def normalize_state(state: str) -> str:
     """Normalize state codes to uppercase, handle variations."""
     if not state:
@@ -11,24 +61,8 @@ def normalize_state(state: str) -> str:
     return state.strip().upper()
 
 def is_excluded_industry(industry_name: str) -> bool:
-    """Check if company is in an excluded industry category."""
-    if not industry_name:
-        return False
-    
-    industry_lower = industry_name.lower()
-    
-    excluded_keywords = [
-        'real estate', 'realty', 'property', 'reit', 'residential',
-        'pooled investment', 'hedge fund', 'private equity', 'investment fund',
-        'oil', 'gas', 'petroleum', 'energy exploration',
-        'agriculture', 'farming', 'agribusiness',
-        'retail', 'store', 'shopping',
-        'construction', 'contractor', 'building',
-        'commercial',
-        'restaurant', 'food service', 'hospitality'
-    ]
-    
-    return any(keyword in industry_lower for keyword in excluded_keywords)
+    """Check if company is in an excluded industry category (memoized per distinct industry)."""
+    return EXCLUDED_INDUSTRIES.is_excluded(industry_name)
 
 def extract_funding_amount(company_data: Dict[str, Any]) -> float:
     """Extract total offering amount from funding object."""
@@ -66,154 +100,265 @@ def is_us_company(company_data: Dict[str, Any]) -> bool:
     # US states are 2-letter codes
     if state and len(state) == 2 and state.isalpha():
         # Exclude international codes
-        non_us_codes = ['X0', 'X1', 'X2', 'X3']  # Common international placeholders
-        if state not in non_us_codes:
+        if state not in NON_US_STATE_CODES:
             return True
     
     return False
 
-def filter_companies(input_file: str, output_file: str, 
-                    target_states: List[str] = None,
-                    min_funding: float = 1_000_000) -> Dict[str, Any]:
-    """
-    Filter SEC companies based on criteria.
+def load_filter_spec(path: str) -> Dict[str, Any]:
+    """Read a filter spec from a JSON or YAML file (keys as in DEFAULT_FILTER_SPEC)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.lower().endswith(('.yaml', '.yml')):
+            if not YAML_AVAILABLE:
+                raise ValueError("YAML filter specs need PyYAML (pip install pyyaml)")
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    return spec or {}
+
+def build_filter_spec(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Fill in DEFAULT_FILTER_SPEC with overrides, rejecting unknown keys."""
+    overrides = overrides or {}
+    unknown = sorted(set(overrides) - set(DEFAULT_FILTER_SPEC))
+    if unknown:
+        raise ValueError(f"Unknown filter spec keys: {', '.join(unknown)}")
     
-    Args:
-        input_file: Path to sec_companies_master.json
-        output_file: Path to output sec_companies_targets.json
-        target_states: List of state codes to keep (default: MA, CA, NY, WA, TX, IL)
-        min_funding: Minimum funding amount (default: $1M)
+    spec = dict(DEFAULT_FILTER_SPEC)
+    spec.update(overrides)
+    # Blank entries ("--states ''", states: [""]) mean no restriction, not "match ''"
+    spec['states'] = [s.strip().upper() for s in spec['states'] or [] if s and s.strip()]
+    for key in ('include_industries', 'exclude_industries'):
+        spec[key] = [k.lower() for k in spec[key] or [] if k]
+    spec['entity_types'] = [t for t in spec['entity_types'] or [] if t and t.strip()]
+    for key in ('filed_after', 'filed_before'):
+        # YAML reads unquoted dates as date objects
+        spec[key] = str(spec[key]) if spec[key] else None
+    return spec
+
+def companies_frame(companies: List[Dict[str, Any]]) -> pd.DataFrame:
+    """The fields the filters look at, one row per company."""
+    states, funding, industries, entity_types, years, filed = [], [], [], [], [], []
+    for company_data in companies:
+        company = company_data.get('company') or {}
+        address = company.get('address') or {}
+        states.append(address.get('state') or '')
+        funding.append(extract_funding_amount(company_data))
+        industries.append(company.get('industry') or '')
+        entity_types.append(company.get('entity_type') or '')
+        years.append(company.get('year_incorporated'))
+        filed.append((company_data.get('filing') or {}).get('date_filed'))
     
-    Returns:
-        Dictionary with filtering statistics
+    return pd.DataFrame({
+        'state': pd.Series(states, dtype=str).str.strip().str.upper(),
+        'funding': pd.Series(funding, dtype=float),
+        'industry': pd.Series(industries, dtype=str),
+        'entity_type': pd.Series(entity_types, dtype=str),
+        'year_incorporated': pd.to_numeric(pd.Series(years, dtype=object), errors='coerce'),
+        'date_filed': pd.Series(filed, dtype=object)
+    })
+
+def compile_filter_spec(spec: Dict[str, Any]) -> List[Tuple[str, Callable[[pd.DataFrame], pd.Series]]]:
     """
+    Turn a filter spec into an ordered list of (stat_name, predicate) stages.
+    Each predicate maps a companies_frame() to a boolean "keep" mask; filters the
+    spec leaves unset are dropped entirely.
+    """
+    stages = []
     
-    if target_states is None:
-        target_states = ['MA', 'CA', 'NY', 'WA', 'TX', 'IL']
+    # Filter 1: US-based (2-letter alphabetic state code, not an international placeholder)
+    stages.append(('removed_by_country', lambda frame: (
+        (frame['state'].str.len() == 2) & frame['state'].str.isalpha() & ~frame['state'].isin(NON_US_STATE_CODES)
+    )))
     
-    target_states = [s.upper() for s in target_states]
+    # Filter 2: funding range
+    min_funding, max_funding = spec['min_funding'], spec['max_funding']
+    if min_funding is not None or max_funding is not None:
+        def funding_in_range(frame):
+            keep = pd.Series(True, index=frame.index)
+            if min_funding is not None:
+                keep &= frame['funding'] >= min_funding
+            if max_funding is not None:
+                keep &= frame['funding'] <= max_funding
+            return keep
+        stages.append(('removed_by_funding', funding_in_range))
     
-    print(f"Loading companies from {input_file}...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # Filter 3: target states
+    if spec['states']:
+        states = spec['states']
+        stages.append(('removed_by_location', lambda frame: frame['state'].isin(states)))
     
-    # Handle both formats: direct array or object with metadata
-    if isinstance(data, dict) and 'companies' in data:
-        companies = data['companies']
-        metadata = data.get('metadata', {})
-        print(f"Data source: {metadata.get('date_range', {})}")
-    else:
-        companies = data
-        metadata = {}
+    # Filter 4: industry keywords (substring match, case-insensitive, once per distinct industry)
+    if spec['include_industries'] or spec['exclude_industries']:
+        classifier = IndustryClassifier(include=spec['include_industries'], exclude=spec['exclude_industries'])
+        stages.append(('removed_by_industry', lambda frame: classifier.allowed_mask(frame['industry'])))
     
-    initial_count = len(companies)
-    print(f"Initial company count: {initial_count:,}")
+    # Filter 5: entity types (exact, case-insensitive)
+    if spec['entity_types']:
+        entity_types = [t.lower() for t in spec['entity_types']]
+        stages.append(('removed_by_entity_type', lambda frame: frame['entity_type'].str.lower().isin(entity_types)))
     
-    # Statistics tracking
-    stats = {
-        'initial_count': initial_count,
+    # Filter 6: year of incorporation
+    min_year, max_year = spec['min_year_incorporated'], spec['max_year_incorporated']
+    if min_year is not None or max_year is not None:
+        def year_in_range(frame):
+            year = frame['year_incorporated']
+            keep = year.notna()
+            if min_year is not None:
+                keep &= year >= min_year
+            if max_year is not None:
+                keep &= year <= max_year
+            return keep
+        stages.append(('removed_by_year', year_in_range))
+    
+    # Filter 7: filing date (SEC dates look like 07-DEC-2023, see FILING_DATE_FORMATS; bounds are YYYY-MM-DD)
+    filed_after, filed_before = spec['filed_after'], spec['filed_before']
+    if filed_after or filed_before:
+        after = pd.Timestamp(filed_after) if filed_after else None
+        before = pd.Timestamp(filed_before) if filed_before else None
+        def filed_in_range(frame):
+            filed = parse_filing_dates(frame['date_filed'])
+            keep = filed.notna()
+            if after is not None:
+                keep &= filed >= after
+            if before is not None:
+                keep &= filed <= before
+            return keep
+        stages.append(('removed_by_filing_date', filed_in_range))
+    
+    return stages
+
+def apply_filter_stages(frame: pd.DataFrame, stages, stats: Dict[str, Any]) -> pd.Series:
+    """
+    Combine the stage masks into one keep mask. Each stage only counts the companies
+    still alive when it runs, so removed_by_* matches checking the filters in order.
+    """
+    alive = pd.Series(True, index=frame.index)
+    for stat_name, predicate in stages:
+        keep = predicate(frame).fillna(False).astype(bool)
+        stats[stat_name] += int((alive & ~keep).sum())
+        alive &= keep
+    return alive
+
+def iter_chunks(items: Iterable[Any], size: int):
+    """Yield lists of up to size items from a stream."""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def funding_range(funding: float) -> str:
+    """Funding bucket used in the summary."""
+    if funding < 5_000_000:
+        return '$1M-$5M'
+    elif funding < 10_000_000:
+        return '$5M-$10M'
+    elif funding < 25_000_000:
+        return '$10M-$25M'
+    elif funding < 50_000_000:
+        return '$25M-$50M'
+    return '$50M+'
+
+def describe_filter_spec(spec: Dict[str, Any]) -> List[str]:
+    """One line per active filter, for the progress output."""
+    lines = []
+    if spec['min_funding'] is not None:
+        lines.append(f"Minimum funding: ${spec['min_funding']:,}")
+    if spec['max_funding'] is not None:
+        lines.append(f"Maximum funding: ${spec['max_funding']:,}")
+    lines.append(f"Target states: {', '.join(spec['states']) if spec['states'] else 'all US'}")
+    if spec['include_industries']:
+        lines.append(f"Included industries: {', '.join(spec['include_industries'])}")
+    if spec['exclude_industries'] == EXCLUDED_INDUSTRY_KEYWORDS:
+        lines.append("Excluded industries: Real Estate, Pooled Investment, Oil/Gas, etc.")
+    elif spec['exclude_industries']:
+        lines.append(f"Excluded industries: {', '.join(spec['exclude_industries'])}")
+    if spec['entity_types']:
+        lines.append(f"Entity types: {', '.join(spec['entity_types'])}")
+    if spec['min_year_incorporated'] is not None or spec['max_year_incorporated'] is not None:
+        lines.append(f"Incorporated: {spec['min_year_incorporated'] or 'any'} to {spec['max_year_incorporated'] or 'any'}")
+    if spec['filed_after'] or spec['filed_before']:
+        lines.append(f"Filed: {spec['filed_after'] or 'any'} to {spec['filed_before'] or 'any'}")
+    return lines
+
+def filters_applied(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """The filters_applied metadata block: the original summary keys plus the full spec."""
+    if spec['exclude_industries'] == EXCLUDED_INDUSTRY_KEYWORDS:
+        excluded = ['Real Estate', 'Pooled Investment', 'Oil/Gas', 'Agriculture', 'Retail', 'Construction']
+    else:
+        excluded = spec['exclude_industries']
+    return {
+        'min_funding': spec['min_funding'],
+        'target_states': spec['states'],
+        'excluded_industries': excluded,
+        'spec': spec
+    }
+
+def new_filter_stats() -> Dict[str, Any]:
+    """Empty statistics for iter_filtered_companies."""
+    return {
+        'initial_count': 0,
         'removed_by_funding': 0,
         'removed_by_location': 0,
         'removed_by_industry': 0,
         'removed_by_country': 0,
+        'removed_by_entity_type': 0,
+        'removed_by_year': 0,
+        'removed_by_filing_date': 0,
+        'removed_by_query': 0,
         'final_count': 0,
         'by_state': defaultdict(int),
         'by_funding_range': defaultdict(int),
         'by_industry': defaultdict(int)
     }
-    
-    filtered_companies = []
-    
-    print("\nApplying filters...")
-    print(f"  → Minimum funding: ${min_funding:,}")
-    print(f"  → Target states: {', '.join(target_states)}")
-    print(f"  → Excluded industries: Real Estate, Pooled Investment, Oil/Gas, etc.\n")
-    
-    for company_data in companies:
-        company = company_data.get('company', {})
-        address = company.get('address', {})
-        
-        # Filter 1: Check if US-based
-        if not is_us_company(company_data):
-            stats['removed_by_country'] += 1
-            continue
-        
-        # Filter 2: Check funding threshold
-        funding = extract_funding_amount(company_data)
-        if funding < min_funding:
-            stats['removed_by_funding'] += 1
-            continue
-        
-        # Filter 3: Check state
-        state = normalize_state(address.get('state', ''))
-        
-        if state not in target_states:
-            stats['removed_by_location'] += 1
-            continue
-        
-        # Filter 4: Check industry exclusions
-        industry = company.get('industry', '')
-        if is_excluded_industry(industry):
-            stats['removed_by_industry'] += 1
-            continue
-        
-        # Passed all filters - add to results
-        filtered_companies.append(company_data)
-        
-        # Track statistics
-        stats['by_state'][state] += 1
+
+def iter_filtered_companies(companies: Iterable[Dict[str, Any]], stages, stats: Dict[str, Any],
+                            sample_companies: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the companies that pass every compiled filter stage, in input order.
+    Updates stats (see new_filter_stats) and keeps the first 5 passing companies
+    in sample_companies.
+    """
+    # Each batch becomes a small frame of the filtered fields, and the compiled
+    # stages turn it into one boolean mask
+    for chunk in iter_chunks(companies, CHUNK_SIZE):
+        stats['initial_count'] += len(chunk)
+        frame = companies_frame(chunk)
+        keep = apply_filter_stages(frame, stages, stats)
+        passed = frame[keep]
         
-        # Funding range
-        if funding < 5_000_000:
-            stats['by_funding_range']['$1M-$5M'] += 1
-        elif funding < 10_000_000:
-            stats['by_funding_range']['$5M-$10M'] += 1
-        elif funding < 25_000_000:
-            stats['by_funding_range']['$10M-$25M'] += 1
-        elif funding < 50_000_000:
-            stats['by_funding_range']['$25M-$50M'] += 1
-        else:
-            stats['by_funding_range']['$50M+'] += 1
+        # Track statistics (groupby sort=False keeps first-seen order, like the counters did)
+        for state, count in passed.groupby('state', sort=False).size().items():
+            stats['by_state'][state] += int(count)
+        for range_name, count in passed['funding'].map(funding_range).value_counts(sort=False).items():
+            stats['by_funding_range'][range_name] += int(count)
+        industries = passed.loc[passed['industry'] != '', 'industry']
+        for industry, count in industries.groupby(industries, sort=False).size().items():
+            stats['by_industry'][industry] += int(count)
         
-        # Industry
-        if industry:
-            stats['by_industry'][industry] += 1
-    
-    stats['final_count'] = len(filtered_companies)
-    
-    # Create output structure matching input format
-    output_data = {
-        'metadata': {
-            'filtered_from': input_file,
-            'generated_at': metadata.get('generated_at', ''),
-            'original_total': initial_count,
-            'filtered_total': stats['final_count'],
-            'filters_applied': {
-                'min_funding': min_funding,
-                'target_states': target_states,
-                'excluded_industries': [
-                    'Real Estate', 'Pooled Investment', 'Oil/Gas',
-                    'Agriculture', 'Retail', 'Construction'
-                ]
-            }
-        },
-        'companies': filtered_companies
-    }
-    
-    # Save filtered companies
-    print(f"\nSaving {stats['final_count']:,} companies to {output_file}...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
-    
-    # Print statistics
+        for position in passed.index:
+            company_data = chunk[position]
+            if len(sample_companies) < 5:
+                sample_companies.append(company_data)
+            stats['final_count'] += 1
+            yield company_data
+
+def print_filter_results(stats: Dict[str, Any], spec: Dict[str, Any], sample_companies: List[Dict[str, Any]]):
+    """Print the filtering summary: removals per filter, then by state, funding range and industry."""
     print("\n" + "="*60)
     print("FILTERING RESULTS")
     print("="*60)
     print(f"Initial companies:        {stats['initial_count']:>10,}")
     print(f"Removed (non-US):         {stats['removed_by_country']:>10,}")
-    print(f"Removed (funding < $1M):  {stats['removed_by_funding']:>10,}")
+    funding_label = 'funding < $1M' if (spec['min_funding'], spec['max_funding']) == (1_000_000, None) else 'funding'
+    print(f"{'Removed (' + funding_label + '):':<26}{stats['removed_by_funding']:>10,}")
     print(f"Removed (wrong state):    {stats['removed_by_location']:>10,}")
     print(f"Removed (excluded ind):   {stats['removed_by_industry']:>10,}")
+    for stat_name, label in (('removed_by_entity_type', 'entity type'), ('removed_by_year', 'inc. year'),
+                             ('removed_by_filing_date', 'filing date'), ('removed_by_query', 'db query')):
+        if stats[stat_name]:
+            print(f"{'Removed (' + label + '):':<26}{stats[stat_name]:>10,}")
     print(f"Final target companies:   {stats['final_count']:>10,}")
     print(f"Retention rate:           {stats['final_count']/stats['initial_count']*100:>9.1f}%")
     
@@ -252,7 +397,7 @@ def filter_companies(input_file: str, output_file: str,
     print("\n" + "="*60)
     print("SAMPLE FILTERED COMPANIES (First 5)")
     print("="*60)
-    for i, company_data in enumerate(filtered_companies[:5], 1):
+    for i, company_data in enumerate(sample_companies, 1):
         company = company_data.get('company', {})
         address = company.get('address', {})
         funding_obj = company_data.get('funding', {})
@@ -269,8 +414,156 @@ def filter_companies(input_file: str, output_file: str,
     
     print("\n" + "="*60)
     
+
+def filter_companies(input_file: str, output_file: str, 
+                    target_states: List[str] = None,
+                    min_funding: float = 1_000_000,
+                    output_format: str = 'json',
+                    spec: Optional[Dict[str, Any]] = None,
+                    db: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Filter SEC companies based on criteria.
+    
+    Args:
+        input_file: Path to sec_companies_master.json
+        output_file: Path to output sec_companies_targets.json
+        target_states: List of state codes to keep (default: MA, CA, NY, WA, TX, IL)
+        min_funding: Minimum funding amount (default: $1M)
+        output_format: 'json' (one indented document) or 'jsonl' (companies written
+                       one per line as they pass, metadata in a .meta.json sidecar)
+        spec: Full filter spec (see DEFAULT_FILTER_SPEC); overrides target_states
+              and min_funding when given
+        db: Read from a sec_company_db.py store instead of input_file; the
+            indexed filters are answered by SQLite and only the matching
+            companies are loaded
+    
+    Returns:
+        Dictionary with filtering statistics
+    """
+    
+    if spec is None:
+        spec = build_filter_spec({
+            'states': target_states if target_states is not None else DEFAULT_FILTER_SPEC['states'],
+            'min_funding': min_funding
+        })
+    else:
+        spec = build_filter_spec(spec)
+    stages = compile_filter_spec(spec)
+    
+    store = None
+    if db:
+        # Imported here because sec_company_db imports this module
+        from sec_company_db import CompanyStore
+        print(f"Querying company store {db}...")
+        store = CompanyStore(db, create=False)
+        input_file = db
+        metadata = store.metadata()
+        companies = store.candidates(spec)
+    else:
+        print(f"Streaming companies from {input_file}...")
+        # Handles {metadata, companies}, bare arrays and JSONL; records are read one at a time
+        document, companies = read_companies(input_file)
+        metadata = document.get('metadata', {})
+    if metadata:
+        print(f"Data source: {metadata.get('date_range', {})}")
+    
+    # Statistics tracking
+    stats = new_filter_stats()
+    
+    filtered_companies = []
+    sample_companies = []
+    
+    # In JSONL mode companies are written as they pass instead of collected
+    jsonl_out = open(output_file, 'w', encoding='utf-8') if output_format == 'jsonl' else None
+    
+    print("\nApplying filters...")
+    for line in describe_filter_spec(spec):
+        print(f"  → {line}")
+    print()
+    
+    for company_data in iter_filtered_companies(companies, stages, stats, sample_companies):
+        if jsonl_out:
+            jsonl_out.write(jsonl_line(company_data))
+        else:
+            filtered_companies.append(company_data)
+    
+    if jsonl_out:
+        jsonl_out.close()
+    
+    if store is not None:
+        # Companies the SQL conditions ruled out never reached the per-filter counts
+        total = len(store)
+        store.close()
+        stats['removed_by_query'] = total - stats['initial_count']
+        stats['initial_count'] = total
+    
+    initial_count = stats['initial_count']
+    print(f"Initial company count: {initial_count:,}")
+    
+    # Create output structure matching input format
+    output_data = {
+        'metadata': {
+            'filtered_from': input_file,
+            'generated_at': metadata.get('generated_at', ''),
+            'original_total': initial_count,
+            'filtered_total': stats['final_count'],
+            'filters_applied': filters_applied(spec)
+        },
+        'companies': filtered_companies
+    }
+    
+    # Save filtered companies
+    if jsonl_out:
+        print(f"\nSaved {stats['final_count']:,} companies to {output_file}")
+        write_metadata(output_file, output_data['metadata'])
+    else:
+        print(f"\nSaving {stats['final_count']:,} companies to {output_file}...")
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(output_data, f, indent=2, ensure_ascii=False)
+    
+    print_filter_results(stats, spec, sample_companies)
+    
     return stats
 
+# CLI flag -> (spec key, parser); list flags take comma-separated values
+FILTER_OPTIONS = {
+    '--states': ('states', lambda v: [s for s in v.split(',') if s.strip()]),
+    '--min-funding': ('min_funding', float),
+    '--max-funding': ('max_funding', float),
+    '--include-industries': ('include_industries', lambda v: [k for k in v.split(',') if k]),
+    '--exclude-industries': ('exclude_industries', lambda v: [k for k in v.split(',') if k]),
+    '--entity-types': ('entity_types', lambda v: [t for t in v.split(',') if t.strip()]),
+    '--min-year': ('min_year_incorporated', int),
+    '--max-year': ('max_year_incorporated', int),
+    '--filed-after': ('filed_after', str),
+    '--filed-before': ('filed_before', str)
+}
+
+def pop_filter_options(args: List[str]) -> Dict[str, Any]:
+    """
+    Remove --spec FILE and the individual filter flags from a raw argv list and return
+    the spec overrides (flags win over the file).
+    """
+    overrides = {}
+    for flag in ['--spec'] + list(FILTER_OPTIONS):
+        if flag not in args:
+            continue
+        position = args.index(flag)
+        if position + 1 >= len(args):
+            raise SystemExit(f"{flag} needs a value")
+        value = args[position + 1]
+        del args[position:position + 2]
+        
+        if flag == '--spec':
+            overrides.update(load_filter_spec(value))
+        else:
+            key, parse = FILTER_OPTIONS[flag]
+            try:
+                overrides[key] = parse(value)
+            except ValueError:
+                raise SystemExit(f"Invalid value for {flag}: {value}")
+    return overrides
+
 def main():
     """Main function with command-line argument support."""
     # Default values
@@ -278,19 +571,51 @@ def main():
     output_file = 'sec_companies_targets.json'
     
     # Check for command-line arguments
-    if len(sys.argv) >= 2:
-        input_file = sys.argv[1]
-    if len(sys.argv) >= 3:
-        output_file = sys.argv[2]
+    args = sys.argv[1:]
+    output_format = pop_format_option(args)
+    try:
+        spec = build_filter_spec(pop_filter_options(args))
+    except SPEC_ERRORS as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+    db = None
+    if '--db' in args:
+        position = args.index('--db')
+        if position + 1 >= len(args):
+            print("\n❌ Error: --db needs a file path")
+            sys.exit(1)
+        db = args[position + 1]
+        del args[position:position + 2]
+        # The store replaces input_file, so the only positional is the output
+        args.insert(0, db)
+    if len(args) >= 1:
+        input_file = args[0]
+    if len(args) >= 2:
+        output_file = args[1]
+    output_file = output_path_for(output_file, output_format)
     
     # Show usage
     if '--help' in sys.argv or '-h' in sys.argv:
-        print("Usage: python filter_sec_companies.py [input_file] [output_file]")
+        print("Usage: python filter_sec_companies.py [input_file] [output_file] [--format json|jsonl]")
+        print("                                      [--spec filters.json|filters.yaml] [filter flags]")
+        print("       python filter_sec_companies.py --db sec_companies.db [output_file] [...]")
         print("\nDefaults:")
         print("  input_file:  sec_companies_master.json")
-        print("  output_file: sec_companies_targets.json")
+        print("  output_file: sec_companies_targets.json (.jsonl with --format jsonl)")
+        print("  --format:    json (default) or jsonl - one company per line, metadata in a sidecar")
+        print("  --db:        read from a sec_company_db.py store instead of input_file (indexed queries)")
+        print("\nFilters (a --spec file uses the same names as JSON/YAML keys; flags override it):")
+        print("  --states MA,CA,NY,WA,TX,IL       states (default shown; '' for any US state)")
+        print("  --min-funding 1000000            minimum funding (default $1M)")
+        print("  --max-funding N                  maximum funding")
+        print("  --include-industries a,b         keep only industries containing one of these")
+        print("  --exclude-industries a,b         drop industries containing these (default: real estate, funds, ...)")
+        print("  --entity-types 'Corporation,...' keep only these entity types")
+        print("  --min-year / --max-year YYYY     year of incorporation range")
+        print("  --filed-after / --filed-before YYYY-MM-DD")
         print("\nExample:")
         print("  python filter_sec_companies.py my_companies.json filtered_output.json")
+        print("  python filter_sec_companies.py master.json targets.json --states CA,NY --min-funding 5000000")
         sys.exit(0)
     
     # Run the filter
@@ -298,8 +623,9 @@ def main():
         stats = filter_companies(
             input_file=input_file,
             output_file=output_file,
-            target_states=['MA', 'CA', 'NY', 'WA', 'TX', 'IL'],
-            min_funding=1_000_000
+            output_format=output_format,
+            spec=spec,
+            db=db
         )
         
         print("\n✓ Filtering complete!")
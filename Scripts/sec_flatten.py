@@ -1,7 +1,9 @@
-import json
 import csv
+import heapq
 import sys
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, Iterator, List
+
+from sec_stream import read_companies
 
 def extract_funding_amount(company_data: Dict[str, Any]) -> float:
     """Extract total offering amount from funding object."""
@@ -54,62 +56,131 @@ def flatten_company(company_data: Dict[str, Any]) -> Dict[str, Any]:
         'Accession_Number': company_data.get('accession_number', '')
     }
 
+FIELDNAMES = [
+    'Company_Name',
+    'Industry',
+    'Funding_Formatted',
+    'Funding_Amount',
+    'City',
+    'State',
+    'Phone',
+    'Street_Address',
+    'Zip',
+    'Entity_Type',
+    'Year_Incorporated',
+    'Amount_Sold',
+    'Investors',
+    'Filing_Date',
+    'Primary_Contact',
+    'Accession_Number'
+]
+
+def funding_range(amount: float) -> str:
+    """Bucket a funding amount for the distribution summary."""
+    if amount < 5_000_000:
+        return '$1M-$5M'
+    elif amount < 10_000_000:
+        return '$5M-$10M'
+    elif amount < 25_000_000:
+        return '$10M-$25M'
+    elif amount < 50_000_000:
+        return '$25M-$50M'
+    return '$50M+'
+
+def count_companies(companies: Iterable[Dict[str, Any]], stats: Dict[str, int]) -> Iterator[Dict[str, Any]]:
+    """Pass companies through, counting them in stats['scanned']."""
+    stats['scanned'] = 0
+    for company in companies:
+        stats['scanned'] += 1
+        yield company
+
+def top_companies_by_funding(companies: Iterable[Dict[str, Any]], top_n: int) -> List[Dict[str, Any]]:
+    """
+    The top_n companies by funding, best first, using a bounded heap over the stream.
+    Ties keep input order, exactly like a stable descending sort followed by [:top_n].
+    """
+    return heapq.nsmallest(top_n, companies, key=lambda c: -extract_funding_amount(c))
+
 def convert_to_csv(input_file: str, output_file: str, top_n: int = 100):
-    """Convert JSON to CSV with top N companies by funding."""
-    
-    print(f"Loading companies from {input_file}...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # Handle both formats
-    if isinstance(data, dict) and 'companies' in data:
-        companies = data['companies']
-    else:
-        companies = data
-    
-    print(f"Found {len(companies):,} companies")
-    
-    # Flatten all companies
-    flattened = [flatten_company(c) for c in companies]
-    
-    # Sort by funding amount (descending)
-    flattened.sort(key=lambda x: x['Funding_Amount'], reverse=True)
-    
-    # Take top N
-    top_companies = flattened[:top_n] if top_n else flattened
-    
-    print(f"Exporting top {len(top_companies):,} companies to {output_file}...")
-    
-    # Write to CSV
-    fieldnames = [
-        'Company_Name',
-        'Industry',
-        'Funding_Formatted',
-        'Funding_Amount',
-        'City',
-        'State',
-        'Phone',
-        'Street_Address',
-        'Zip',
-        'Entity_Type',
-        'Year_Incorporated',
-        'Amount_Sold',
-        'Investors',
-        'Filing_Date',
-        'Primary_Contact',
-        'Accession_Number'
-    ]
+    """
+    Convert JSON to CSV with top N companies by funding.
+    
+    Only the N best companies are held (and flattened), so memory scales with N.
+    top_n=0 streams every company straight to the CSV in input order instead of sorting.
+    """
+    
+    print(f"Streaming companies from {input_file}...")
+    # Handles {metadata, companies}, bare arrays and JSONL
+    _, companies = read_companies(input_file)
+    export_companies_csv(companies, output_file, top_n)
+
+def convert_db_to_csv(db: str, output_file: str, top_n: int = 100):
+    """
+    Like convert_to_csv, reading a sec_company_db.py store. The top N come straight
+    off the funding index, so only N documents are loaded; top_n=0 exports every
+    company in master order.
+    """
+    # Imported here because sec_company_db imports this module
+    from sec_company_db import CompanyStore
+    
+    print(f"Querying company store {db}...")
+    store = CompanyStore(db, create=False)
+    try:
+        companies = store.top_by_funding(top_n) if top_n > 0 else store.companies()
+        export_companies_csv(companies, output_file, top_n)
+    finally:
+        store.close()
+
+def export_companies_csv(companies: Iterable[Dict[str, Any]], output_file: str, top_n: int = 100):
+    """
+    Write company documents (any iterable, including a stream) to the CSV and print
+    the export summary. See convert_to_csv for top_n.
+    """
+    stats = {}
+    companies = count_companies(companies, stats)
+    
+    ranges = {
+        '$1M-$5M': 0,
+        '$5M-$10M': 0,
+        '$10M-$25M': 0,
+        '$25M-$50M': 0,
+        '$50M+': 0
+    }
     
     with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
         writer.writeheader()
-        writer.writerows(top_companies)
+        
+        if top_n > 0:
+            top_companies = [flatten_company(c) for c in top_companies_by_funding(companies, top_n)]
+            print(f"Found {stats['scanned']:,} companies")
+            print(f"Exporting top {len(top_companies):,} companies to {output_file}...")
+            writer.writerows(top_companies)
+            for company in top_companies:
+                ranges[funding_range(company['Funding_Amount'])] += 1
+            exported = len(top_companies)
+        else:
+            # Full export: write rows as they are read, tracking only the top 5 for the summary
+            print(f"Exporting all companies to {output_file} as they are read...")
+            top_heap = []
+            for position, company_data in enumerate(companies):
+                company = flatten_company(company_data)
+                writer.writerow(company)
+                ranges[funding_range(company['Funding_Amount'])] += 1
+                entry = (company['Funding_Amount'], -position, company)
+                if len(top_heap) < 5:
+                    heapq.heappush(top_heap, entry)
+                else:
+                    heapq.heappushpop(top_heap, entry)
+            top_companies = [company for _, _, company in sorted(top_heap, reverse=True)]
+            exported = stats['scanned']
+            print(f"Found {exported:,} companies")
     
     # Print summary
     print("\n" + "="*60)
     print("CSV EXPORT SUMMARY")
     print("="*60)
-    print(f"Total companies exported: {len(top_companies):,}")
+    print(f"Total companies exported: {exported:,}")
     print(f"Output file: {output_file}")
     
     print("\n" + "="*60)
@@ -124,31 +195,9 @@ def convert_to_csv(input_file: str, output_file: str, top_n: int = 100):
     print("FUNDING DISTRIBUTION")
     print("="*60)
     
-    # Calculate distribution
-    ranges = {
-        '$1M-$5M': 0,
-        '$5M-$10M': 0,
-        '$10M-$25M': 0,
-        '$25M-$50M': 0,
-        '$50M+': 0
-    }
-    
-    for company in top_companies:
-        amount = company['Funding_Amount']
-        if amount < 5_000_000:
-            ranges['$1M-$5M'] += 1
-        elif amount < 10_000_000:
-            ranges['$5M-$10M'] += 1
-        elif amount < 25_000_000:
-            ranges['$10M-$25M'] += 1
-        elif amount < 50_000_000:
-            ranges['$25M-$50M'] += 1
-        else:
-            ranges['$50M+'] += 1
-    
     for range_name, count in ranges.items():
         if count > 0:
-            pct = count / len(top_companies) * 100
+            pct = count / exported * 100
             print(f"{range_name:>12}: {count:>4} ({pct:>4.1f}%)")
     
     print("\n✓ CSV export complete!")
@@ -160,23 +209,36 @@ def main():
     top_n = 100
     
     # Parse arguments
-    if len(sys.argv) >= 2:
-        input_file = sys.argv[1]
-    if len(sys.argv) >= 3:
-        output_file = sys.argv[2]
-    if len(sys.argv) >= 4:
+    args = sys.argv[1:]
+    db = None
+    if '--db' in args:
+        position = args.index('--db')
+        if position + 1 >= len(args):
+            print("❌ Error: --db needs a file path")
+            sys.exit(1)
+        db = args[position + 1]
+        del args[position:position + 2]
+        # The store replaces input_file, so positionals start at output_file
+        args.insert(0, db)
+    if len(args) >= 1:
+        input_file = args[0]
+    if len(args) >= 2:
+        output_file = args[1]
+    if len(args) >= 3:
         try:
-            top_n = int(sys.argv[3])
+            top_n = int(args[2])
         except ValueError:
             print("Warning: Invalid number, using default top 100")
             top_n = 100
     
     if '--help' in sys.argv or '-h' in sys.argv:
         print("Usage: python flatten_to_csv.py [input_file] [output_file] [top_n]")
+        print("       python flatten_to_csv.py --db sec_companies.db [output_file] [top_n]")
         print("\nDefaults:")
         print("  input_file:  sec_companies_targets.json")
         print("  output_file: sec_companies_top100.csv")
-        print("  top_n:       100 (use 0 for all companies)")
+        print("  top_n:       100 (use 0 to stream all companies, in input order)")
+        print("  --db:        read from a sec_company_db.py store instead of input_file")
         print("\nExamples:")
         print("  python flatten_to_csv.py                          # Top 100")
         print("  python flatten_to_csv.py targets.json out.csv 50  # Top 50")
@@ -184,7 +246,10 @@ def main():
         sys.exit(0)
     
     try:
-        convert_to_csv(input_file, output_file, top_n)
+        if db:
+            convert_db_to_csv(db, output_file, top_n)
+        else:
+            convert_to_csv(input_file, output_file, top_n)
     except FileNotFoundError:
         print(f"\n❌ Error: Could not find '{input_file}'")
         sys.exit(1)
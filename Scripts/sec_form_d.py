@@ -3,27 +3,20 @@ import json
 import os
 import sys
 import argparse
+import zipfile
 from datetime import datetime
 
-# Required TSV files
-REQUIRED_FILES = [
-    'FORMDSUBMISSION.tsv',
-    'ISSUERS.tsv',
-    'OFFERING.tsv',
-    'RELATEDPERSONS.tsv'
-]
+from sec_documents import build_company_documents, clean_values
+from sec_industry import IndustryClassifier
+from sec_tsv import find_tsv_files, load_quarter_tables
 
 def check_required_files(directory):
-    """Check if all required TSV files exist in the directory"""
-    missing_files = []
-    found_files = []
-    
-    for filename in REQUIRED_FILES:
-        filepath = os.path.join(directory, filename)
-        if os.path.exists(filepath):
-            found_files.append(filename)
-        else:
-            missing_files.append(filename)
+    """Check if all required TSV files exist in the directory or *_d.zip archive"""
+    try:
+        found_files, missing_files = find_tsv_files(directory)
+    except zipfile.BadZipFile:
+        print(f"❌ Not a valid ZIP archive: '{directory}'")
+        return False
     
     if missing_files:
         print(f"❌ Missing required files in '{directory}':")
@@ -32,13 +25,13 @@ def check_required_files(directory):
         print(f"\n✅ Found files:")
         for f in found_files:
             print(f"   - {f}")
-        print(f"\nExpected SEC Form D TSV files. Did you extract the ZIP file?")
+        print(f"\nExpected SEC Form D TSV files (an extracted *_d folder or the *_d.zip archive).")
         return False
     
     print(f"✅ All required files found in '{directory}'")
     return True
 
-def create_startups_json(directory='.'):
+def create_startups_json(directory='.', cache_dir=None):
     """Parse SEC Form D data and create MongoDB-ready JSON"""
     
     # Convert to absolute path
@@ -46,7 +39,7 @@ def create_startups_json(directory='.'):
     
     print(f"\n🔍 Looking for TSV files in: {directory}\n")
     
-    # Check if directory exists
+    # Check if directory (or archive) exists
     if not os.path.exists(directory):
         print(f"❌ Directory does not exist: {directory}")
         return None
@@ -58,27 +51,8 @@ def create_startups_json(directory='.'):
     print(f"\n📂 Loading TSV files...")
     
     try:
-        # Load the core files with correct column names
-        submissions = pd.read_csv(
-            os.path.join(directory, 'FORMDSUBMISSION.tsv'), 
-            sep='\t', 
-            low_memory=False
-        )
-        issuers = pd.read_csv(
-            os.path.join(directory, 'ISSUERS.tsv'), 
-            sep='\t', 
-            low_memory=False
-        )
-        offerings = pd.read_csv(
-            os.path.join(directory, 'OFFERING.tsv'), 
-            sep='\t', 
-            low_memory=False
-        )
-        people = pd.read_csv(
-            os.path.join(directory, 'RELATEDPERSONS.tsv'), 
-            sep='\t', 
-            low_memory=False
-        )
+        # Load the core files (streamed straight from the archive for *_d.zip)
+        submissions, issuers, offerings, people = load_quarter_tables(directory, cache_dir)
         
         print(f"   Loaded {len(submissions):,} submissions")
         print(f"   Loaded {len(issuers):,} issuers")
@@ -115,8 +89,9 @@ def create_startups_json(directory='.'):
         
         funded = offerings[offerings['TOTALAMOUNTSOLD'] >= MIN_FUNDING].copy()
         
-        # Filter by industry
-        funded = funded[funded['INDUSTRYGROUPTYPE'].isin(TARGET_INDUSTRIES)].copy()
+        # Filter by industry (each distinct industry name is checked once)
+        target_industries = IndustryClassifier(include=TARGET_INDUSTRIES, match='exact')
+        funded = funded[target_industries.allowed_mask(funded['INDUSTRYGROUPTYPE'])].copy()
         
         print(f"\n   ✓ Found {len(funded):,} companies with ${MIN_FUNDING:,}+ funding in target industries")
         
@@ -151,86 +126,26 @@ def create_startups_json(directory='.'):
     print(f"\n📝 Building JSON documents...")
     startups = []
     
-    for idx, (_, row) in enumerate(target_companies.iterrows(), 1):
-        accession = row['ACCESSIONNUMBER']
-        
+    # Clean every column once and build the nested records from them
+    documents = build_company_documents(target_companies, people)
+    is_amendment = [value == 'Y' for value in clean_values(target_companies, 'ISAMENDMENT')]
+    added_to_database = datetime.now().isoformat()
+    
+    for idx, (document, amendment) in enumerate(zip(documents, is_amendment), 1):
         if idx % 10 == 0:
             print(f"   Processing {idx}/{len(target_companies)}...", end='\r')
         
-        # Get all related persons for this company
-        company_people = people[people['ACCESSIONNUMBER'] == accession]
-        
-        # Build related persons array
-        related_persons = []
-        for _, person in company_people.iterrows():
-            # Combine first, middle, last name
-            name_parts = [
-                clean_value(person.get('FIRSTNAME')),
-                clean_value(person.get('MIDDLENAME')),
-                clean_value(person.get('LASTNAME'))
-            ]
-            full_name = ' '.join([p for p in name_parts if p])
-            
-            # Combine relationships
-            relationships = []
-            for rel_col in ['RELATIONSHIP_1', 'RELATIONSHIP_2', 'RELATIONSHIP_3']:
-                rel = clean_value(person.get(rel_col))
-                if rel:
-                    relationships.append(rel)
-            
-            person_data = {
-                'name': full_name if full_name else None,
-                'first_name': clean_value(person.get('FIRSTNAME')),
-                'middle_name': clean_value(person.get('MIDDLENAME')),
-                'last_name': clean_value(person.get('LASTNAME')),
-                'relationships': relationships,
-                'city': clean_value(person.get('CITY')),
-                'state': clean_value(person.get('STATEORCOUNTRY'))
-            }
-            
-            related_persons.append(person_data)
-        
-        # Build the startup document
-        startup = {
-            'accession_number': accession,
-            'company': {
-                'name': clean_value(row.get('ENTITYNAME')),
-                'address': {
-                    'street1': clean_value(row.get('STREET1')),
-                    'street2': clean_value(row.get('STREET2')),
-                    'city': clean_value(row.get('CITY')),
-                    'state': clean_value(row.get('STATEORCOUNTRY')),
-                    'zip': clean_value(row.get('ZIPCODE')),
-                    'phone': clean_value(row.get('ISSUERPHONENUMBER'))
-                },
-                'entity_type': clean_value(row.get('ENTITYTYPE')),
-                'year_incorporated': clean_int(row.get('YEAROFINC_VALUE_ENTERED')),
-                'industry': clean_value(row.get('INDUSTRYGROUPTYPE'))
-            },
-            'funding': {
-                'total_offering_amount': clean_float(row.get('TOTALOFFERINGAMOUNT')),
-                'total_amount_sold': clean_float(row.get('TOTALAMOUNTSOLD')),
-                'total_remaining': clean_float(row.get('TOTALREMAINING')),
-                'number_of_investors': clean_int(row.get('TOTALNUMBERALREADYINVESTED')),
-                'date_of_first_sale': clean_value(row.get('SALE_DATE'))
-            },
-            'filing': {
-                'date_filed': clean_value(row.get('FILING_DATE')),
-                'submission_type': clean_value(row.get('SUBMISSIONTYPE')),
-                'is_amendment': clean_value(row.get('ISAMENDMENT')) == 'Y'
-            },
-            'related_persons': related_persons,
-            'metadata': {
-                'added_to_database': datetime.now().isoformat(),
-                'source_directory': directory,
-                'prediction_scores': {
-                    'international_hiring': None,
-                    'recent_grad_hiring': None
-                }
+        document['filing']['is_amendment'] = amendment
+        document['metadata'] = {
+            'added_to_database': added_to_database,
+            'source_directory': directory,
+            'prediction_scores': {
+                'international_hiring': None,
+                'recent_grad_hiring': None
             }
         }
         
-        startups.append(startup)
+        startups.append(document)
     
     print(f"   Processing {len(target_companies)}/{len(target_companies)}... Done!")
     
@@ -272,30 +187,6 @@ def create_startups_json(directory='.'):
     
     return output
 
-def clean_value(val):
-    """Clean pandas values - convert NaN to None"""
-    if pd.isna(val):
-        return None
-    return str(val).strip() if val else None
-
-def clean_float(val):
-    """Convert to float, handle NaN"""
-    if pd.isna(val):
-        return None
-    try:
-        return float(val)
-    except:
-        return None
-
-def clean_int(val):
-    """Convert to int, handle NaN"""
-    if pd.isna(val):
-        return None
-    try:
-        return int(float(val))
-    except:
-        return None
-
 def main():
     parser = argparse.ArgumentParser(
         description='Parse SEC Form D data into MongoDB-ready JSON',
@@ -308,6 +199,9 @@ Examples:
   # Specify a directory
   python3 sec_form_d.py /path/to/2025Q1_d
   python3 sec_form_d.py ./2025Q1_d
+  
+  # Read the SEC ZIP archive directly (no extraction needed)
+  python3 sec_form_d.py ./2025Q1_d.zip
         """
     )
     
@@ -315,7 +209,17 @@ Examples:
         'directory',
         nargs='?',
         default='.',
-        help='Directory containing TSV files (default: current directory)'
+        help='Directory or *_d.zip archive containing TSV files (default: current directory)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default='.sec_cache',
+        help='Directory for cached parsed TSV tables (default: .sec_cache)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always parse the TSV files'
     )
     
     args = parser.parse_args()
@@ -324,7 +228,7 @@ Examples:
     print("SEC Form D → MongoDB JSON Converter")
     print("=" * 60)
     
-    result = create_startups_json(args.directory)
+    result = create_startups_json(args.directory, None if args.no_cache else args.cache_dir)
     
     if result:
         print("\n" + "=" * 60)
@@ -0,0 +1,274 @@
+"""
+sec_fuzzy.py - Near-duplicate company detection for sec_unique.py
+
+Exact dedup misses issuers that differ only by "Inc." vs "Inc" or "Street" vs "St".
+Comparing every pair of companies is O(n^2), so candidate pairs come from two cheap
+sources instead:
+
+  * blocking - companies sharing a phone number, or a ZIP code and first name token
+  * MinHash/LSH - signatures over name 3-grams and address tokens, bucketed by band,
+    so companies with similar names and addresses land in the same bucket
+
+Each candidate pair is then scored on the exact shingle sets, and pairs at or above
+the threshold are joined into duplicate clusters with union-find.
+"""
+
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+# Legal-form tokens that don't distinguish one issuer from another
+LEGAL_SUFFIXES = {
+    'inc', 'incorporated', 'llc', 'pllc', 'corp', 'corporation', 'co', 'company',
+    'ltd', 'limited', 'lp', 'llp', 'lllp', 'plc', 'pc', 'the'
+}
+
+ADDRESS_ABBREVIATIONS = {
+    'street': 'st', 'avenue': 'ave', 'av': 'ave', 'road': 'rd', 'boulevard': 'blvd',
+    'drive': 'dr', 'lane': 'ln', 'place': 'pl', 'court': 'ct', 'parkway': 'pkwy',
+    'highway': 'hwy', 'square': 'sq', 'circle': 'cir', 'terrace': 'ter', 'center': 'ctr',
+    'centre': 'ctr', 'suite': 'ste', 'floor': 'fl', 'building': 'bldg', 'apartment': 'apt',
+    'north': 'n', 'south': 's', 'east': 'e', 'west': 'w'
+}
+
+# Tokens that tell sibling entities apart ("Fund II" vs "Fund III", "Series 2024")
+_DISTINGUISHING_TOKEN = re.compile(r'^(\d+|[ivx]{1,5})$')
+
+NUM_PERM = 32          # MinHash permutations per signature
+LSH_BANDS = 8          # NUM_PERM / LSH_BANDS rows per band
+MAX_BUCKET_SIZE = 50   # Larger buckets/blocks are too common to mean anything
+MINHASH_SEED = 1
+MINHASH_BATCH = 2048
+MERSENNE_PRIME = (1 << 31) - 1
+
+DEFAULT_THRESHOLD = 0.9
+MIN_NAME_SIMILARITY = 0.5
+
+# Weights of the similarity components (re-normalized when a component is missing)
+NAME_WEIGHT = 0.6
+ADDRESS_WEIGHT = 0.3
+PHONE_WEIGHT = 0.1
+
+
+def _tokens(value):
+    """Lowercase word tokens; dots are dropped so L.L.C. -> llc, other punctuation splits"""
+    if not value:
+        return []
+    text = str(value).lower().replace('&', ' and ').replace('.', '').replace("'", '')
+    return re.findall(r'[a-z0-9]+', text)
+
+
+def normalize_name(name):
+    """Company name without punctuation or legal-form suffixes"""
+    return ' '.join(token for token in _tokens(name) if token not in LEGAL_SUFFIXES)
+
+
+def normalize_address(address):
+    """Street/city tokens with the usual USPS abbreviations applied"""
+    parts = [address.get('street1'), address.get('street2'), address.get('city'), address.get('state')]
+    return [ADDRESS_ABBREVIATIONS.get(t, t) for part in parts for t in _tokens(part)]
+
+
+def name_shingles(normalized_name, size=3):
+    """Character n-grams of a normalized name (the whole name if it is shorter)"""
+    text = f" {normalized_name} "
+    if len(normalized_name) < size:
+        return {normalized_name} if normalized_name else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def company_features(company_entry):
+    """Everything the fuzzy matcher needs from one company document"""
+    company = company_entry.get('company') or {}
+    address = company.get('address') or {}
+
+    name = normalize_name(company.get('name'))
+    address_tokens = frozenset(normalize_address(address))
+    phone = re.sub(r'\D', '', str(address.get('phone') or ''))[-10:]
+    zipcode = re.sub(r'\D', '', str(address.get('zip') or ''))[:5]
+
+    return {
+        'name': name,
+        'name_shingles': frozenset(name_shingles(name)),
+        'address_tokens': address_tokens,
+        'address_numbers': frozenset(t for t in address_tokens if t.isdigit()),
+        'distinguishing': frozenset(t for t in name.split() if _DISTINGUISHING_TOKEN.match(t)),
+        'phone': phone if len(phone) >= 7 else '',
+        'zip': zipcode
+    }
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def similarity(a, b):
+    """
+    Confidence that two companies are the same issuer, from 0 to 1, or 0 when the
+    names are too different or carry different fund/series numbers.
+    """
+    if a['distinguishing'] != b['distinguishing']:
+        return 0.0
+
+    name_score = 1.0 if a['name'] and a['name'] == b['name'] else _jaccard(a['name_shingles'], b['name_shingles'])
+    if name_score < MIN_NAME_SIMILARITY:
+        return 0.0
+
+    weighted = NAME_WEIGHT * name_score
+    total_weight = NAME_WEIGHT
+    if a['address_tokens'] and b['address_tokens']:
+        # Different street numbers mean different addresses, however similar the rest
+        numbers_a, numbers_b = a['address_numbers'], b['address_numbers']
+        if numbers_a and numbers_b and numbers_a != numbers_b:
+            address_score = 0.0
+        else:
+            address_score = _jaccard(a['address_tokens'], b['address_tokens'])
+        weighted += ADDRESS_WEIGHT * address_score
+        total_weight += ADDRESS_WEIGHT
+    if a['phone'] and b['phone']:
+        weighted += PHONE_WEIGHT * (a['phone'] == b['phone'])
+        total_weight += PHONE_WEIGHT
+    return weighted / total_weight
+
+
+def minhash_signatures(features, num_perm=NUM_PERM, seed=MINHASH_SEED):
+    """
+    (n, num_perm) uint32 MinHash signatures over name 3-grams plus address tokens.
+    Shingles are hashed with CRC32 and permuted with (a*x + b) mod p in numpy batches.
+    Rows of companies with no shingles stay at the maximum value.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+    b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    signatures = np.full((len(features), num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+    for start in range(0, len(features), MINHASH_BATCH):
+        shingle_lists = [
+            [s.encode('utf-8') for s in f['name_shingles']] + [('a:' + t).encode('utf-8') for t in f['address_tokens']]
+            for f in features[start:start + MINHASH_BATCH]
+        ]
+        lengths = np.array([len(shingles) for shingles in shingle_lists])
+        rows = np.flatnonzero(lengths) + start
+        if not len(rows):
+            continue
+
+        hashes = np.fromiter(
+            (zlib.crc32(s) for shingles in shingle_lists for s in shingles),
+            dtype=np.uint64, count=int(lengths.sum())
+        )
+        permuted = (hashes[:, None] * a + b) % MERSENNE_PRIME
+        offsets = np.concatenate(([0], np.cumsum(lengths[lengths > 0])[:-1]))
+        signatures[rows] = np.minimum.reduceat(permuted, offsets, axis=0).astype(np.uint32)
+
+    return signatures
+
+
+def _bucket_pairs(keys, rows, pairs, max_bucket_size):
+    """Add every pair of rows that share a key (buckets above max_bucket_size are skipped)"""
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    boundaries = np.flatnonzero(np.diff(sorted_keys)) + 1
+    for bucket in np.split(order, boundaries):
+        if 2 <= len(bucket) <= max_bucket_size:
+            members = sorted(rows[bucket].tolist())
+            for i, first in enumerate(members):
+                for second in members[i + 1:]:
+                    pairs.add((first, second))
+
+
+def lsh_candidate_pairs(signatures, bands=LSH_BANDS, max_bucket_size=MAX_BUCKET_SIZE):
+    """Pairs of rows whose signatures agree on every row of at least one band"""
+    pairs = set()
+    has_shingles = signatures[:, 0] != np.iinfo(np.uint32).max
+    rows = np.flatnonzero(has_shingles)
+    band_rows = signatures.shape[1] // bands
+
+    for band in range(bands):
+        block = signatures[rows, band * band_rows:(band + 1) * band_rows].astype(np.uint64)
+        # Mix the band's values into one 64-bit key (wrapping multiply); collisions
+        # only add candidates, which are scored exactly afterwards
+        keys = block[:, 0].copy()
+        for column in range(1, band_rows):
+            keys = keys * np.uint64(0x9E3779B97F4A7C15) ^ block[:, column]
+        _bucket_pairs(keys, rows, pairs, max_bucket_size)
+
+    return pairs
+
+
+def block_candidate_pairs(features, max_block_size=MAX_BUCKET_SIZE):
+    """Pairs sharing a phone number, or a ZIP code and first name token"""
+    blocks = defaultdict(list)
+    for index, f in enumerate(features):
+        if f['phone']:
+            blocks[('phone', f['phone'])].append(index)
+        if f['zip'] and f['name']:
+            blocks[('zip', f['zip'], f['name'].split()[0])].append(index)
+
+    pairs = set()
+    for members in blocks.values():
+        if 2 <= len(members) <= max_block_size:
+            for i, first in enumerate(members):
+                for second in members[i + 1:]:
+                    pairs.add((first, second))
+    return pairs
+
+
+def find_duplicate_clusters(features, threshold=DEFAULT_THRESHOLD):
+    """
+    Group near-duplicate companies.
+
+    Returns clusters sorted by their first member, each a dict with:
+      members    - row indices into features, in input order (the first is the one to keep)
+      scores     - row index -> best confidence linking that member into the cluster
+      confidence - weakest link that holds the cluster together
+    plus the number of candidate pairs that were scored.
+    """
+    candidates = block_candidate_pairs(features) | lsh_candidate_pairs(minhash_signatures(features))
+
+    parent = {}
+
+    def find(i):
+        root = i
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while parent.get(i, i) != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    edges = []
+    for first, second in candidates:
+        score = similarity(features[first], features[second])
+        if score >= threshold:
+            edges.append((score, first, second))
+
+    # Strongest links first, so each cluster's weakest link is its confidence
+    best = {}
+    weakest = {}
+    for score, first, second in sorted(edges, reverse=True):
+        best[first] = max(best.get(first, 0.0), score)
+        best[second] = max(best.get(second, 0.0), score)
+        root_a, root_b = find(first), find(second)
+        if root_a == root_b:
+            continue
+        root = min(root_a, root_b)
+        other = root_b if root == root_a else root_a
+        parent[other] = root
+        weakest[root] = min(score, weakest.get(root, score), weakest.pop(other, score))
+
+    members = defaultdict(list)
+    for index in best:
+        members[find(index)].append(index)
+
+    clusters = []
+    for root in sorted(members):
+        indices = sorted(members[root])
+        clusters.append({
+            'members': indices,
+            'scores': {i: round(best[i], 4) for i in indices},
+            'confidence': round(weakest[root], 4)
+        })
+    return clusters, len(candidates)
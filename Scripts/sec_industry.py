@@ -0,0 +1,126 @@
+"""
+sec_industry.py - Keyword classification of SEC industry group names
+Used by sec_filter.py, sec_form_d.py and sec_stats.py
+
+INDUSTRYGROUPTYPE only has a few dozen distinct values, so an IndustryClassifier
+compiles its keyword lists into one regex each and remembers the verdict for every
+distinct industry string it sees. Classifying a column of millions of rows only runs
+the keyword matching once per distinct value.
+"""
+
+import re
+
+import pandas as pd
+
+# Category tags, checked in order - an industry's category is its first matching tag
+# (so 'Health Insurance' is health and 'Commercial Banking' is financial services)
+INDUSTRY_CATEGORIES = {
+    'health': ['biotechnology', 'pharmaceutical', 'health', 'medical', 'hospital', 'physician'],
+    'technology': ['computer', 'software', 'internet', 'telecommunications', 'technology'],
+    'financial_services': ['bank', 'insurance', 'investing', 'lending', 'financial services'],
+    'investment_fund': ['pooled investment', 'hedge fund', 'private equity', 'investment fund',
+                        'venture capital'],
+    'real_estate': ['real estate', 'realty', 'property', 'reit', 'residential', 'commercial'],
+    'energy': ['oil', 'gas', 'petroleum', 'energy', 'coal', 'electric utilities'],
+    'agriculture': ['agriculture', 'farming', 'agribusiness'],
+    'retail_hospitality': ['retail', 'store', 'shopping', 'restaurant', 'food service', 'hospitality',
+                           'lodging', 'travel', 'tourism', 'airline'],
+    'construction': ['construction', 'contractor', 'building'],
+    'industrial': ['manufacturing', 'business services', 'environmental services']
+}
+
+
+def _matcher(keywords, match):
+    """
+    Compile a keyword list into one test: a set lookup of the raw names for exact
+    matching, or a single alternation regex over lowercased text for substrings.
+    Returns None for an empty list.
+    """
+    if match == 'exact':
+        # Same as the pandas isin() it replaces: case-sensitive, nothing stripped
+        names = {k for k in keywords if k}
+        return names.__contains__ if names else None
+    keywords = sorted({k.strip().lower() for k in keywords if k and k.strip()}, key=len, reverse=True)
+    if not keywords:
+        return None
+    pattern = re.compile('|'.join(re.escape(k) for k in keywords))
+    return lambda text: pattern.search(text) is not None
+
+
+class IndustryClassifier:
+    """
+    Include / exclude keyword lists plus category tags over industry names.
+
+    match='substring' (default) matches keywords anywhere in the lowercased industry;
+    match='exact' compares whole names exactly as given. An empty industry is never
+    excluded, but fails a non-empty include list.
+    """
+
+    def __init__(self, include=(), exclude=(), categories=None, match='substring'):
+        if match not in ('substring', 'exact'):
+            raise ValueError(f"match must be 'substring' or 'exact', not {match!r}")
+        self.match = match
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        self.categories = dict(INDUSTRY_CATEGORIES if categories is None else categories)
+
+        self._include = _matcher(self.include, match)
+        self._exclude = _matcher(self.exclude, match)
+        self._tags = [(tag, _matcher(keywords, 'substring')) for tag, keywords in self.categories.items()]
+
+        # industry string -> (allowed, excluded, tags)
+        self._verdicts = {}
+
+    def classify(self, industry):
+        """(allowed, excluded, tags) for one industry name, computed once per distinct value"""
+        verdict = self._verdicts.get(industry)
+        if verdict is not None:
+            return verdict
+
+        text = industry.strip().lower() if isinstance(industry, str) else ''
+        key = (industry if isinstance(industry, str) else '') if self.match == 'exact' else text
+        included = self._include is None or (bool(text) and self._include(key))
+        excluded = bool(text) and self._exclude is not None and self._exclude(key)
+        tags = tuple(tag for tag, matches in self._tags if text and matches is not None and matches(text))
+
+        verdict = (included and not excluded, excluded, tags)
+        self._verdicts[industry] = verdict
+        return verdict
+
+    def allows(self, industry):
+        """True if the industry passes the include list and isn't excluded"""
+        return self.classify(industry)[0]
+
+    def is_excluded(self, industry):
+        """True if the industry matches the exclude list"""
+        return self.classify(industry)[1]
+
+    def tags(self, industry):
+        """Every category tag the industry matches, in INDUSTRY_CATEGORIES order"""
+        return self.classify(industry)[2]
+
+    def category(self, industry):
+        """First matching category tag, or None"""
+        tags = self.tags(industry)
+        return tags[0] if tags else None
+
+    def _map_distinct(self, series, function):
+        """Apply function once per distinct value of a column and broadcast the results"""
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            values = series.cat.categories
+        else:
+            values = pd.unique(series.to_numpy(dtype=object, na_value=None))
+        lookup = {value: function(value) for value in values}
+        return series.map(lookup)
+
+    def allowed_mask(self, series):
+        """Boolean mask of the industries allows() accepts"""
+        return self._map_distinct(series, self.allows).fillna(self.allows(None)).astype(bool)
+
+    def excluded_mask(self, series):
+        """Boolean mask of the industries is_excluded() flags"""
+        return self._map_distinct(series, self.is_excluded).fillna(False).astype(bool)
+
+    def category_series(self, series):
+        """First category tag for every row (missing where no tag matches)"""
+        return self._map_distinct(series, self.category).astype('category')
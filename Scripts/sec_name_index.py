@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+sec_name_index.py - Inverted index over company and executive names
+Usage: python sec_name_index.py build startups_master.json [more.json ...] [--index sec_names.idx]
+       python sec_name_index.py search "acme robot*" [--field all|company|person] [--index sec_names.idx] [--limit 20]
+
+Indexes company.name and every related_persons[].name from master or quarterly
+output. Names are case-folded and split into words; company names first lose their
+legal/corporate suffixes with the COMPANY_SUFFIXES rules of sec_domain_inference.py,
+so "Acme Robotics, Inc." is indexed as "acme robotics". The stripped suffix words
+go in a posting list of their own. A query drops its trailing suffix words the same
+way ("acme inc" is just "acme"), but the words it keeps search both lists, so
+"acme tech*" still finds "Acme Tech LLC". A query matches when every term matches (words ending in * match as prefixes),
+and a person query has to match one person - "john chen" won't pair John Patel with
+Li Chen.
+
+The index is one file of sorted term tables and posting lists that is opened with
+mmap: a search binary-searches the terms in place and reads only the posting lists
+it needs, then returns accession numbers - the master is never parsed.
+"""
+
+import argparse
+import json
+import mmap
+import re
+import struct
+import sys
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from sec_domain_inference import clean_company_name
+from sec_stream import read_companies
+
+DEFAULT_INDEX = 'sec_names.idx'
+FIELDS = ('company', 'person')
+# Posting lists in the file: the searchable fields plus the stripped company suffix words
+SECTIONS = FIELDS + ('suffix',)
+
+MAGIC = b'SECNAMES'
+VERSION = 2
+HEADER = struct.Struct('<8sII')  # magic, version, length of the JSON section table
+
+# The same steps clean_company_name takes, minus the suffix rules
+_SPECIAL_CHARACTERS = re.compile(r'[^\w\s-]')
+_TOKEN_SEPARATORS = re.compile(r'[\s_-]+')
+
+
+def name_tokens(text) -> List[str]:
+    """Case-folded words of a person name (or any text)"""
+    if not text:
+        return []
+    cleaned = _SPECIAL_CHARACTERS.sub('', str(text).lower())
+    return [token for token in _TOKEN_SEPARATORS.split(cleaned) if token]
+
+
+def company_tokens(name) -> List[str]:
+    """Words of a company name after its trailing suffixes are stripped"""
+    return [token for token in clean_company_name(name).split('-') if token] if name else []
+
+
+def suffix_tokens(name) -> List[str]:
+    """The trailing words of a company name that company_tokens strips"""
+    return name_tokens(name)[len(company_tokens(name)):]
+
+
+def query_terms(query: str, field: str) -> List[Tuple[str, bool]]:
+    """
+    (term, is_prefix) pairs for a query, tokenized like the field it searches.
+    A word ending in * is a prefix; for company queries, trailing suffix words after
+    the last prefix are dropped just as they were at indexing time.
+
+    >>> query_terms('epsilon co*', 'company')
+    [('epsilon', False), ('co', True)]
+    >>> query_terms('acme tech holdings', 'company')
+    [('acme', False)]
+    """
+    terms = []
+    for word in query.split():
+        tokens = name_tokens(word.rstrip('*'))
+        terms.extend((token, word.endswith('*') and i == len(tokens) - 1) for i, token in enumerate(tokens))
+    if field == 'company':
+        # Suffix stripping only removes whole trailing words, and never a prefix the
+        # user typed ("acme tech*" must not become "acme")
+        keep = len(company_tokens(query.replace('*', '')))
+        for i, (_, is_prefix) in enumerate(terms):
+            if is_prefix:
+                keep = max(keep, i + 1)
+        terms = terms[:keep]
+    return terms
+
+
+def _sorted_terms(postings: Dict[str, List[int]]) -> List[Tuple[bytes, List[int]]]:
+    # UTF-8 byte order is code point order, so the reader can compare raw bytes
+    return sorted((term.encode('utf-8'), ids) for term, ids in postings.items())
+
+
+def _blob(items: List[bytes]) -> Tuple[np.ndarray, bytes]:
+    """Offsets (n + 1 entries) into the concatenated items"""
+    offsets = np.zeros(len(items) + 1, dtype='<u4')
+    if items:
+        offsets[1:] = np.cumsum([len(item) for item in items])
+    return offsets, b''.join(items)
+
+
+def build_name_index(companies: Iterable[Dict], path=DEFAULT_INDEX) -> Dict[str, int]:
+    """
+    Index company and person names of companies and write the index file.
+    An accession number seen again (quarterly files overlap) adds its names to the
+    same document. Returns counts for the summary.
+    """
+    doc_ids = {}
+    accession_numbers = []
+    postings = {field: {} for field in SECTIONS}
+    person_docs = []
+    doc_persons = []  # per document, the person names already indexed
+
+    for company_data in companies:
+        accession_number = company_data.get('accession_number')
+        if not accession_number:
+            continue
+        doc_id = doc_ids.get(accession_number)
+        if doc_id is None:
+            doc_id = doc_ids[accession_number] = len(accession_numbers)
+            accession_numbers.append(accession_number)
+            doc_persons.append(set())
+
+        name = (company_data.get('company') or {}).get('name')
+        for field, tokens in (('company', company_tokens(name)), ('suffix', suffix_tokens(name) if name else [])):
+            field_postings = postings[field]
+            for token in tokens:
+                ids = field_postings.setdefault(token, [])
+                if not ids or ids[-1] != doc_id:
+                    ids.append(doc_id)
+
+        person_postings = postings['person']
+        for person in company_data.get('related_persons') or []:
+            tokens = name_tokens(person.get('name'))
+            if not tokens or tuple(tokens) in doc_persons[doc_id]:
+                continue
+            doc_persons[doc_id].add(tuple(tokens))
+            person_id = len(person_docs)
+            person_docs.append(doc_id)
+            for token in tokens:
+                ids = person_postings.setdefault(token, [])
+                if not ids or ids[-1] != person_id:
+                    ids.append(person_id)
+
+    # Section name -> bytes, written in this order (arrays 4-byte aligned)
+    sections = {}
+    sections['doc_offsets'], sections['docs'] = _blob([a.encode('utf-8') for a in accession_numbers])
+    for field in SECTIONS:
+        entries = _sorted_terms(postings[field])
+        # A document can repeat across quarters, so ids aren't always ascending
+        lists = [np.unique(np.array(ids, dtype='<u4')) for _, ids in entries]
+        sections[f'{field}_term_offsets'], sections[f'{field}_terms'] = _blob([term for term, _ in entries])
+        sections[f'{field}_posting_offsets'], _ = _blob([ids.tobytes() for ids in lists])
+        sections[f'{field}_postings'] = np.concatenate(lists).astype('<u4') if lists else np.zeros(0, dtype='<u4')
+    sections['person_docs'] = np.array(person_docs, dtype='<u4')
+
+    table = {}
+    position = 0
+    chunks = []
+    for name, data in sections.items():
+        data = data.tobytes() if isinstance(data, np.ndarray) else data
+        padding = -len(data) % 4
+        table[name] = [position, len(data)]
+        chunks.append(data + b'\0' * padding)
+        position += len(data) + padding
+
+    table_bytes = json.dumps(table).encode('utf-8')
+    table_bytes += b' ' * (-(HEADER.size + len(table_bytes)) % 4)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(table_bytes)))
+        f.write(table_bytes)
+        for chunk in chunks:
+            f.write(chunk)
+
+    return {
+        'documents': len(accession_numbers),
+        'persons': len(person_docs),
+        'company_terms': len(postings['company']),
+        'person_terms': len(postings['person'])
+    }
+
+
+class NameIndex:
+    """
+    Read-only view of an index file through mmap. Nothing is loaded up front:
+    term tables and posting lists are numpy views into the mapping.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX):
+        self.path = str(path)
+        self._file = open(self.path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, table_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a version {VERSION} name index")
+        self._base = HEADER.size + table_length
+        self._table = json.loads(self._map[HEADER.size:self._base])
+
+        self._doc_offsets = self._array('doc_offsets')
+        self._person_docs = self._array('person_docs')
+        self.document_count = len(self._doc_offsets) - 1
+
+    def _array(self, name: str) -> np.ndarray:
+        offset, length = self._table[name]
+        return np.frombuffer(self._map, dtype='<u4', count=length // 4, offset=self._base + offset)
+
+    def _bytes(self, name: str, start: int, end: int) -> bytes:
+        offset = self._base + self._table[name][0]
+        return self._map[offset + start:offset + end]
+
+    def accession_number(self, doc_id: int) -> str:
+        return self._bytes('docs', int(self._doc_offsets[doc_id]), int(self._doc_offsets[doc_id + 1])).decode('utf-8')
+
+    def _term_range(self, field: str, term: str, prefix: bool) -> Tuple[int, int]:
+        """Indexes [lo, hi) of the terms equal to term (or starting with it)"""
+        offsets = self._array(f'{field}_term_offsets')
+        key = lambda i: self._bytes(f'{field}_terms', int(offsets[i]), int(offsets[i + 1]))
+        target = term.encode('utf-8')
+        count = len(offsets) - 1
+        lo = bisect_left(range(count), target, key=key)
+        if prefix:
+            # 0xff never occurs in UTF-8, so this sorts after every extension of target
+            return lo, bisect_left(range(count), target + b'\xff', lo=lo, key=key)
+        return lo, lo + 1 if lo < count and key(lo) == target else lo
+
+    def _postings(self, field: str, term: str, prefix: bool) -> np.ndarray:
+        """Ascending ids (documents, or persons for the person field) matching one term"""
+        lo, hi = self._term_range(field, term, prefix)
+        if lo == hi:
+            return np.zeros(0, dtype='<u4')
+        posting_offsets = self._array(f'{field}_posting_offsets')
+        start, end = int(posting_offsets[lo]) // 4, int(posting_offsets[hi]) // 4
+        postings = self._array(f'{field}_postings')[start:end]
+        # Copy rather than hand out views, so the mapping can be closed
+        return postings.copy() if hi - lo == 1 else np.unique(postings)
+
+    def _field_documents(self, field: str, terms: List[Tuple[str, bool]]) -> np.ndarray:
+        matches = None
+        for term, prefix in terms:
+            ids = self._postings(field, term, prefix)
+            if field == 'company':
+                # query_terms already dropped the query's own trailing suffix words, so
+                # what's left may name a word the index stripped ("acme tech*")
+                ids = np.union1d(ids, self._postings('suffix', term, prefix))
+            matches = ids if matches is None else np.intersect1d(matches, ids, assume_unique=True)
+            if not len(matches):
+                break
+        if matches is None:
+            return np.zeros(0, dtype='<u4')
+        return np.unique(self._person_docs[matches]) if field == 'person' else matches
+
+    def search_ids(self, query: str, field: str = 'all') -> np.ndarray:
+        """Document ids (in master order) whose names match every term of query"""
+        fields = FIELDS if field == 'all' else (field,)
+        found = [self._field_documents(f, query_terms(query, f)) for f in fields]
+        return found[0] if len(found) == 1 else np.union1d(*found)
+
+    def search(self, query: str, field: str = 'all', limit: Optional[int] = None) -> List[str]:
+        """Accession numbers of the companies matching query, in master order"""
+        ids = self.search_ids(query, field)
+        if limit:
+            ids = ids[:limit]
+        return [self.accession_number(int(doc_id)) for doc_id in ids]
+
+    def close(self):
+        # Drop the numpy views before unmapping
+        self._doc_offsets = self._person_docs = None
+        self._map.close()
+        self._file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or search the company/executive name index')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='Index master or quarterly files (JSON or JSONL)')
+    build.add_argument('inputs', nargs='+', help='Company files, indexed in order')
+    build.add_argument('--index', default=DEFAULT_INDEX, help=f'Index file to write (default: {DEFAULT_INDEX})')
+
+    search = commands.add_parser('search', help='Print accession numbers of matching companies')
+    search.add_argument('query', help='Name words; end a word with * to match it as a prefix')
+    search.add_argument('--field', choices=('all',) + FIELDS, default='all', help='Names to search (default: all)')
+    search.add_argument('--index', default=DEFAULT_INDEX, help=f'Index file (default: {DEFAULT_INDEX})')
+    search.add_argument('--limit', type=int, default=0, help='Most results to print (0 = all)')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        started = time.time()
+
+        def all_companies():
+            for input_file in args.inputs:
+                print(f"Reading {input_file}...")
+                _, companies = read_companies(input_file)
+                yield from companies
+
+        try:
+            counts = build_name_index(all_companies(), args.index)
+        except FileNotFoundError as e:
+            print(f"❌ Error: Could not find '{e.filename}'")
+            sys.exit(1)
+        print(f"✅ Indexed {counts['documents']:,} companies and {counts['persons']:,} people "
+              f"({counts['company_terms']:,} company terms, {counts['person_terms']:,} person terms) "
+              f"in {time.time() - started:.1f}s → {args.index}")
+        return
+
+    try:
+        index = NameIndex(args.index)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    started = time.perf_counter()
+    ids = index.search_ids(args.query, args.field)
+    shown = ids[:args.limit] if args.limit else ids
+    for doc_id in shown:
+        print(index.accession_number(int(doc_id)))
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"# {len(ids):,} matches for {args.query!r} ({elapsed:.2f} ms)", file=sys.stderr)
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+sec_person_graph.py - Link executives across filings and find connected companies
+Usage: python sec_person_graph.py startups_master.json [more.json ...] [--report serial_executives.csv]
+                                  [--min-companies 2] [--company ACCESSION_NUMBER [--hops 2]]
+                                  [--person "First Last"]
+
+related_persons is rebuilt for every filing, so the same founder or board member
+shows up as unrelated entries under each company. Here every person gets an id:
+the 64-bit digest (as in sec_dedup_index.py) of their normalized first name, last
+name, city and state. One pass over the companies then fills two adjacency lists -
+person -> companies and company -> officers - so construction is linear in the
+number of person entries and no person is ever compared with another.
+
+  --report   people who appear at --min-companies or more companies (serial founders,
+             board members) - the strongest sponsorship leads - as a CSV; written by
+             default only when neither --company nor --person is given
+  --company  companies within --hops of one company; one hop is a shared officer
+  --person   the companies of everyone with that first and last name
+"""
+
+import argparse
+import csv
+import re
+import sys
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sec_dedup_index import key_digest
+from sec_stream import read_companies
+
+DEFAULT_HOPS = 2
+DEFAULT_MIN_COMPANIES = 2
+DEFAULT_REPORT = 'serial_executives.csv'
+
+# Names, cities and states repeat across filings
+NAME_CACHE_SIZE = 1 << 16
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+REPORT_FIELDNAMES = [
+    'Person_Id', 'Name', 'City', 'State', 'Companies', 'Relationships', 'Accession_Numbers', 'Company_Names'
+]
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def normalize_part(value) -> str:
+    """Case-folded words of a name/place field, punctuation dropped ("O'Neil" -> "o neil")"""
+    if not value:
+        return ''
+    return ' '.join(_NON_WORD.sub(' ', str(value).lower()).split())
+
+
+def person_key(person: Dict) -> Optional[Tuple[str, str, str, str]]:
+    """
+    Normalized (first, last, city, state) for a related person, or None without a name.
+    Falls back to the first and last word of the full name when the parts are missing.
+    """
+    first = normalize_part(person.get('first_name'))
+    last = normalize_part(person.get('last_name'))
+    if not first and not last:
+        words = normalize_part(person.get('name')).split()
+        if not words:
+            return None
+        first, last = words[0], words[-1] if len(words) > 1 else ''
+    return (first, last, normalize_part(person.get('city')), normalize_part(person.get('state')))
+
+
+def format_person_id(digest: int) -> str:
+    """A person key digest as 16 hex digits"""
+    return f"{digest & 0xFFFFFFFFFFFFFFFF:016x}"
+
+
+def person_id(person: Dict) -> Optional[str]:
+    """Stable id for a related person across filings, or None without a name"""
+    key = person_key(person)
+    return None if key is None else format_person_id(key_digest(key))
+
+
+class PersonGraph:
+    """
+    Bipartite person <-> company adjacency lists over dense integer ids.
+    Companies are numbered in first-seen order; an accession number seen again
+    (quarterly files overlap) adds its officers to the same company.
+    """
+
+    def __init__(self):
+        self.accession_numbers: List[str] = []
+        self.company_names: List[str] = []
+        self.company_persons: List[List[int]] = []
+        self.person_ids: List[str] = []
+        self.person_names: List[str] = []
+        self.person_places: List[Tuple[str, str]] = []
+        self.person_companies: List[List[int]] = []
+        self.person_relationships: List[set] = []
+        self._companies: Dict[str, int] = {}
+        self._persons: Dict[int, int] = {}
+        self._names: Dict[Tuple[str, str], List[int]] = {}
+
+    def add_company(self, company_data: Dict):
+        accession_number = company_data.get('accession_number')
+        if not accession_number:
+            return
+        company = self._companies.get(accession_number)
+        if company is None:
+            company = self._companies[accession_number] = len(self.accession_numbers)
+            self.accession_numbers.append(accession_number)
+            self.company_names.append((company_data.get('company') or {}).get('name') or '')
+            self.company_persons.append([])
+
+        officers = self.company_persons[company]
+        for person in company_data.get('related_persons') or []:
+            key = person_key(person)
+            if key is None:
+                continue
+            digest = key_digest(key)
+            dense = self._persons.get(digest)
+            if dense is None:
+                dense = self._persons[digest] = len(self.person_ids)
+                self.person_ids.append(format_person_id(digest))
+                self.person_names.append(person.get('name') or ' '.join(filter(None, key[:2])))
+                self.person_places.append((person.get('city') or '', person.get('state') or ''))
+                self.person_companies.append([])
+                self.person_relationships.append(set())
+                self._names.setdefault(key[:2], []).append(dense)
+            self.person_relationships[dense].update(person.get('relationships') or [])
+            # The same filing can be loaded again from another quarter's file
+            if dense not in officers:
+                officers.append(dense)
+                self.person_companies[dense].append(company)
+
+    @classmethod
+    def build(cls, companies: Iterable[Dict]) -> 'PersonGraph':
+        graph = cls()
+        for company_data in companies:
+            graph.add_company(company_data)
+        return graph
+
+    def company(self, accession_number: str) -> Optional[int]:
+        return self._companies.get(accession_number)
+
+    def connected_companies(self, company: int, max_hops: int = DEFAULT_HOPS) -> List[Tuple[int, int, int, int]]:
+        """
+        Companies within max_hops of company, nearest first, as
+        (company, hops, previous company, shared person) - one hop is a shared officer.
+        Every person's company list is expanded at most once.
+        """
+        found = {company: 0}
+        expanded = set()
+        results = []
+        frontier = [company]
+        for hops in range(1, max_hops + 1):
+            next_frontier = []
+            for current in frontier:
+                for person in self.company_persons[current]:
+                    if person in expanded:
+                        continue
+                    expanded.add(person)
+                    for other in self.person_companies[person]:
+                        if other not in found:
+                            found[other] = hops
+                            results.append((other, hops, current, person))
+                            next_frontier.append(other)
+            frontier = next_frontier
+        return results
+
+    def persons_named(self, name: str) -> List[int]:
+        """Every person (in any city) whose normalized first and last name match name's first and last words"""
+        words = normalize_part(name).split()
+        if not words:
+            return []
+        return list(self._names.get((words[0], words[-1] if len(words) > 1 else ''), []))
+
+    def serial_persons(self, min_companies: int = DEFAULT_MIN_COMPANIES) -> List[int]:
+        """People at min_companies or more companies, most companies first"""
+        serial = [dense for dense, companies in enumerate(self.person_companies) if len(companies) >= min_companies]
+        serial.sort(key=lambda dense: -len(self.person_companies[dense]))
+        return serial
+
+    def write_report(self, report_file: str, min_companies: int = DEFAULT_MIN_COMPANIES) -> int:
+        """CSV of serial_persons(min_companies); returns the number of people written"""
+        serial = self.serial_persons(min_companies)
+        with open(report_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDNAMES)
+            writer.writeheader()
+            for dense in serial:
+                companies = self.person_companies[dense]
+                city, state = self.person_places[dense]
+                writer.writerow({
+                    'Person_Id': self.person_ids[dense],
+                    'Name': self.person_names[dense],
+                    'City': city,
+                    'State': state,
+                    'Companies': len(companies),
+                    'Relationships': '; '.join(sorted(self.person_relationships[dense])),
+                    'Accession_Numbers': '; '.join(self.accession_numbers[c] for c in companies),
+                    'Company_Names': '; '.join(self.company_names[c] for c in companies)
+                })
+        return len(serial)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Link executives across filings and query connected companies')
+    parser.add_argument('inputs', nargs='+', help='Master or quarterly company files (JSON or JSONL)')
+    parser.add_argument('--report',
+                        help=f'CSV of people at several companies (default: {DEFAULT_REPORT}, '
+                             'written only when there is no --company/--person query)')
+    parser.add_argument('--min-companies', type=int, default=DEFAULT_MIN_COMPANIES,
+                        help=f'Companies a person needs for the report (default: {DEFAULT_MIN_COMPANIES})')
+    parser.add_argument('--company', metavar='ACCESSION_NUMBER', help='List companies connected to this one')
+    parser.add_argument('--hops', type=int, default=DEFAULT_HOPS, help=f'Hops for --company (default: {DEFAULT_HOPS})')
+    parser.add_argument('--person', metavar='NAME', help='List the companies of people with this first and last name')
+    args = parser.parse_args()
+
+    started = time.time()
+
+    def all_companies():
+        for input_file in args.inputs:
+            print(f"Reading {input_file}...")
+            _, companies = read_companies(input_file)
+            yield from companies
+
+    try:
+        graph = PersonGraph.build(all_companies())
+    except FileNotFoundError as e:
+        print(f"❌ Error: Could not find '{e.filename}'")
+        sys.exit(1)
+
+    links = sum(len(companies) for companies in graph.person_companies)
+    print(f"✅ Linked {len(graph.person_ids):,} people across {len(graph.accession_numbers):,} companies "
+          f"({links:,} person-company links) in {time.time() - started:.1f}s")
+
+    # Lookups don't overwrite the report unless it was asked for
+    report_file = args.report or (None if args.company or args.person else DEFAULT_REPORT)
+    if report_file:
+        serial_count = graph.write_report(report_file, args.min_companies)
+        print(f"👥 {serial_count:,} people at {args.min_companies}+ companies → {report_file}")
+        for dense in graph.serial_persons(args.min_companies)[:5]:
+            city, state = graph.person_places[dense]
+            print(f"  • {graph.person_names[dense]} ({city}, {state}) - {len(graph.person_companies[dense])} companies")
+
+    if args.company:
+        company = graph.company(args.company)
+        if company is None:
+            print(f"❌ Error: No company with accession number {args.company}")
+            sys.exit(1)
+        connected = graph.connected_companies(company, args.hops)
+        print(f"\n🔗 {len(connected):,} companies within {args.hops} hops of {graph.company_names[company]} ({args.company})")
+        for other, hops, previous, person in connected:
+            print(f"  {hops}  {graph.accession_numbers[other]}  {graph.company_names[other]}"
+                  f"  (via {graph.person_names[person]} at {graph.company_names[previous]})")
+
+    if args.person:
+        persons = graph.persons_named(args.person)
+        print(f"\n🔎 {len(persons):,} people named {args.person}")
+        for dense in persons:
+            city, state = graph.person_places[dense]
+            names = ', '.join(graph.company_names[c] for c in graph.person_companies[dense])
+            print(f"  {graph.person_ids[dense]}  {graph.person_names[dense]} ({city}, {state}): {names}")
+
+
+if __name__ == "__main__":
+    main()
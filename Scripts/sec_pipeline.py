@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+sec_pipeline.py - Run the whole pipeline, from quarterly TSVs to the final CSV, in one process
+Usage: python sec_pipeline.py [--data-dir .] [--output sec_companies_top100.csv] [--top-n 100]
+                              [--spec filter.yaml] [--stats startups_stats.csv] [--keep-intermediates DIR]
+
+Chains the stage functions of sec_all_quarters.py, sec_combine_quarters.py,
+sec_filter.py, sec_unique.py, sec_domain_inference.py and sec_flatten.py. Company
+records are passed between stages as Python objects: each quarter's TSVs are parsed
+once, the accession-number dedup collects the master in memory (it has to see every
+quarter before it can sort), and from there filter -> unique -> domains -> CSV is one
+chain of generators. Nothing is serialized unless --keep-intermediates asks for the
+stage outputs, which are then written as JSONL (plus .meta.json sidecars) under the
+names the standalone scripts use, so any later stage can still be run on its own.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+from sec_all_quarters import find_quarter_dirs, quarter_companies
+from sec_combine_quarters import dedupe_by_accession, generate_statistics_csv, master_metadata
+from sec_domain_cache import DomainCache
+from sec_domain_inference import INFERENCE_BATCH, inferred_domains_entry, with_inferred_domains
+from sec_filter import (
+    compile_filter_spec, describe_filter_spec, filters_applied, iter_filtered_companies, load_filter_spec,
+    build_filter_spec, new_filter_stats, print_filter_results, SPEC_ERRORS
+)
+from sec_flatten import export_companies_csv
+from sec_stream import jsonl_line, write_jsonl, write_metadata
+from sec_tsv import find_tsv_files, quarter_name_for
+from sec_unique import iter_unique_companies
+
+# Intermediate files, named like the standalone scripts' defaults
+MASTER_FILE = 'startups_master.jsonl'
+TARGETS_FILE = 'sec_companies_targets.jsonl'
+UNIQUE_FILE = 'sec_companies_targets_unique.jsonl'
+URLS_FILE = 'sec_companies_targets_unique_urls.jsonl'
+
+
+def iter_all_quarters(quarter_dirs, quarters_processed, cache_dir=None):
+    """Stream every quarter's companies in turn, straight from the TSVs"""
+    for quarter_dir in quarter_dirs:
+        quarter_name = quarter_name_for(quarter_dir)
+        _, missing = find_tsv_files(quarter_dir)
+        if missing:
+            print(f"⏭️  {quarter_name:15s} - Missing files: {', '.join(missing)}")
+            continue
+
+        # A quarter that fails is skipped whole, as sec_all_quarters.py does
+        try:
+            companies = list(quarter_companies(quarter_dir, quarter_name, cache_dir))
+        except Exception as e:
+            print(f"❌ {quarter_name:15s} - Error: {e}")
+            continue
+        quarters_processed.append(quarter_name)
+        print(f"✅ {quarter_name:15s} - {len(companies):4d} companies")
+        yield from companies
+
+
+def tee_jsonl(companies, path):
+    """Pass companies through while writing each one to a JSONL file"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for company in companies:
+            f.write(jsonl_line(company))
+            yield company
+
+
+def with_domains(companies, cache=None):
+    """Attach inferred_domains to each company, inferring a batch at a time"""
+    for company_entry, domains in with_inferred_domains(companies, INFERENCE_BATCH, cache):
+        company_entry['inferred_domains'] = inferred_domains_entry(domains)
+        yield company_entry
+
+
+def run_pipeline(data_dir='.', output_file='sec_companies_top100.csv', top_n=100, spec=None,
+                 stats_file=None, keep_dir=None, cache_dir=None, domain_cache=None):
+    """
+    TSVs -> combined master -> filtered targets -> unique -> inferred domains -> CSV.
+
+    spec is a filter spec (see sec_filter.DEFAULT_FILTER_SPEC), stats_file optionally
+    writes startups_stats.csv from the master, keep_dir writes every stage's output
+    there as JSONL, cache_dir caches parsed TSV tables and domain_cache is a
+    sec_domain_cache.py SQLite file. Returns a dict of per-stage counts.
+    """
+    started = time.time()
+    spec = build_filter_spec(spec)
+
+    print("=" * 70)
+    print("SEC Pipeline - TSVs to CSV in one process")
+    print("=" * 70)
+
+    quarter_dirs = find_quarter_dirs(data_dir)
+    if not quarter_dirs:
+        print(f"❌ No quarterly directories found in {os.path.abspath(data_dir)}")
+        return None
+    print(f"\n📂 Found {len(quarter_dirs)} quarterly directories\n")
+
+    def keep(name):
+        return os.path.join(keep_dir, name)
+
+    if keep_dir:
+        os.makedirs(keep_dir, exist_ok=True)
+
+    # Combine: the dedup needs every quarter before it can pick winners and sort
+    quarters_processed = []
+    all_companies = list(iter_all_quarters(quarter_dirs, quarters_processed, cache_dir))
+    master = dedupe_by_accession(all_companies)
+    total_executives = sum(len(c['related_persons']) for c in master)
+    print(f"\n🔄 Combined {len(all_companies):,} filings into {len(master):,} unique companies")
+    del all_companies
+
+    if keep_dir:
+        metadata = master_metadata(quarters_processed, len(master), total_executives)
+        write_jsonl(keep(MASTER_FILE), master)
+        write_metadata(keep(MASTER_FILE), metadata)
+    if stats_file:
+        generate_statistics_csv(master, stats_file)
+        print(f"📊 Created statistics: {stats_file}")
+
+    # Filter -> unique -> domains -> CSV, one company at a time
+    print("\nApplying filters...")
+    for line in describe_filter_spec(spec):
+        print(f"  → {line}")
+
+    filter_stats = new_filter_stats()
+    sample_companies = []
+    unique_stats = {}
+    cache = DomainCache(domain_cache) if domain_cache else None
+
+    companies = iter_filtered_companies(master, compile_filter_spec(spec), filter_stats, sample_companies)
+    if keep_dir:
+        companies = tee_jsonl(companies, keep(TARGETS_FILE))
+    companies = iter_unique_companies(companies, unique_stats)
+    if keep_dir:
+        companies = tee_jsonl(companies, keep(UNIQUE_FILE))
+    companies = with_domains(companies, cache)
+    if keep_dir:
+        companies = tee_jsonl(companies, keep(URLS_FILE))
+
+    print()
+    export_companies_csv(companies, output_file, top_n)
+
+    print_filter_results(filter_stats, spec, sample_companies)
+    unique_count = unique_stats['unique_keys']
+    print(f"\n🧹 Duplicates removed: {unique_stats['duplicate_count']:,} ({unique_count:,} unique companies)")
+    if cache is not None:
+        cache.close()
+        print(f"🗄️  Domain cache: {cache.summary()}")
+
+    if keep_dir:
+        generated_at = datetime.now().isoformat()
+        targets_metadata = {
+            'filtered_from': keep(MASTER_FILE),
+            'generated_at': generated_at,
+            'original_total': filter_stats['initial_count'],
+            'filtered_total': filter_stats['final_count'],
+            'filters_applied': filters_applied(spec)
+        }
+        write_metadata(keep(TARGETS_FILE), targets_metadata)
+        write_metadata(keep(UNIQUE_FILE), {
+            **targets_metadata,
+            'total_companies': unique_count,
+            'duplicates_removed': unique_stats['duplicate_count']
+        })
+        write_metadata(keep(URLS_FILE), {
+            **targets_metadata,
+            'total_companies': unique_count,
+            'duplicates_removed': unique_stats['duplicate_count'],
+            'domain_inference': {'completed_at': generated_at, 'total_processed': unique_count}
+        })
+        print(f"📁 Intermediate files written to: {os.path.abspath(keep_dir)}/")
+
+    elapsed = time.time() - started
+    print(f"\n✅ Pipeline complete in {elapsed:.1f}s → {output_file}")
+    return {
+        'quarters': len(quarters_processed),
+        'master': len(master),
+        'targets': filter_stats['final_count'],
+        'unique': unique_count,
+        'elapsed_seconds': elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the SEC pipeline from quarterly TSVs to the final CSV')
+    parser.add_argument('--data-dir', default='.', help='Directory containing quarterly folders or *_d.zip archives')
+    parser.add_argument('--output', default='sec_companies_top100.csv', help='Output CSV file')
+    parser.add_argument('--top-n', type=int, default=100,
+                        help='Companies to export by funding (0 = all, in pipeline order)')
+    parser.add_argument('--spec', help='Filter spec file (JSON or YAML, see sec_filter.py)')
+    parser.add_argument('--stats', help='Also write the statistics CSV for the master')
+    parser.add_argument('--keep-intermediates', metavar='DIR',
+                        help='Write each stage\'s output (master, targets, unique, urls) to DIR as JSONL')
+    parser.add_argument('--cache-dir', default='.sec_cache',
+                        help='Directory for cached parsed TSV tables (default: .sec_cache)')
+    parser.add_argument('--no-cache', action='store_true', help='Always parse the TSV files')
+    parser.add_argument('--domain-cache', metavar='PATH', help='SQLite cache of domain candidates')
+    args = parser.parse_args()
+
+    try:
+        spec = load_filter_spec(args.spec) if args.spec else None
+    except SPEC_ERRORS as e:
+        parser.error(str(e))
+
+    result = run_pipeline(
+        args.data_dir, args.output, args.top_n, spec, args.stats, args.keep_intermediates,
+        None if args.no_cache else args.cache_dir, args.domain_cache
+    )
+    if result is None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+sec_query_loadtest.py - Load test for sec_query_service.py
+Usage: python sec_query_loadtest.py [--url http://127.0.0.1:8080] [--requests 5000] [--concurrency 4]
+                                    [--target-ms 10] [--gate client|server] [--seed 0]
+
+Reads /stats for the values each filter accepts, then sends a random mix of
+/companies queries (state, industry, stage, recency and funding filters, every sort,
+a few pages deep) from --concurrency threads, each over its own keep-alive connection.
+Reports throughput and latency percentiles, both as measured by the client and as
+reported by the server (X-Query-Time-Ms), and exits non-zero when the p99 is over
+--target-ms. The gate uses the client measurement by default: the server stamps its
+header before the body is written, so it leaves out queueing, threading and network
+time; --gate server checks the query time alone.
+"""
+
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+from urllib.parse import urlencode, urlsplit
+
+FUNDING_BOUNDS = [None, 1_000_000, 5_000_000, 10_000_000, 25_000_000, 50_000_000]
+
+
+def random_query(rng: random.Random, stats: Dict[str, Any]) -> str:
+    """A /companies URL with 0-4 random filters, a random sort and page"""
+    params = {}
+    for name in ('state', 'stage', 'recency'):
+        if stats.get(name) and rng.random() < 0.4:
+            params[name] = ','.join(rng.sample(sorted(stats[name]), k=min(len(stats[name]), rng.randint(1, 3))))
+    if stats.get('industry') and rng.random() < 0.3:
+        # A word from a real industry name, so substring matches hit something
+        params['industry'] = rng.choice(rng.choice(sorted(stats['industry'])).split()).lower()
+    if rng.random() < 0.4:
+        low, high = sorted(rng.sample(FUNDING_BOUNDS[1:], 2))
+        params['min_funding'] = low
+        if rng.random() < 0.5:
+            params['max_funding'] = high
+    params['sort'] = rng.choice(['funding', 'recency', 'name'])
+    if rng.random() < 0.3:
+        params['order'] = rng.choice(['asc', 'desc'])
+    params['page'] = rng.choice([1, 1, 1, 2, 3, 10])
+    params['per_page'] = rng.choice([10, 20, 50])
+    return '/companies?' + urlencode(params)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def run_worker(host: str, port: int, paths: List[str], client_ms: List[float], server_ms: List[float],
+               errors: List[str]):
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    try:
+        for path in paths:
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException) as e:
+                errors.append(f"{path}: {e}")
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=10)
+                continue
+            client_ms.append((time.perf_counter() - started) * 1000)
+            if response.status != 200:
+                errors.append(f"{path}: HTTP {response.status}")
+            server_time = response.getheader('X-Query-Time-Ms')
+            if server_time:
+                server_ms.append(float(server_time))
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the company query service')
+    parser.add_argument('--url', default='http://127.0.0.1:8080', help='Service base URL')
+    parser.add_argument('--requests', type=int, default=5000, help='Total queries to send')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent connections')
+    parser.add_argument('--target-ms', type=float, default=10.0, help='p99 budget in milliseconds')
+    parser.add_argument('--gate', choices=('client', 'server'), default='client',
+                        help='Latency the budget applies to (default: client, end to end)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the query mix')
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    host, port = url.hostname or '127.0.0.1', url.port or 80
+
+    try:
+        conn = http.client.HTTPConnection(host, port, timeout=10)
+        conn.request('GET', '/stats')
+        stats = json.loads(conn.getresponse().read())
+        conn.close()
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: Could not reach {args.url}/stats: {e}")
+        sys.exit(1)
+    print(f"Service has {stats['total_companies']:,} companies")
+
+    rng = random.Random(args.seed)
+    paths = [random_query(rng, stats) for _ in range(args.requests)]
+    client_ms, server_ms, errors = [], [], []
+    threads = [
+        threading.Thread(target=run_worker,
+                         args=(host, port, paths[i::args.concurrency], client_ms, server_ms, errors))
+        for i in range(args.concurrency)
+    ]
+
+    print(f"Sending {len(paths):,} queries over {args.concurrency} connections...")
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    client_ms.sort()
+    server_ms.sort()
+    print(f"\n{'=' * 60}")
+    print("LOAD TEST RESULTS")
+    print(f"{'=' * 60}")
+    print(f"Requests:     {len(client_ms):,} ok, {len(errors):,} errors in {elapsed:.1f}s "
+          f"({len(client_ms) / elapsed:,.0f} req/s)")
+    for label, values in (('Client (ms)', client_ms), ('Server (ms)', server_ms)):
+        print(f"{label}:  p50 {percentile(values, 50):6.2f}  p90 {percentile(values, 90):6.2f}  "
+              f"p99 {percentile(values, 99):6.2f}  max {values[-1] if values else 0:6.2f}")
+    for error in errors[:5]:
+        print(f"  ⚠️  {error}")
+
+    label = args.gate.capitalize()
+    p99 = percentile(client_ms if args.gate == 'client' else server_ms, 99)
+    if errors or p99 > args.target_ms:
+        print(f"\n❌ {label} p99 {p99:.2f} ms (target {args.target_ms} ms), {len(errors):,} errors")
+        sys.exit(1)
+    print(f"\n✅ {label} p99 {p99:.2f} ms is within the {args.target_ms} ms target")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+sec_query_service.py - Local HTTP query API over the company dataset
+Usage: python sec_query_service.py [startups_master.json] [--db sec_companies.db] [--host 127.0.0.1] [--port 8080]
+Load test: python sec_query_loadtest.py --url http://127.0.0.1:8080
+
+Loads the master (a JSON/JSONL file, or a sec_company_db.py store) into memory once
+and answers queries from in-memory indexes instead of re-running sec_filter.py:
+
+  GET /companies?state=CA,NY&industry=software&min_funding=1000000&stage=Seed
+                &recency=recent&sort=funding&order=desc&page=1&per_page=20
+  GET /companies/<accession_number>
+  GET /stats      - company count and the values each filter accepts
+
+Filters (comma-separated values match any of them):
+  state          - state codes
+  industry       - keywords, matched case-insensitively as substrings (like sec_filter.py)
+  exclude_industry - keywords to leave out
+  stage          - funding.stage_estimate, e.g. "Series A"
+  recency        - company_age.funding_recency, e.g. recent
+  min_funding / max_funding - funding amount as sec_filter.py reads it
+Sorting: sort=funding|recency|name (default funding), order=asc|desc (default: desc
+for funding, asc otherwise); ties keep master order.
+
+Every filter value has a posting list of company positions (numpy arrays). A query
+ORs posting lists into boolean masks, ANDs the masks, and makes one pass over a
+presorted order for the page. Each company's JSON is serialized once at startup,
+so responses are joined rather than re-encoded.
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+
+from sec_filter import extract_funding_amount
+from sec_stream import read_companies
+
+DEFAULT_PORT = 8080
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+# Query parameter -> indexed field, for the exact-match filters
+EXACT_FILTERS = {'state': 'state', 'stage': 'stage_estimate', 'recency': 'funding_recency'}
+SORT_KEYS = ('funding', 'recency', 'name')
+QUERY_PARAMS = {
+    *EXACT_FILTERS, 'industry', 'exclude_industry', 'min_funding', 'max_funding',
+    'sort', 'order', 'page', 'per_page'
+}
+
+
+class QueryError(ValueError):
+    """A malformed query (answered with 400)"""
+
+
+def _values(params: Dict[str, List[str]], name: str) -> List[str]:
+    """Comma-separated values of a parameter, across repeats (?state=CA&state=NY works too)"""
+    return [v.strip() for raw in params.get(name, []) for v in raw.split(',') if v.strip()]
+
+
+def _number(params: Dict[str, List[str]], name: str, cast=float):
+    values = params.get(name)
+    if not values or not values[-1].strip():
+        return None
+    try:
+        value = cast(values[-1])
+    except ValueError:
+        raise QueryError(f"{name} must be a number")
+    # nan compares false with everything, so it would silently match nothing
+    if not math.isfinite(value):
+        raise QueryError(f"{name} must be a finite number")
+    return value
+
+
+class CompanyIndex:
+    """
+    In-memory posting lists and presorted orders over a list of companies.
+    Positions are indexes into the load (master) order.
+    """
+
+    def __init__(self, companies: Iterable[Dict[str, Any]]):
+        self.documents = []
+        self.positions = {}
+        values = {field: [] for field in ('state', 'industry', 'stage_estimate', 'funding_recency')}
+        funding, months, names = [], [], []
+
+        for position, company_data in enumerate(companies):
+            company = company_data.get('company') or {}
+            address = company.get('address') or {}
+            self.documents.append(json.dumps(company_data, ensure_ascii=False))
+            self.positions[company_data.get('accession_number')] = position
+            values['state'].append((address.get('state') or '').strip().upper())
+            values['industry'].append(company.get('industry') or '')
+            values['stage_estimate'].append(((company_data.get('funding') or {}).get('stage_estimate') or '').lower())
+            age = company_data.get('company_age') or {}
+            values['funding_recency'].append((age.get('funding_recency') or '').lower())
+            funding.append(extract_funding_amount(company_data))
+            recency = age.get('months_since_funding')
+            months.append(recency if recency is not None else 999)
+            names.append((company.get('name') or '').lower())
+
+        self.count = len(self.documents)
+        self.funding = np.array(funding, dtype=float)
+
+        # value -> ascending positions
+        self.postings = {}
+        for field, column in values.items():
+            grouped = {}
+            for position, value in enumerate(column):
+                grouped.setdefault(value, []).append(position)
+            self.postings[field] = {value: np.array(p, dtype=np.int64) for value, p in grouped.items()}
+        self.industries_lower = [(industry.lower(), industry) for industry in self.postings['industry'] if industry]
+
+        # (sort key, descending) -> positions in result order, ties in master order
+        order = np.arange(self.count)
+        months = np.array(months, dtype=float)
+        by_name = sorted(range(self.count), key=names.__getitem__)
+        self.orders = {
+            ('funding', False): np.lexsort((order, self.funding)),
+            ('funding', True): np.lexsort((order, -self.funding)),
+            ('recency', False): np.lexsort((order, months)),
+            ('recency', True): np.lexsort((order, -months)),
+            ('name', False): np.array(by_name, dtype=np.int64),
+            ('name', True): np.array(sorted(range(self.count), key=names.__getitem__, reverse=True), dtype=np.int64)
+        }
+
+    def _mask(self, field: str, values: Iterable[str]) -> np.ndarray:
+        """Boolean mask over positions: True where field has any of values"""
+        mask = np.zeros(self.count, dtype=bool)
+        postings = self.postings[field]
+        for value in values:
+            if value in postings:
+                mask[postings[value]] = True
+        return mask
+
+    def _industries_matching(self, keywords: List[str]) -> List[str]:
+        keywords = [k.lower() for k in keywords]
+        return [industry for lower, industry in self.industries_lower if any(k in lower for k in keywords)]
+
+    def select(self, params: Dict[str, List[str]]) -> np.ndarray:
+        """Boolean mask over positions of the companies matching every filter in params"""
+        selected = np.ones(self.count, dtype=bool)
+
+        for name, field in EXACT_FILTERS.items():
+            wanted = _values(params, name)
+            if wanted:
+                wanted = [w.upper() for w in wanted] if field == 'state' else [w.lower() for w in wanted]
+                selected &= self._mask(field, wanted)
+
+        included = _values(params, 'industry')
+        if included:
+            selected &= self._mask('industry', self._industries_matching(included))
+        excluded = _values(params, 'exclude_industry')
+        if excluded:
+            selected &= ~self._mask('industry', self._industries_matching(excluded))
+
+        min_funding = _number(params, 'min_funding')
+        if min_funding is not None:
+            selected &= self.funding >= min_funding
+        max_funding = _number(params, 'max_funding')
+        if max_funding is not None:
+            selected &= self.funding <= max_funding
+        return selected
+
+    def query(self, params: Dict[str, List[str]]) -> Tuple[int, int, int, List[int]]:
+        """Run a /companies query; returns (total, page, per_page, positions on the page)"""
+        unknown = sorted(set(params) - QUERY_PARAMS)
+        if unknown:
+            raise QueryError(f"Unknown parameters: {', '.join(unknown)}")
+
+        sort = (params.get('sort') or ['funding'])[-1]
+        if sort not in SORT_KEYS:
+            raise QueryError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+        order = (params.get('order') or ['desc' if sort == 'funding' else 'asc'])[-1]
+        if order not in ('asc', 'desc'):
+            raise QueryError("order must be asc or desc")
+        page = _number(params, 'page', int)
+        page = 1 if page is None else page
+        per_page = _number(params, 'per_page', int)
+        per_page = DEFAULT_PER_PAGE if per_page is None else per_page
+        if page < 1 or not 1 <= per_page <= MAX_PER_PAGE:
+            raise QueryError(f"page must be >= 1 and per_page between 1 and {MAX_PER_PAGE}")
+
+        # One pass over the presorted order keeps the matches in result order
+        sorted_positions = self.orders[(sort, order == 'desc')]
+        matches = sorted_positions[self.select(params)[sorted_positions]]
+        offset = (page - 1) * per_page
+        return len(matches), page, per_page, matches[offset:offset + per_page].tolist()
+
+    def stats(self) -> Dict[str, Any]:
+        """Company count plus the distinct values (with counts) of each exact filter"""
+        return {
+            'total_companies': self.count,
+            **{
+                name: {value: len(p) for value, p in sorted(self.postings[field].items()) if value}
+                for name, field in (*EXACT_FILTERS.items(), ('industry', 'industry'))
+            }
+        }
+
+
+def make_handler(index: CompanyIndex):
+    """Request handler class bound to an index"""
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, so clients can reuse connections
+        # Headers and body are separate writes; with Nagle on, a keep-alive client
+        # waits out its delayed ACK (~40 ms) before the body arrives
+        disable_nagle_algorithm = True
+
+        def send_json(self, status: int, body: str, started: float):
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            # Handler time only: written before the body, so it can't include sending it
+            self.send_header('X-Query-Time-Ms', f"{(time.perf_counter() - started) * 1000:.3f}")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            started = time.perf_counter()
+            url = urlsplit(self.path)
+            path = url.path.rstrip('/')
+            try:
+                if path == '/companies':
+                    total, page, per_page, positions = index.query(parse_qs(url.query))
+                    results = ','.join(index.documents[p] for p in positions)
+                    body = (f'{{"total": {total}, "page": {page}, "per_page": {per_page}, '
+                            f'"results": [{results}]}}')
+                    self.send_json(200, body, started)
+                elif path.startswith('/companies/'):
+                    position = index.positions.get(unquote(path[len('/companies/'):]))
+                    if position is None:
+                        self.send_json(404, json.dumps({'error': 'company not found'}), started)
+                    else:
+                        self.send_json(200, index.documents[position], started)
+                elif path in ('', '/stats'):
+                    self.send_json(200, json.dumps(index.stats(), ensure_ascii=False), started)
+                else:
+                    self.send_json(404, json.dumps({'error': f'unknown path {url.path}'}), started)
+            except QueryError as e:
+                self.send_json(400, json.dumps({'error': str(e)}), started)
+
+        def log_message(self, format, *args):
+            # Per-request logging costs more than answering the query
+            pass
+
+    return QueryHandler
+
+
+def load_index(input_file: Optional[str] = None, db: Optional[str] = None) -> CompanyIndex:
+    """Build the index from a master file or a sec_company_db.py store"""
+    if db:
+        from sec_company_db import CompanyStore
+        store = CompanyStore(db, create=False)
+        try:
+            return CompanyIndex(store.companies())
+        finally:
+            store.close()
+    _, companies = read_companies(input_file)
+    return CompanyIndex(companies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve filtered, sorted, paginated company queries over HTTP')
+    parser.add_argument('input', nargs='?', default='startups_master.json', help='Master file (JSON or JSONL)')
+    parser.add_argument('--db', help='Load from a sec_company_db.py store instead of the master file')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    args = parser.parse_args()
+
+    source = args.db or args.input
+    print(f"Loading companies from {source}...")
+    started = time.time()
+    try:
+        index = load_index(args.input, args.db)
+    except FileNotFoundError:
+        print(f"❌ Error: Could not find '{source}'")
+        sys.exit(1)
+    print(f"✅ Indexed {index.count:,} companies in {time.time() - started:.1f}s")
+    # Touch every presorted order once, so the first real queries don't pay for page faults
+    for sort, descending in index.orders:
+        index.query({'sort': [sort], 'order': ['desc' if descending else 'asc']})
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(index))
+    server.daemon_threads = True
+    print(f"🌐 Serving on http://{args.host}:{args.port}/companies (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+sec_stats.py - Group-by statistics over company documents
+Used by sec_combine_quarters.py for startups_stats.csv
+
+Companies are read once into a small columnar frame (one column per dimension plus
+total_amount_sold), and every requested grouping - single dimensions or cross-products
+such as state*industry*quarter - is then a vectorized pandas groupby over that frame.
+Industries can also be grouped by category tag (industry_category, see sec_industry.py).
+Each group gets its company count, companies over each funding threshold, and the
+sum, median and percentiles of total_amount_sold.
+"""
+
+import pandas as pd
+
+from sec_industry import IndustryClassifier
+
+# Group-by dimensions and where each lives in a company document
+DIMENSIONS = {
+    'state': ('company', 'address', 'state'),
+    'industry': ('company', 'industry'),
+    'quarter': ('filing', 'quarter'),
+    'stage_estimate': ('funding', 'stage_estimate')
+}
+
+# Dimensions derived from another column: name -> (source dimension, classifier)
+DERIVED_DIMENSIONS = {
+    'industry_category': ('industry', IndustryClassifier())
+}
+
+GROUP_BY_DIMENSIONS = list(DIMENSIONS) + list(DERIVED_DIMENSIONS)
+
+# The breakdowns and threshold startups_stats.csv has always had
+DEFAULT_GROUPINGS = [('state',), ('industry',)]
+DEFAULT_THRESHOLDS = (5_000_000,)
+DEFAULT_PERCENTILES = (25, 75, 90)
+
+OVERALL = ('OVERALL', 'All Companies')
+
+
+def parse_grouping(spec):
+    """'state*industry' -> ('state', 'industry'); raises ValueError for unknown dimensions"""
+    dimensions = tuple(part.strip() for part in spec.split('*') if part.strip())
+    unknown = [d for d in dimensions if d not in GROUP_BY_DIMENSIONS]
+    if not dimensions or unknown:
+        raise ValueError(f"Unknown group-by '{spec}' (dimensions: {', '.join(GROUP_BY_DIMENSIONS)})")
+    return dimensions
+
+
+def threshold_label(threshold):
+    """Column suffix for a funding threshold: 5000000 -> '5m', 500000 -> '500k'"""
+    for divisor, unit in ((1_000_000_000, 'b'), (1_000_000, 'm'), (1_000, 'k')):
+        if threshold >= divisor:
+            return f"{threshold / divisor:g}{unit}"
+    return f"{threshold:g}"
+
+
+def category_label(dimensions):
+    """CSV category for a grouping: ('state', 'industry') -> 'BY STATE × INDUSTRY'"""
+    return 'BY ' + ' × '.join(d.upper().replace('_', ' ') for d in dimensions)
+
+
+def _lookup(document, path):
+    for key in path:
+        if not isinstance(document, dict):
+            return None
+        document = document.get(key)
+    return document
+
+
+def companies_frame(companies):
+    """
+    Read companies (any iterable, including a stream) into one row per company with a
+    column per dimension and amount_sold. Empty dimension values become missing, so they
+    are left out of groupings just like the old `if state:` checks.
+    """
+    columns = {name: [] for name in DIMENSIONS}
+    amounts = []
+    for company in companies:
+        for name, path in DIMENSIONS.items():
+            columns[name].append(_lookup(company, path) or None)
+        amounts.append((company.get('funding') or {}).get('total_amount_sold'))
+
+    frame = pd.DataFrame({name: pd.Series(values, dtype='category') for name, values in columns.items()})
+    for name, (source, classifier) in DERIVED_DIMENSIONS.items():
+        # Classified once per distinct value, e.g. industry -> 'health', 'technology', ...
+        frame[name] = classifier.category_series(frame[source])
+    frame['amount_sold'] = pd.to_numeric(pd.Series(amounts, dtype=object), errors='coerce').astype(float)
+    return frame
+
+
+def _summarize(frame, keys, thresholds, percentiles):
+    """Aggregate one grouping: counts, threshold counts, sum, median and percentiles"""
+    grouped = frame.groupby(keys, observed=True, sort=False, dropna=True)
+
+    aggregations = {'total_companies': ('amount_sold', 'size')}
+    for threshold in thresholds:
+        label = threshold_label(threshold)
+        aggregations[f"companies_over_{label}"] = (f"_over_{label}", 'sum')
+    aggregations['amount_sold_sum'] = ('amount_sold', 'sum')
+    aggregations['amount_sold_median'] = ('amount_sold', 'median')
+    summary = grouped.agg(**aggregations)
+
+    for percentile in percentiles:
+        summary[f"amount_sold_p{percentile:g}"] = grouped['amount_sold'].quantile(percentile / 100)
+
+    # Largest groups first; ties keep first-seen order
+    return summary.sort_values('total_companies', ascending=False, kind='stable').reset_index()
+
+
+def aggregate(frame, groupings=DEFAULT_GROUPINGS, thresholds=DEFAULT_THRESHOLDS,
+              percentiles=DEFAULT_PERCENTILES):
+    """
+    Compute the OVERALL row plus every grouping over a companies_frame().
+
+    Returns one DataFrame: category, subcategory, one column per dimension (blank
+    where the grouping doesn't use it), total_companies, companies_over_<threshold>
+    for each threshold, and amount_sold_sum / _median / _p<percentile>.
+    """
+    frame = frame.copy()
+    amount = frame['amount_sold']
+    for threshold in thresholds:
+        # A zero or missing amount never counts as over the threshold
+        frame[f"_over_{threshold_label(threshold)}"] = (amount.notna() & (amount != 0) & (amount >= threshold))
+    frame['_overall'] = OVERALL[1]
+
+    overall = _summarize(frame, ['_overall'], thresholds, percentiles)
+    if overall.empty:
+        overall = pd.DataFrame([{
+            '_overall': OVERALL[1],
+            'total_companies': 0,
+            **{f"companies_over_{threshold_label(t)}": 0 for t in thresholds}
+        }])
+    overall['category'] = OVERALL[0]
+    overall['subcategory'] = overall.pop('_overall')
+    results = [overall]
+
+    for dimensions in groupings:
+        summary = _summarize(frame, list(dimensions), thresholds, percentiles)
+        summary['category'] = category_label(dimensions)
+        summary['subcategory'] = summary[list(dimensions)].astype(str).agg(' | '.join, axis=1) \
+            if not summary.empty else pd.Series(dtype=str)
+        results.append(summary)
+
+    result = pd.concat(results, ignore_index=True)
+    leading = ['category', 'subcategory'] + [d for d in GROUP_BY_DIMENSIONS if d in result.columns]
+    return result[leading + [c for c in result.columns if c not in leading]]
+
+
+def statistics_table(aggregated, thresholds=DEFAULT_THRESHOLDS, amount_metrics=False):
+    """
+    Shape aggregate() output as the startups_stats.csv layout: category, subcategory,
+    total_companies, then companies_over_X / percent_over_X per threshold, and the
+    amount_sold metrics only when amount_metrics is set.
+    """
+    table = aggregated[['category', 'subcategory', 'total_companies']].copy()
+    totals = aggregated['total_companies']
+
+    for threshold in thresholds:
+        label = threshold_label(threshold)
+        over = aggregated[f"companies_over_{label}"].astype(int)
+        table[f"companies_over_{label}"] = over
+        table[f"percent_over_{label}"] = [
+            f"{(count/total*100):.1f}%" if total > 0 else "0%"
+            for count, total in zip(over.tolist(), totals.tolist())
+        ]
+
+    if amount_metrics:
+        metric_columns = [c for c in aggregated.columns if c.startswith('amount_sold_')]
+        table[metric_columns] = aggregated[metric_columns]
+
+    return table
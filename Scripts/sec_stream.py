@@ -0,0 +1,261 @@
+"""
+sec_stream.py - Streaming company input and output shared by the SEC scripts
+
+A .jsonl file holds one company document per line, so it can be written as each
+company is produced and loaded with `mongoimport --file companies.jsonl` (no --jsonArray).
+File-level metadata lives in a sidecar next to the data file
+(companies.jsonl -> companies.meta.json), so every line stays a company.
+
+read_companies() yields company records one at a time from any of the layouts the
+scripts produce - {"metadata": ..., "companies": [...]}, a bare array, or JSONL -
+without loading the whole file.
+"""
+
+import json
+import os
+
+OUTPUT_FORMATS = ('json', 'jsonl')
+
+
+def output_path_for(path, output_format):
+    """Swap a .json/.jsonl extension so the file name matches output_format"""
+    root, extension = os.path.splitext(str(path))
+    if extension.lower() in ('.json', '.jsonl'):
+        return root + ('.jsonl' if output_format == 'jsonl' else '.json')
+    return str(path)
+
+
+def metadata_path_for(path):
+    """Sidecar metadata path for a JSONL file"""
+    return os.path.splitext(str(path))[0] + '.meta.json'
+
+
+def jsonl_line(company):
+    """Serialize one company document as a JSON Lines record"""
+    return json.dumps(company, ensure_ascii=False) + '\n'
+
+
+def write_jsonl(path, companies, mode='w'):
+    """
+    Write companies one per line as they are produced by the iterable.
+    Returns (total_companies, total_executives).
+    """
+    total_companies = 0
+    total_executives = 0
+    with open(path, mode, encoding='utf-8') as f:
+        for company in companies:
+            f.write(jsonl_line(company))
+            total_companies += 1
+            total_executives += len(company.get('related_persons') or [])
+    return total_companies, total_executives
+
+
+def write_metadata(path, metadata):
+    """Write the metadata sidecar for a JSONL file"""
+    with open(metadata_path_for(path), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+
+def read_metadata(path):
+    """Read the metadata sidecar for a JSONL file ({} if there isn't one)"""
+    try:
+        with open(metadata_path_for(path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def read_jsonl(path):
+    """Yield company documents from a JSONL file one at a time"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_json_document(path, metadata, companies):
+    """
+    Write {"metadata": ..., "companies": [...]} one company at a time, producing the
+    same text as json.dump(..., indent=2, ensure_ascii=False) without building the list.
+    Returns (total_companies, total_executives).
+    """
+    def indented(value, prefix):
+        # Newlines inside strings are escaped, so every raw newline is layout
+        return json.dumps(value, indent=2, ensure_ascii=False).replace('\n', '\n' + prefix)
+
+    total_companies = 0
+    total_executives = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{\n  "metadata": ' + indented(metadata, '  ') + ',\n  "companies": [')
+        for company in companies:
+            f.write(',\n    ' if total_companies else '\n    ')
+            f.write(indented(company, '    '))
+            total_companies += 1
+            total_executives += len(company.get('related_persons') or [])
+        f.write('\n  ]\n}' if total_companies else ']\n}')
+    return total_companies, total_executives
+
+
+def pop_format_option(args, default='json'):
+    """
+    Remove a `--format json|jsonl` option from a raw argv list (for the scripts that
+    parse sys.argv positionally) and return the chosen format.
+    """
+    if '--format' not in args:
+        return default
+    position = args.index('--format')
+    if position + 1 >= len(args) or args[position + 1] not in OUTPUT_FORMATS:
+        raise SystemExit(f"--format must be one of: {', '.join(OUTPUT_FORMATS)}")
+    output_format = args[position + 1]
+    del args[position:position + 2]
+    return output_format
+
+
+class _JsonStream:
+    """Incremental JSON tokenizer over a text file, decoding one value at a time"""
+
+    def __init__(self, f, chunk_size=1 << 20):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        """Read another chunk, dropping what's already been consumed"""
+        if self._pos > self._chunk_size:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        chunk = self._file.read(self._chunk_size)
+        if chunk:
+            self._buffer += chunk
+        else:
+            self._eof = True
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of file)"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buffer) or self._eof:
+                return self._buffer[self._pos] if self._pos < len(self._buffer) else ''
+            self._fill()
+
+    def take(self, char):
+        """Consume an expected structural character"""
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expected {char!r}, found {found!r}", self._buffer, self._pos)
+        self._pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more input until it fits"""
+        while True:
+            self.peek()
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A value ending exactly at the buffer edge (e.g. a number) may continue
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+
+def _iter_array(stream):
+    """Yield the elements of the JSON array at the stream position"""
+    stream.take('[')
+    if stream.peek() == ']':
+        stream.take(']')
+        return
+    while True:
+        yield stream.value()
+        if stream.peek() == ',':
+            stream.take(',')
+            continue
+        stream.take(']')
+        return
+
+
+def _iter_document(stream, document):
+    """
+    Walk a {"metadata": ..., "companies": [...]} document, yielding companies and
+    storing every other top-level key in `document` as it is reached.
+    """
+    stream.take('{')
+    if stream.peek() == '}':
+        stream.take('}')
+        return
+    while True:
+        key = stream.value()
+        stream.take(':')
+        if key == 'companies' and stream.peek() == '[':
+            yield from _iter_array(stream)
+        else:
+            document[key] = stream.value()
+        if stream.peek() == ',':
+            stream.take(',')
+            continue
+        stream.take('}')
+        return
+
+
+def _looks_like_jsonl(f):
+    """True if the first line of a .json file is already a complete company record"""
+    first_line = f.readline(1 << 20)
+    f.seek(0)
+    try:
+        record = json.loads(first_line)
+    except ValueError:
+        return False
+    return isinstance(record, dict) and 'companies' not in record
+
+
+def read_companies(path):
+    """
+    Open a company file for streaming.
+
+    Returns (document, companies): `companies` is a generator yielding one company
+    record at a time, and `document` holds the file's other top-level keys
+    (e.g. {'metadata': {...}}). For JSONL the sidecar is loaded as 'metadata';
+    bare arrays give {}. Keys stored after the companies array only appear in
+    `document` once the generator has been exhausted.
+    """
+    path = str(path)
+    document = {}
+
+    if path.endswith('.jsonl'):
+        metadata = read_metadata(path)
+        if metadata:
+            document['metadata'] = metadata
+        return document, read_jsonl(path)
+
+    def companies():
+        with open(path, 'r', encoding='utf-8') as f:
+            if _looks_like_jsonl(f):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+                return
+
+            stream = _JsonStream(f)
+            if stream.peek() == '[':
+                yield from _iter_array(stream)
+            else:
+                yield from _iter_document(stream, document)
+
+    # Read up to the companies array now, so metadata stored before it is available
+    iterator = companies()
+    try:
+        first = next(iterator)
+    except StopIteration:
+        return document, iter(())
+
+    def chained():
+        yield first
+        yield from iterator
+
+    return document, chained()
@@ -0,0 +1,292 @@
+"""
+sec_tsv.py - Locate and load the SEC Form D TSV tables for one quarter
+Used by sec_form_d.py and sec_all_quarters.py
+
+A quarter can be an extracted folder (2023Q1_d/) or the original SEC archive
+(2023Q1_d.zip). Archive members are streamed straight into pandas, so the ZIP
+never has to be extracted to disk.
+
+Only the columns listed in FORM_D_SCHEMA are loaded, with explicit types instead
+of pandas' inferred ones.
+
+With a cache directory, each parsed table is also written as a binary columnar copy
+(Parquet when pyarrow is installed, pickle otherwise) keyed by the source file's
+size, mtime and content hash, so historical quarters are only parsed from text once.
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - only needed for the Parquet cache format
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Required TSV files
+REQUIRED_FILES = [
+    'FORMDSUBMISSION.tsv',
+    'ISSUERS.tsv',
+    'OFFERING.tsv',
+    'RELATEDPERSONS.tsv'
+]
+
+# Columns the document builders actually read from each table, and how to type them.
+# 'str' and 'category' are parsed by read_csv; 'float64' and 'Int64' columns are read
+# as text and coerced afterwards, since SEC amounts contain values like "Indefinite".
+FORM_D_SCHEMA = {
+    'FORMDSUBMISSION.tsv': {
+        'ACCESSIONNUMBER': 'str',
+        'FILING_DATE': 'str',
+        'SUBMISSIONTYPE': 'category'
+    },
+    'ISSUERS.tsv': {
+        'ACCESSIONNUMBER': 'str',
+        'ENTITYNAME': 'str',
+        'STREET1': 'str',
+        'STREET2': 'str',
+        'CITY': 'str',
+        'STATEORCOUNTRY': 'category',
+        'ZIPCODE': 'str',
+        'ISSUERPHONENUMBER': 'str',
+        'ENTITYTYPE': 'category',
+        'YEAROFINC_VALUE_ENTERED': 'Int64'
+    },
+    'OFFERING.tsv': {
+        'ACCESSIONNUMBER': 'str',
+        'INDUSTRYGROUPTYPE': 'category',
+        'ISAMENDMENT': 'category',
+        'SALE_DATE': 'str',
+        'TOTALOFFERINGAMOUNT': 'float64',
+        'TOTALAMOUNTSOLD': 'float64',
+        'TOTALREMAINING': 'float64',
+        'TOTALNUMBERALREADYINVESTED': 'Int64'
+    },
+    'RELATEDPERSONS.tsv': {
+        'ACCESSIONNUMBER': 'str',
+        'FIRSTNAME': 'str',
+        'MIDDLENAME': 'str',
+        'LASTNAME': 'str',
+        'CITY': 'str',
+        'STATEORCOUNTRY': 'category',
+        'RELATIONSHIP_1': 'category',
+        'RELATIONSHIP_2': 'category',
+        'RELATIONSHIP_3': 'category'
+    }
+}
+
+NUMERIC_TYPES = ('float64', 'Int64')
+
+# Bump when the cached frame layout changes in a way the schema doesn't capture
+CACHE_VERSION = 1
+
+
+def is_quarter_archive(path):
+    """True if path is a quarterly ZIP archive rather than an extracted folder"""
+    return os.path.isfile(path) and path.lower().endswith('.zip')
+
+
+def quarter_name_for(path):
+    """Quarter name for a folder or archive path, e.g. '2023Q1_d' for '2023Q1_d.zip'"""
+    name = os.path.basename(os.path.normpath(path))
+    if name.lower().endswith('.zip'):
+        name = name[:-len('.zip')]
+    return name
+
+
+def _archive_members(archive):
+    """Map TSV file name -> member path inside the archive (members may sit in a subfolder)"""
+    return {
+        posixpath.basename(member): member
+        for member in archive.namelist()
+        if not member.endswith('/')
+    }
+
+
+def find_tsv_files(source):
+    """Return (found, missing) lists of REQUIRED_FILES for a quarter folder or archive"""
+    if is_quarter_archive(source):
+        with zipfile.ZipFile(source) as archive:
+            available = set(_archive_members(archive))
+    else:
+        available = {f for f in REQUIRED_FILES if os.path.exists(os.path.join(source, f))}
+
+    found = [f for f in REQUIRED_FILES if f in available]
+    missing = [f for f in REQUIRED_FILES if f not in available]
+    return found, missing
+
+
+def _read_options(filename):
+    """read_csv keyword arguments projecting and typing one table per FORM_D_SCHEMA"""
+    schema = FORM_D_SCHEMA[filename]
+    return {
+        'sep': '\t',
+        # Tolerate columns missing from older SEC layouts
+        'usecols': lambda column: column in schema,
+        'dtype': {
+            column: ('str' if dtype in NUMERIC_TYPES else dtype)
+            for column, dtype in schema.items()
+        }
+    }
+
+
+def _coerce_numeric_columns(frame, filename):
+    """Convert the schema's float64/Int64 columns from text (unparseable -> missing)"""
+    for column, dtype in FORM_D_SCHEMA[filename].items():
+        if column not in frame.columns or dtype not in NUMERIC_TYPES:
+            continue
+        numbers = pd.to_numeric(frame[column], errors='coerce')
+        if dtype == 'Int64':
+            numbers = np.trunc(numbers.where(np.isfinite(numbers))).astype('Int64')
+        frame[column] = numbers
+    return frame
+
+
+def _parse_tsv(source, filename):
+    """Parse one Form D TSV table from text"""
+    options = _read_options(filename)
+
+    if is_quarter_archive(source):
+        with zipfile.ZipFile(source) as archive:
+            member = _archive_members(archive)[filename]
+            with archive.open(member) as stream:
+                frame = pd.read_csv(stream, **options)
+    else:
+        frame = pd.read_csv(os.path.join(source, filename), **options)
+
+    return _coerce_numeric_columns(frame, filename)
+
+
+def source_stat(source, filename):
+    """(size, mtime_ns) of the file a table is read from - cheap enough to check every run"""
+    path = source if is_quarter_archive(source) else os.path.join(source, filename)
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def source_hash(source, filename):
+    """Content hash of a table's source (the member CRC for archives, SHA-256 for files)"""
+    if is_quarter_archive(source):
+        with zipfile.ZipFile(source) as archive:
+            info = archive.getinfo(_archive_members(archive)[filename])
+        return f"crc32:{info.CRC:08x}:{info.file_size}"
+
+    return file_hash(os.path.join(source, filename))
+
+
+def file_hash(path):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return f"sha256:{digest.hexdigest()}"
+
+
+def _cache_paths(source, filename, cache_dir):
+    """(data_path, meta_path) for a table's cached copy"""
+    stem = os.path.splitext(filename)[0]
+    extension = '.parquet' if PARQUET_AVAILABLE else '.pkl'
+    base = os.path.join(cache_dir, quarter_name_for(source), stem)
+    return base + extension, base + '.meta.json'
+
+
+def _cache_key(filename):
+    """Everything besides the source file that decides what a cached frame looks like"""
+    return {
+        'version': CACHE_VERSION,
+        'format': 'parquet' if PARQUET_AVAILABLE else 'pickle',
+        'schema': FORM_D_SCHEMA[filename]
+    }
+
+
+def _load_cached(source, filename, cache_dir):
+    """Return the cached frame for a table, or None if there's no valid copy"""
+    data_path, meta_path = _cache_paths(source, filename, cache_dir)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get('key') != _cache_key(filename) or not os.path.exists(data_path):
+        return None
+
+    size, mtime_ns = source_stat(source, filename)
+    if meta.get('size') != size:
+        return None
+    if meta.get('mtime_ns') != mtime_ns:
+        # Touched but maybe not changed - fall back to the content hash
+        if meta.get('hash') != source_hash(source, filename):
+            return None
+        meta['mtime_ns'] = mtime_ns
+        _write_json(meta_path, meta)
+
+    try:
+        if PARQUET_AVAILABLE:
+            return pd.read_parquet(data_path)
+        return pd.read_pickle(data_path)
+    except Exception:
+        return None
+
+
+def _store_cached(frame, source, filename, cache_dir):
+    """Write a table's columnar copy and its source fingerprint"""
+    data_path, meta_path = _cache_paths(source, filename, cache_dir)
+    size, mtime_ns = source_stat(source, filename)
+    meta = {
+        'source': os.path.abspath(source),
+        'size': size,
+        'mtime_ns': mtime_ns,
+        'hash': source_hash(source, filename),
+        'key': _cache_key(filename)
+    }
+
+    try:
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        tmp_path = data_path + '.tmp'
+        if PARQUET_AVAILABLE:
+            frame.to_parquet(tmp_path, index=False)
+        else:
+            frame.to_pickle(tmp_path)
+        os.replace(tmp_path, data_path)
+        _write_json(meta_path, meta)
+    except Exception as e:
+        print(f"⚠️  Could not cache {quarter_name_for(source)}/{filename}: {e}")
+
+
+def _write_json(path, data):
+    """Write a small JSON file atomically"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_tsv(source, filename, cache_dir=None):
+    """
+    Load one Form D TSV table from a quarter folder or archive.
+    With cache_dir, reuse the columnar copy from an earlier run when the source is unchanged.
+    """
+    if cache_dir:
+        frame = _load_cached(source, filename, cache_dir)
+        if frame is not None:
+            return frame
+
+    frame = _parse_tsv(source, filename)
+
+    if cache_dir:
+        _store_cached(frame, source, filename, cache_dir)
+
+    return frame
+
+
+def load_quarter_tables(source, cache_dir=None):
+    """Load (submissions, issuers, offerings, people) for a quarter folder or archive"""
+    return tuple(read_tsv(source, filename, cache_dir) for filename in REQUIRED_FILES)
@@ -1,13 +1,26 @@
 #!/usr/bin/env python3
 """
 sec_unique.py - Remove duplicate companies from SEC data based on exact name, phone, and address matches
-Usage: python sec_unique.py sec_companies_targets.json
+Usage: python sec_unique.py sec_companies_targets.json [--format json|jsonl] [--fuzzy [--threshold 0.9]]
+                            [--index dedup_index.sqlite]
+
+--fuzzy also removes near-duplicates ("Acme Inc." vs "ACME, Inc", "Street" vs "St"),
+found with blocking + MinHash/LSH (see sec_fuzzy.py), and writes the duplicate
+clusters with their confidence scores to <input>_unique_clusters.json.
+
+--index keeps the dedup keys of every run in an on-disk index (see sec_dedup_index.py):
+companies already in it are dropped, and new ones are appended, so adding a quarter
+only dedupes the new records instead of the whole history.
 """
 
 import json
 import sys
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sec_dedup_index import DedupIndex, key_digest
+from sec_fuzzy import DEFAULT_THRESHOLD, company_features, find_duplicate_clusters
+from sec_stream import output_path_for, pop_format_option, read_companies, write_jsonl, write_metadata
 
 
 def normalize_field(value) -> str:
@@ -45,95 +58,206 @@ def create_dedup_key(company_entry: Dict) -> Tuple[str, str, str]:
     return (name, phone, full_address)
 
 
-def deduplicate_companies(companies: List[Dict]) -> Tuple[List[Dict], int, Dict]:
+def iter_unique_companies(companies: Iterable[Dict], stats: Dict,
+                          index: Optional[DedupIndex] = None) -> Iterator[Dict]:
     """
-    Remove duplicate companies based on exact name, phone, and address matches.
-    Returns (unique_companies, duplicate_count, duplicate_stats).
+    Yield companies whose (name, phone, address) key hasn't been seen yet.
+    Fills stats with duplicate_count, duplicate_examples and unique_keys as it goes.
+    
+    Keys are tracked by their 64-bit digest. With an index, keys from earlier runs
+    count as seen too, and new keys are added to it (as the accession number of
+    their first filing) instead of being held in memory.
     """
-    seen_keys = {}  # Maps key to first occurrence
-    unique_companies = []
-    duplicate_count = 0
-    duplicate_examples = []
+    seen_keys = {}  # Maps key digest to first occurrence (without an index)
+    stats.update({'duplicate_count': 0, 'duplicate_examples': [], 'unique_keys': 0})
     
     for idx, company in enumerate(companies):
-        key = create_dedup_key(company)
+        digest = key_digest(create_dedup_key(company))
+        original = index.get(digest) if index is not None else seen_keys.get(digest)
         
         # Skip if we've seen this exact combination before
-        if key in seen_keys:
-            duplicate_count += 1
+        if original is not None:
+            stats['duplicate_count'] += 1
             # Keep first 5 examples for reporting
-            if len(duplicate_examples) < 5:
-                original_idx = seen_keys[key]
-                duplicate_examples.append({
+            if len(stats['duplicate_examples']) < 5:
+                stats['duplicate_examples'].append({
                     'name': company.get('company', {}).get('name'),
-                    'original_index': original_idx,
+                    'original_index': original,
                     'duplicate_index': idx
                 })
             continue
         
-        seen_keys[key] = idx
-        unique_companies.append(company)
+        if index is not None:
+            index.add(digest, company.get('accession_number') or f"#{idx}")
+        else:
+            seen_keys[digest] = idx
+        stats['unique_keys'] += 1
+        yield company
+
+
+def deduplicate_companies(companies: List[Dict]) -> Tuple[List[Dict], int, Dict]:
+    """
+    Remove duplicate companies based on exact name, phone, and address matches.
+    Returns (unique_companies, duplicate_count, duplicate_stats).
+    """
+    stats = {}
+    unique_companies = list(iter_unique_companies(companies, stats))
+    duplicate_count = stats.pop('duplicate_count')
+    return unique_companies, duplicate_count, stats
+
+
+def find_fuzzy_duplicates(companies: Iterable[Dict], threshold: float) -> Tuple[List[Dict], Set[int], int]:
+    """
+    Cluster near-duplicate companies.
+    Returns (cluster report, positions to drop, candidate pairs scored); positions count
+    companies in the order given, and the first member of each cluster is kept.
+    """
+    features = []
+    labels = []
+    for company in companies:
+        features.append(company_features(company))
+        labels.append({
+            'accession_number': company.get('accession_number'),
+            'name': (company.get('company') or {}).get('name')
+        })
     
-    stats = {
-        'duplicate_examples': duplicate_examples,
-        'unique_keys': len(seen_keys)
-    }
+    clusters, candidate_count = find_duplicate_clusters(features, threshold)
     
-    return unique_companies, duplicate_count, stats
+    report = []
+    drop = set()
+    for cluster in clusters:
+        kept, *duplicates = cluster['members']
+        drop.update(duplicates)
+        report.append({
+            'confidence': cluster['confidence'],
+            'kept': {'index': kept, **labels[kept]},
+            'duplicates': [
+                {'index': i, **labels[i], 'score': cluster['scores'][i]}
+                for i in duplicates
+            ]
+        })
+    return report, drop, candidate_count
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python sec_unique.py <input_json_file>")
+    args = sys.argv[1:]
+    output_format = pop_format_option(args)
+    
+    fuzzy = '--fuzzy' in args
+    if fuzzy:
+        args.remove('--fuzzy')
+    threshold = DEFAULT_THRESHOLD
+    if '--threshold' in args:
+        position = args.index('--threshold')
+        try:
+            threshold = float(args[position + 1])
+        except (IndexError, ValueError):
+            print("Error: --threshold needs a number between 0 and 1")
+            sys.exit(1)
+        del args[position:position + 2]
+    index_path = None
+    if '--index' in args:
+        position = args.index('--index')
+        if position + 1 >= len(args):
+            print("Error: --index needs a file path")
+            sys.exit(1)
+        index_path = args[position + 1]
+        del args[position:position + 2]
+    
+    if len(args) < 1:
+        print("Usage: python sec_unique.py <input_json_file> [--format json|jsonl] [--fuzzy [--threshold 0.9]] [--index PATH]")
         print("Example: python sec_unique.py sec_companies_targets.json")
         sys.exit(1)
     
-    input_file = Path(sys.argv[1])
+    input_file = Path(args[0])
     
     if not input_file.exists():
         print(f"Error: File '{input_file}' not found")
         sys.exit(1)
     
     # Create output filename by inserting '_unique' before extension
-    output_file = input_file.with_name(
-        f"{input_file.stem}_unique{input_file.suffix}"
-    )
+    output_file = Path(output_path_for(
+        input_file.with_name(f"{input_file.stem}_unique{input_file.suffix}"),
+        output_format
+    ))
     
     print(f"Reading from: {input_file}")
     print(f"Will write to: {output_file}")
     
-    # Load the data
-    print("\nLoading JSON data...")
+    # Stream the data ({metadata, companies}, a bare array or JSONL)
+    print("\nStreaming JSON data...")
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        document, companies = read_companies(input_file)
     except json.JSONDecodeError as e:
         print(f"Error: Invalid JSON in {input_file}: {e}")
         sys.exit(1)
     
-    # Extract companies list
-    if isinstance(data, dict) and 'companies' in data:
-        companies = data['companies']
-        metadata = data.get('metadata', {})
-    else:
-        print("Error: Expected JSON with 'companies' key")
-        sys.exit(1)
-    
-    original_count = len(companies)
-    print(f"\nOriginal count: {original_count:,} companies")
+    metadata = document.get('metadata', {})
     if metadata:
         print(f"Date range: {metadata.get('date_range', {}).get('earliest_quarter')} to {metadata.get('date_range', {}).get('latest_quarter')}")
     
+    index = None
+    if index_path:
+        index = DedupIndex(index_path)
+        indexed_before = len(index)
+        print(f"Dedup index: {index_path} ({indexed_before:,} keys)")
+    
     # Deduplicate
     print("\nDeduplicating...")
-    unique_companies, duplicate_count, stats = deduplicate_companies(companies)
+    fuzzy_report = []
+    fuzzy_count = 0
+    try:
+        stats = {}
+        unique_stream = iter_unique_companies(companies, stats, index)
+        
+        if fuzzy:
+            # Pass 1 clusters the exact-unique companies; pass 2 re-streams the input
+            # through the same exact dedup and skips every fuzzy duplicate
+            print(f"Finding near-duplicates (threshold {threshold})...")
+            fuzzy_report, drop, candidate_count = find_fuzzy_duplicates(unique_stream, threshold)
+            fuzzy_count = len(drop)
+            print(f"Scored {candidate_count:,} candidate pairs, found {len(fuzzy_report):,} duplicate clusters")
+            if index is not None:
+                # Pass 2 adds the keys again
+                index.rollback()
+            
+            document, companies = read_companies(input_file)
+            stats = {}
+            unique_stream = (
+                company for position, company in enumerate(iter_unique_companies(companies, stats, index))
+                if position not in drop
+            )
+        
+        if output_format == 'jsonl':
+            # Write each unique company as soon as it is seen
+            unique_count, _ = write_jsonl(output_file, unique_stream)
+        else:
+            unique_companies = list(unique_stream)
+            unique_count = len(unique_companies)
+        duplicate_count = stats['duplicate_count']
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON in {input_file}: {e}")
+        sys.exit(1)
+    
+    if index is not None:
+        # Fuzzy duplicates were indexed in pass 2 too, so later runs also drop their exact repeats
+        index.commit()
+        indexed_after = len(index)
+        index.close()
+    
+    original_count = unique_count + duplicate_count + fuzzy_count
+    print(f"\nOriginal count: {original_count:,} companies")
     
     print(f"\n{'='*60}")
     print(f"RESULTS:")
     print(f"{'='*60}")
-    print(f"Unique companies: {len(unique_companies):,}")
+    print(f"Unique companies: {unique_count:,}")
     print(f"Duplicates removed: {duplicate_count:,} ({duplicate_count/original_count*100:.1f}%)")
-    print(f"Reduction: {original_count:,} → {len(unique_companies):,}")
+    if fuzzy:
+        print(f"Near-duplicates removed: {fuzzy_count:,} ({fuzzy_count/original_count*100:.1f}%)")
+    print(f"Reduction: {original_count:,} → {unique_count:,}")
+    if index is not None:
+        print(f"Dedup index: {indexed_before:,} → {indexed_after:,} keys")
     
     # Show examples of duplicates found
     if stats['duplicate_examples']:
@@ -141,19 +265,40 @@ def main():
         for ex in stats['duplicate_examples']:
             print(f"  • {ex['name']} (indices: {ex['original_index']}, {ex['duplicate_index']})")
     
-    # Update metadata
-    output_data = data.copy()
-    output_data['companies'] = unique_companies
+    # Update metadata (keys after the companies array are only known once it's been read)
+    output_data = dict(document)
     
     if 'metadata' in output_data:
-        output_data['metadata']['total_companies'] = len(unique_companies)
+        output_data['metadata']['total_companies'] = unique_count
         output_data['metadata']['duplicates_removed'] = duplicate_count
         output_data['metadata']['deduplication_date'] = str(Path(__file__).stat().st_mtime)
+        if fuzzy:
+            output_data['metadata']['fuzzy_duplicates_removed'] = fuzzy_count
+            output_data['metadata']['fuzzy_threshold'] = threshold
+        if index is not None:
+            output_data['metadata']['dedup_index'] = index_path
+            output_data['metadata']['dedup_index_keys'] = indexed_after
     
     # Write output
-    print(f"\nWriting unique companies to: {output_file}")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    if output_format == 'jsonl':
+        print(f"\nWrote unique companies to: {output_file}")
+        write_metadata(output_file, output_data.get('metadata', {}))
+    else:
+        output_data['companies'] = unique_companies
+        print(f"\nWriting unique companies to: {output_file}")
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(output_data, f, indent=2, ensure_ascii=False)
+    
+    if fuzzy:
+        clusters_file = output_file.with_name(f"{input_file.stem}_unique_clusters.json")
+        print(f"Writing {len(fuzzy_report):,} duplicate clusters to: {clusters_file}")
+        with open(clusters_file, 'w', encoding='utf-8') as f:
+            json.dump({'threshold': threshold, 'clusters': fuzzy_report}, f, indent=2, ensure_ascii=False)
+        
+        # Show the least certain clusters - the ones worth a manual look
+        for cluster in sorted(fuzzy_report, key=lambda c: c['confidence'])[:5]:
+            names = ', '.join(d['name'] or '?' for d in cluster['duplicates'])
+            print(f"  ≈ {cluster['kept']['name']} ← {names} (confidence {cluster['confidence']:.2f})")
     
     input_size = input_file.stat().st_size
     output_size = output_file.stat().st_size